@@ -1,15 +1,31 @@
-from flask import Flask, render_template, jsonify, request, redirect, url_for
-import yfinance as yf
+from flask import Flask, render_template, jsonify, request, redirect, url_for, Response, g
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import os
+import json
+import time
+import threading
+import concurrent.futures
+
+import bar_store
+import market_data
+import metrics
+import profiling
+import scan_feed
+from caching import SWRCache, SingleFlight
+from scan_store import ScanResultStore
+from precompressed import EncodedPayload
+import scan_history
+from downsample import downsample_chart
+import timeframes
 
 # --- AUTH IMPORTS (Das ist neu) ---
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask import render_template, request, session
+from functools import wraps
 
 app = Flask(__name__)
 
@@ -39,27 +55,160 @@ with app.app_context():
 def load_user(user_id):
     return User.query.get(int(user_id))
 
-# Globale Variable für die Daten aus global_watchlist.csv
-latest_scan_results = []
+# Daten aus global_watchlist.csv (indiziert, wird nach jedem Scan komplett getauscht)
+scan_results = ScanResultStore()
+
+# --- CACHE FÜR /api/details ---
+# Getrennte TTLs je Datenart; abgelaufene Werte werden noch `stale_ttl` lang sofort
+# ausgeliefert, während im Hintergrund neu geladen wird (stale-while-revalidate).
+info_cache = SWRCache("info", ttl=15 * 60, stale_ttl=6 * 60 * 60, max_bytes=64 * 1024 * 1024)
+news_cache = SWRCache("news", ttl=15 * 60, stale_ttl=60 * 60, max_bytes=16 * 1024 * 1024)
+
+# Basis-Reihen pro Symbol (timeframes.py): alle Chart-Zeiträume und die 2-Jahres-
+# History der Details werden daraus abgeleitet; die langen Tagesreihen nur für 5Y/MAX
+base_caches = {
+    "intraday": SWRCache("intraday", ttl=60, stale_ttl=10 * 60, max_bytes=64 * 1024 * 1024),
+    "daily": SWRCache("daily", ttl=5 * 60, stale_ttl=60 * 60, max_bytes=64 * 1024 * 1024),
+    "daily_long": SWRCache("daily_long", ttl=5 * 60, stale_ttl=60 * 60, max_bytes=64 * 1024 * 1024),
+    "daily_max": SWRCache("daily_max", ttl=5 * 60, stale_ttl=60 * 60, max_bytes=32 * 1024 * 1024),
+}
+
+
+# Request-Coalescing: pro (Endpoint, Symbol, Periode) läuft höchstens ein Abruf
+inflight = SingleFlight()
+
+
+def _load_info(symbol):
+    return market_data.info(symbol) or {}
+
+
+def _load_base(symbol, kind):
+    """
+    Basis-Reihe (intraday/daily), nur Zeilen mit vollständigem OHLC.
+    Yahoo-Fehler gehen an den Aufrufer und landen nicht im Cache – sonst bliebe
+    nach einem Aussetzer TTL + stale_ttl lang eine leere Reihe stehen.
+    """
+    key = symbol.upper()
+
+    def load():
+        with profiling.span(f"base.{kind}"):
+            df = timeframes.load_base(symbol, kind, strict=True)
+            return df.dropna(subset=["Open", "High", "Low", "Close"])
+    return base_caches[kind].get(key, load)
+
+
+def _load_details_history(symbol):
+    return bar_store.slice_period(_load_base(symbol, "daily"), "2y")
+
+
+def _load_news(symbol):
+    return market_data.news(symbol) or []
+
+
+# --- PARALLELE UPSTREAM-CALLS IN get_details ---
+# info, History und News sind unabhängig -> gleichzeitig starten. Jeder Call hat ein
+# eigenes Zeitbudget ab Request-Beginn; was nicht rechtzeitig fertig ist, fehlt in
+# der Antwort (Feld "partial"), läuft aber weiter und landet danach im Cache.
+upstream_pool = concurrent.futures.ThreadPoolExecutor(max_workers=16, thread_name_prefix="upstream")
+DETAILS_DEADLINES = {"info": 5.0, "history": 5.0, "news": 3.0}
+DETAILS_PARTIAL = metrics.REGISTRY.counter(
+    "valueradar_details_partial_total", "Teile von /api/details, die gefehlt haben", ("kind", "reason"))
+
+
+def _await_upstream(future, kind, symbol, started, partial):
+    """Ergebnis eines Upstream-Futures oder None (Timeout/Fehler -> `partial`)."""
+    remaining = started + DETAILS_DEADLINES[kind] - time.time()
+    try:
+        with profiling.span(f"wait.{kind}"):
+            return future.result(timeout=max(0.0, remaining))
+    except concurrent.futures.TimeoutError:
+        DETAILS_PARTIAL.inc(kind=kind, reason="timeout")
+        print(f"[DETAILS] {kind}-Timeout {symbol} nach {DETAILS_DEADLINES[kind]}s")
+    except Exception as e:
+        DETAILS_PARTIAL.inc(kind=kind, reason="error")
+        print(f"[DETAILS] {kind}-Fehler {symbol}: {e}")
+    partial.append(kind)
+    return None
+
+
+SCAN_RESULTS_FILE = "global_watchlist.csv"
+SCAN_CHECK_INTERVAL = 5  # Sekunden zwischen zwei stat()-Aufrufen auf die CSV
+_scan_mtime = None
+_scan_checked_at = 0.0
+_scan_lock = threading.Lock()
+_reload_thread = None
+_reload_guard = threading.Lock()
 
 
 def run_background_scan():
     """
     Lädt die global_watchlist.csv, die von webfinance.py erzeugt wird.
     Diese Datei enthält: Region, Symbol, Name, Price, Reason, Link.
+    Die neue Liste wird komplett aufgebaut und dann in einem Schritt getauscht –
+    laufende Requests sehen entweder die alte oder die neue Liste, nie eine halbe.
     """
-    global latest_scan_results
+    global scan_results, _scan_mtime
+    with _scan_lock:
+        try:
+            if os.path.exists(SCAN_RESULTS_FILE):
+                mtime = os.path.getmtime(SCAN_RESULTS_FILE)
+                df = pd.read_csv(SCAN_RESULTS_FILE)
+                scan_results = ScanResultStore(df.to_dict(orient="records"), version=mtime)
+                _scan_mtime = mtime
+                print(f"[SCAN] {len(scan_results)} Zeilen aus {SCAN_RESULTS_FILE} geladen.")
+            else:
+                print(f"[SCAN] Datei {SCAN_RESULTS_FILE} nicht gefunden.")
+        except Exception as e:
+            # Alte Liste behalten statt den Nutzern eine leere Watchlist zu zeigen
+            print(f"[SCAN-ERROR] Konnte {SCAN_RESULTS_FILE} nicht laden: {e}")
+
+
+def _reload_in_background():
+    """CSV in einem eigenen Thread neu einlesen; läuft schon ein Reload, diesen liefern."""
+    global _reload_thread
+    with _reload_guard:
+        if _reload_thread is None or not _reload_thread.is_alive():
+            _reload_thread = threading.Thread(target=run_background_scan, name="scan-reload", daemon=True)
+            _reload_thread.start()
+        return _reload_thread
+
+
+def maybe_reload_scan_results(force=False, wait=False):
+    """
+    Neue CSV (vom Scheduler oder einem manuellen Scan) am Änderungszeitpunkt erkennen.
+    Eingelesen und indiziert wird im Hintergrund – Requests bekommen solange den
+    bisherigen Schnappschuss, statt selbst auf das Parsen zu warten.
+    force=True prüft sofort, wait=True wartet auf den neuen Stand (z.B. wenn der
+    Live-Feed das Scan-Ende meldet und das Dashboard gleich danach neu lädt).
+    """
+    global _scan_checked_at
+    now = time.time()
+    if not force and now - _scan_checked_at < SCAN_CHECK_INTERVAL:
+        return
+    _scan_checked_at = now
     try:
-        if os.path.exists("global_watchlist.csv"):
-            df = pd.read_csv("global_watchlist.csv")
-            latest_scan_results = df.to_dict(orient="records")
-            print(f"[SCAN] {len(latest_scan_results)} Zeilen aus global_watchlist.csv geladen.")
-        else:
-            latest_scan_results = []
-            print("[SCAN] Datei global_watchlist.csv nicht gefunden.")
-    except Exception as e:
-        print(f"[SCAN-ERROR] Konnte global_watchlist.csv nicht laden: {e}")
-        latest_scan_results = []
+        mtime = os.path.getmtime(SCAN_RESULTS_FILE)
+    except OSError:
+        return
+    if mtime != _scan_mtime:
+        thread = _reload_in_background()
+        if wait:
+            thread.join()
+
+
+def _on_scan_complete(name, result):
+    # Jeder Scheduler-Lauf enthält den Value-Scan (global_watchlist.csv)
+    run_background_scan()
+
+
+def start_scheduler():
+    """Scans im Hintergrund (eigene Prozesse mit niedriger Priorität) starten."""
+    import scheduler
+    return scheduler.ScanScheduler(on_complete=_on_scan_complete).start()
+
+
+# Beim Import laden -> auch der erste Request nach einem Neustart sieht sofort Daten
+run_background_scan()
 
 # --- LOGIN / REGISTER ROUTEN (NEU) ---
 
@@ -122,23 +271,180 @@ def dashboard():
 @app.route("/api/stocks")
 @login_required
 def get_stocks():
-    if not latest_scan_results:
-        run_background_scan()
-    return jsonify(latest_scan_results)
+    """
+    Scan-Ergebnisse, optional gefiltert/sortiert/seitenweise:
+    ?region=US,DE&min_score=75&symbols=AAPL,MSFT&q=bank&sort=-score&limit=50&offset=0
+    Antwort bleibt eine Liste; die Gesamtzahl der Treffer steht in X-Total-Count.
+    min_score und sort=score gibt es nur für Ergebnisse mit Score-Spalte
+    (Breakout), sonst 400 – die Value-Watchlist hat keinen Score.
+    Standard-Ansichten (Region, Sortierung, Seite) werden pro Scan-Stand nur
+    einmal gebaut und komprimiert (gzip/br); Suche, Favoriten und min_score sind
+    meist Einzelstücke und laufen ohne Cache, nur mit gzip. Unveränderte Daten
+    beantwortet der ETag mit 304.
+    """
+    maybe_reload_scan_results()
+    store = scan_results
+    args = request.args
+    limit = args.get("limit", type=int)
+    region = _csv_arg(args.get("region"))
+    symbols = _csv_arg(args.get("symbols"))
+    query = {
+        "region": tuple(r.upper() for r in region) if region else None,
+        "min_score": args.get("min_score", type=float),
+        "symbols": tuple(s.upper() for s in symbols) if symbols else None,
+        "q": args.get("q", "").strip().lower() or None,
+        "sort": args.get("sort") or None,
+        "offset": max(args.get("offset", 0, type=int), 0),
+        "limit": None if limit is None else max(limit, 0),
+    }
+    adhoc = query["q"] or query["symbols"] or query["min_score"] is not None
+    try:
+        if adhoc:
+            # Suche tippt Zeichen für Zeichen -> jede Anfrage anders, Cache brächte nichts
+            payload = _encode_stocks(store, query, compress=("gzip",))
+        else:
+            payload = store.cached(("stocks",) + tuple(query.values()),
+                                   lambda: _encode_stocks(store, query))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+    return payload.response(request)
+
+
+def _encode_stocks(store, query, compress=("gzip", "br")):
+    total, rows = store.query(**query)
+    return EncodedPayload(rows, headers={"X-Total-Count": str(total)}, compress=compress)
+
+
+def _csv_arg(value):
+    return [v.strip() for v in value.split(",") if v.strip()] if value else None
+
+
+# --- LIVE-TREFFER LAUFENDER SCANS (Server-Sent Events) ---
+
+# Jede offene Verbindung belegt einen Worker. Deshalb nur, solange ein Scan läuft:
+# ohne Scan antwortet der Stream mit 204 (EventSource verbindet dann nicht neu),
+# und das Dashboard öffnet ihn erst, wenn /api/stocks/scan-status "running" meldet.
+STREAM_MAX_SECONDS = 300   # danach baut der Browser die Verbindung selbst neu auf
+STREAM_HEARTBEAT = 15      # Sekunden; hält Proxies die Verbindung offen
+
+
+@app.route("/api/stocks/scan-status")
+@login_required
+def scan_status():
+    """Läuft gerade ein Scan? (?strategy=value|breakout) – billig, für Polling."""
+    strategy = request.args.get("strategy", "value")
+    if not strategy.isidentifier():
+        return jsonify({"error": "Ungültige Strategie"}), 400
+    run = scan_feed.last_run(strategy) or {}
+    return jsonify({"running": bool(run.get("running")), "counter": run.get("counter"),
+                    "total": run.get("total")})
+
+
+@app.route("/api/stocks/stream")
+@login_required
+def stream_stocks():
+    """
+    Treffer und Fortschritt des laufenden Scans als text/event-stream
+    (Ereignisse: start, hit, progress, done; ?strategy=value|breakout).
+    Die Event-ID "inode:offset" erlaubt dem Browser, nach einem Abbruch
+    per Last-Event-ID ohne Lücke weiterzulesen.
+    """
+    strategy = request.args.get("strategy", "value")
+    if not strategy.isidentifier():
+        return jsonify({"error": "Ungültige Strategie"}), 400
+    try:
+        inode, offset = (int(v) for v in request.headers["Last-Event-ID"].split(":"))
+    except (KeyError, ValueError):
+        if not scan_feed.is_running(strategy):
+            return Response(status=204)  # kein Scan -> Browser gibt die Verbindung auf
+        inode, offset = scan_feed.cursor(strategy)
+
+    def events():
+        yield "retry: 3000\n\n"
+        last_sent = time.time()
+        for inode_, offset_, event in scan_feed.follow(strategy, inode, offset, timeout=STREAM_MAX_SECONDS):
+            if event is None:
+                if time.time() - last_sent >= STREAM_HEARTBEAT:
+                    if not scan_feed.is_running(strategy):
+                        return  # "done" verpasst oder Scan abgestürzt: Worker freigeben
+                    last_sent = time.time()
+                    yield ": ping\n\n"
+                continue
+            name = event.pop("event")
+            if name == "done":
+                # CSV ist bereits geschrieben; der Stream-Worker wartet, nicht die Listen-Requests
+                maybe_reload_scan_results(force=True, wait=True)
+            last_sent = time.time()
+            yield (f"id: {inode_}:{offset_}\nevent: {name}\n"
+                   f"data: {json.dumps(event, default=str)}\n\n")
+            if name == "done":
+                return
+
+    return Response(events(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# --- SCAN-HISTORIE (scan_history.db) ---
+
+@app.route("/api/scans")
+@login_required
+def list_scans():
+    strategy = request.args.get("strategy") or None
+    limit = request.args.get("limit", 50, type=int)
+    return jsonify(scan_history.list_scans(strategy, limit=max(limit, 1)))
+
+
+@app.route("/api/scans/<strategy>/latest")
+@login_required
+def latest_scan(strategy):
+    snapshot = scan_history.latest_scan(strategy)
+    if snapshot is None:
+        return jsonify({"error": f"Kein Scan für '{strategy}' gespeichert"}), 404
+    return jsonify(snapshot)
+
+
+@app.route("/api/scans/diff")
+@login_required
+def diff_scans():
+    """?old=<scan_id>&new=<scan_id> oder ?strategy=breakout (die letzten zwei Läufe)."""
+    diff = scan_history.diff_scans(
+        request.args.get("old", type=int),
+        request.args.get("new", type=int),
+        strategy=request.args.get("strategy", "breakout"),
+    )
+    if diff is None:
+        return jsonify({"error": "Zu wenige Scans für einen Vergleich"}), 404
+    return jsonify(diff)
+
+
+@app.route("/api/scans/symbol/<symbol>")
+@login_required
+def symbol_scan_history(symbol):
+    return jsonify(scan_history.symbol_history(symbol, request.args.get("strategy") or None))
 
 
 @app.route("/api/details/<symbol>")
 @login_required
 def get_details(symbol):
-    global latest_scan_results
+    # Gleichzeitige Anfragen zum selben Symbol teilen sich einen Upstream-Abruf
+    key = symbol.upper()
+    with profiling.span("details.build"):
+        payload = inflight.do(("details", key), lambda: _build_details(symbol, key))
+    with profiling.span("json"):
+        return jsonify(payload)
+
+
+def _build_details(symbol, key):
+    """Baut das Details-Payload (dict) für ein Symbol."""
     try:
-        ticker = yf.Ticker(symbol)
+        started = time.time()
+        partial = []
+        info_future = upstream_pool.submit(profiling.bind(info_cache.get), key, lambda: _load_info(symbol))
+        hist_future = upstream_pool.submit(profiling.bind(_load_details_history), symbol)
+        news_future = upstream_pool.submit(profiling.bind(news_cache.get), key, lambda: _load_news(symbol))
 
         # Versuche verschiedene Wege, an Infos zu kommen
-        try:
-            info = ticker.info
-        except Exception:
-            info = {}
+        info = _await_upstream(info_future, "info", symbol, started, partial) or {}
         # Währung
         currency = info.get("currency", "USD")
 
@@ -206,9 +512,8 @@ def get_details(symbol):
         perf_1y = None
         perf_3m = None
         try:
-            hist = ticker.history(period="2y", interval="1d")
+            hist = _await_upstream(hist_future, "history", symbol, started, partial)
             if hist is not None and not hist.empty:
-                hist = hist.dropna(subset=["Close"])
                 last_close = float(hist["Close"].iloc[-1])
 
                 # Nur falls currentPrice fehlt, Fallback auf letzten Close
@@ -232,7 +537,7 @@ def get_details(symbol):
         # News (Yahoo Finance)
         news_list = []
         try:
-            raw_news = ticker.news or []
+            raw_news = _await_upstream(news_future, "news", symbol, started, partial) or []
             for n in raw_news[:6]:
                 title = n.get("title")
                 publisher = n.get("publisher")
@@ -262,17 +567,7 @@ def get_details(symbol):
         risks = []
 
         # 1) Reason aus globaler Watchlist (falls vorhanden)
-        try:
-            row = next(
-                (
-                    r
-                    for r in latest_scan_results
-                    if (r.get("Symbol") or r.get("symbol")) == symbol
-                ),
-                None,
-            )
-        except Exception:
-            row = None
+        row = scan_results.get(symbol)
 
         if row and row.get("Reason"):
             pros.append(str(row["Reason"]))
@@ -301,7 +596,7 @@ def get_details(symbol):
             risks.append("-- No further warnings")
 
 
-        return jsonify({
+        return {
             "symbol": symbol,
             "name": name,
             "sector": sector,
@@ -347,112 +642,294 @@ def get_details(symbol):
             # Lists
             "pros": pros,
             "risks": risks,
-            "news": news_list
-        })
+            "news": news_list,
+
+            # Teile, die nicht rechtzeitig geladen werden konnten
+            "partial": partial,
+        }
 
 
 
 
     except Exception as e:
+        PAYLOAD_ERRORS.inc(endpoint="details")
         print(f"Fehler bei Details zu {symbol}: {e}")
-        return jsonify({"error": str(e)})
+        return {"error": str(e)}
 
 
 @app.route("/api/history/<symbol>/<period>")
 @login_required
 def get_history(symbol, period):
-    """Liefert OHLC + MAs + RSI für Chart."""
+    """
+    Liefert OHLC + MAs + RSI für Chart.
+    ?format=columnar -> parallele Arrays, ?max_points=N -> auf N Punkte verdichtet (LTTB).
+    """
+    fmt = request.args.get("format", "points")
+    max_points = request.args.get("max_points", type=int)
+    key = ("history", symbol.upper(), period, fmt, max_points)
+    with profiling.span("history.build"):
+        payload = inflight.do(key, lambda: _build_history(symbol, period, fmt, max_points))
+    with profiling.span("json"):
+        return jsonify(payload)
+
+
+def _points(ts, values):
+    """[{x, y}, ...] für ApexCharts, NaNs werden ausgelassen."""
+    mask = ~np.isnan(values)
+    return [{"x": x, "y": y} for x, y in zip(ts[mask].tolist(), values[mask].tolist())]
+
+
+def _nullable(values, decimals):
+    """Gerundete Liste mit None statt NaN (-> null im JSON)."""
+    out = np.round(values, decimals).astype(object)
+    out[np.isnan(values)] = None
+    return out.tolist()
+
+
+def _build_history(symbol, period, fmt="points", max_points=None):
+    """OHLC + MAs + RSI als dict (Format für renderApexChart)."""
     try:
-        ticker = yf.Ticker(symbol)
-
-        # --- Mapping Frontend-Period -> yfinance ---
-        if period == "1D":
-            yf_interval, yf_period = "5m", "1d"
-        elif period == "1W":   # 5 Handelstage, 30-Minuten-Kerzen
-            yf_interval, yf_period = "30m", "5d"
-        elif period == "1M":
-            yf_interval, yf_period = "1h", "1mo"
-        elif period == "6M":
-            yf_interval, yf_period = "1d", "6mo"
-        elif period == "1Y":
-            yf_interval, yf_period = "1d", "1y"
-        elif period == "5Y":
-            yf_interval, yf_period = "1wk", "5y"
-        elif period == "MAX":
-            yf_interval, yf_period = "1wk", "max"
-        else:  # Fallback
-            yf_interval, yf_period = "1d", "1y"
-
-        hist = ticker.history(interval=yf_interval, period=yf_period)
-        if hist is None or hist.empty:
-            return jsonify({"error": "Keine historischen Daten gefunden."})
-
-        # nur OHLC und NaNs raus
-        hist = hist[["Open", "High", "Low", "Close"]].dropna()
-
-        # Index in Spalte umwandeln, Spaltenname kann "Date" ODER "Datetime" sein
-        hist.reset_index(inplace=True)
-        time_col = "Date"
-        if "Datetime" in hist.columns:
-            time_col = "Datetime"
-
-        # Timestamp in ms für ApexCharts
-        hist["timestamp"] = hist[time_col].astype("int64") // 10**6
-
-        # Moving Averages (von Anfang an zeichnen)
-        hist["MA20"] = hist["Close"].rolling(window=20, min_periods=1).mean()
-        hist["MA50"] = hist["Close"].rolling(window=50, min_periods=1).mean()
-        hist["MA200"] = hist["Close"].rolling(window=200, min_periods=1).mean()
-
-        # RSI
-        delta = hist["Close"].diff()
-        gain = np.where(delta > 0, delta, 0)
-        loss = np.where(delta < 0, -delta, 0)
-        roll_up = pd.Series(gain).rolling(window=14).mean()
-        roll_down = pd.Series(loss).rolling(window=14).mean()
-        rs = roll_up / roll_down
-        rsi = 100.0 - (100.0 / (1.0 + rs))
-        hist["RSI"] = rsi
-
-        ohlc = []
-        ma20 = []
-        ma50 = []
-        ma200 = []
-        rsi_list = []
-
-        for _, row in hist.iterrows():
-            ts = int(row["timestamp"])
-            ohlc.append([
-                ts,
-                float(row["Open"]),
-                float(row["High"]),
-                float(row["Low"]),
-                float(row["Close"]),
-            ])
-
-            if not np.isnan(row["MA20"]):
-                ma20.append({"x": ts, "y": float(row["MA20"])})
-            if not np.isnan(row["MA50"]):
-                ma50.append({"x": ts, "y": float(row["MA50"])})
-            if not np.isnan(row["MA200"]):
-                ma200.append({"x": ts, "y": float(row["MA200"])})
-            if not np.isnan(row["RSI"]):
-                rsi_list.append({"x": ts, "y": float(row["RSI"])})
-
-        return jsonify({
-            "candle": ohlc,
-            "ma20": ma20,
-            "ma50": ma50,
-            "ma200": ma200,
-            "rsi": rsi_list
-        })
+        # Zeitraum wird lokal aus der Basis-Reihe abgeleitet (Resampling), Indikatoren
+        # laufen über die ganze Reihe, angezeigt wird erst ab `start`
+        kind, _, _ = timeframes.resolve(period)
+        base = _load_base(symbol, kind)
+        if base is None or base.empty:
+            return {"error": "Keine historischen Daten gefunden."}
+        with profiling.span("history.resample"):
+            hist, start = timeframes.derive(base[["Open", "High", "Low", "Close"]], period)
+
+        # Timestamp in ms für ApexCharts (Index heißt "Date" ODER "Datetime")
+        ts = hist.index.as_unit("ns").asi8 // 10**6
+        close = hist["Close"]
+
+        with profiling.span("history.indicators"):
+            # Moving Averages (von Anfang an zeichnen)
+            ma20 = close.rolling(window=20, min_periods=1).mean().to_numpy()
+            ma50 = close.rolling(window=50, min_periods=1).mean().to_numpy()
+            ma200 = close.rolling(window=200, min_periods=1).mean().to_numpy()
+
+            # RSI
+            delta = close.diff()
+            gain = np.where(delta > 0, delta, 0)
+            loss = np.where(delta < 0, -delta, 0)
+            roll_up = pd.Series(gain).rolling(window=14).mean()
+            roll_down = pd.Series(loss).rolling(window=14).mean()
+            rs = roll_up / roll_down
+            rsi = (100.0 - (100.0 / (1.0 + rs))).to_numpy()
+
+        o, h, l, c = (hist[col].to_numpy() for col in ["Open", "High", "Low", "Close"])
+        ts, o, h, l, c, ma20, ma50, ma200, rsi = (
+            a[start:] for a in (ts, o, h, l, c, ma20, ma50, ma200, rsi))
+
+        # Erst NACH den Indikatoren verdichten, damit MA200 auf allen Kerzen beruht
+        lines = {"ma20": ma20, "ma50": ma50, "ma200": ma200, "rsi": rsi}
+        if max_points:
+            with profiling.span("history.downsample"):
+                ts, o, h, l, c, sampled = downsample_chart(ts, o, h, l, c, lines, max_points)
+        else:
+            sampled = {name: (ts, values) for name, values in lines.items()}
+
+        if fmt == "columnar":
+            # Parallele Arrays statt ein Objekt pro Punkt, Lücken als null.
+            # Verdichtet wählt LTTB je Linie eigene Punkte -> eigene Zeitachse in line_t
+            line_t = {name: line_ts.tolist() for name, (line_ts, _) in sampled.items() if line_ts is not ts}
+            return {
+                "format": "columnar",
+                "t": ts.tolist(),
+                "open": _nullable(o, 4),
+                "high": _nullable(h, 4),
+                "low": _nullable(l, 4),
+                "close": _nullable(c, 4),
+                "ma20": _nullable(sampled["ma20"][1], 4),
+                "ma50": _nullable(sampled["ma50"][1], 4),
+                "ma200": _nullable(sampled["ma200"][1], 4),
+                "rsi": _nullable(sampled["rsi"][1], 2),
+                **({"line_t": line_t} if line_t else {}),
+            }
+
+        return {
+            "candle": [list(row) for row in zip(ts.tolist(), o.tolist(), h.tolist(), l.tolist(), c.tolist())],
+            "ma20": _points(*sampled["ma20"]),
+            "ma50": _points(*sampled["ma50"]),
+            "ma200": _points(*sampled["ma200"]),
+            "rsi": _points(*sampled["rsi"])
+        }
 
     except Exception as e:
+        PAYLOAD_ERRORS.inc(endpoint="history")
         print(f"Chart Fehler: {e}")
-        return jsonify({"error": str(e)})
+        return {"error": str(e)}
+
+
+# --- METRIKEN (/metrics im Prometheus-Format, siehe metrics.py) ---
+
+REQUEST_SECONDS = metrics.REGISTRY.histogram(
+    "valueradar_http_request_duration_seconds", "Antwortzeit je Route", ("route", "method", "status"))
+# /api/details und /api/history antworten bei Fehlern mit 200 + {"error": ...}
+PAYLOAD_ERRORS = metrics.REGISTRY.counter(
+    "valueradar_payload_errors_total", "Antworten mit Fehler-Payload", ("endpoint",))
+METRICS_TOKEN = os.environ.get("VR_METRICS_TOKEN")   # gesetzt -> Bearer-Token nötig
+
+
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def _record_request(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        # Routen-Muster statt Pfad, sonst wird jedes Symbol eine eigene Zeitreihe
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        REQUEST_SECONDS.observe(time.perf_counter() - started, route=route,
+                                method=request.method, status=response.status_code)
+    metrics.REGISTRY.flush()
+    return response
+
+
+@metrics.REGISTRY.collector
+def _cache_metrics():
+    caches = [info_cache, news_cache] + list(base_caches.values())
+    for cache in caches:
+        s = cache.stats()
+        for result, key in (("hit", "hits"), ("stale", "stale_hits"), ("miss", "misses")):
+            yield ("valueradar_cache_requests_total", "counter", "Cache-Abfragen nach Ergebnis",
+                   {"cache": cache.name, "result": result}, s[key])
+        yield ("valueradar_cache_entries", "gauge", "Einträge im Cache", {"cache": cache.name}, s["entries"])
+        yield ("valueradar_cache_bytes", "gauge", "Geschätzte Größe des Caches", {"cache": cache.name}, s["bytes"])
+    yield ("valueradar_coalesced_requests_total", "counter",
+           "Requests, die auf einen laufenden Abruf gewartet haben", {}, inflight.coalesced)
+
+
+def _hit_ratios(snap):
+    """Trefferquote je Cache (stale zählt als Treffer) und Bar-Store-Intervall."""
+    totals = {}
+    for (cache, result), value in _by_labels(snap, "valueradar_cache_requests_total", "cache", "result"):
+        hit, total = totals.get(cache, (0, 0))
+        totals[cache] = (hit + (value if result != "miss" else 0), total + value)
+    for (interval, result), value in _by_labels(snap, "valueradar_bar_store_updates_total", "interval", "result"):
+        hit, total = totals.get(f"bar_store_{interval}", (0, 0))
+        totals[f"bar_store_{interval}"] = (hit + (value if result == "fresh" else 0), total + value)
+    return [({"cache": name}, round(hit / total, 4)) for name, (hit, total) in sorted(totals.items()) if total]
+
+
+def _by_labels(snap, name, *labelnames):
+    metric = snap.get(name)
+    if metric is None:
+        return []
+    index = [metric["labels"].index(n) for n in labelnames]
+    return [(tuple(labels[i] for i in index), value) for labels, value in metric["values"]]
+
+
+def _scan_metrics():
+    """Letzter Lauf je Strategie aus dem Live-Feed (die Scans laufen in eigenen Prozessen)."""
+    samples = {"seconds": [], "symbols": [], "rate": [], "hits": [], "running": []}
+    for name in scan_feed.names():
+        run = scan_feed.last_run(name)
+        if run is None:
+            continue
+        labels = {"strategy": name}
+        done = run["counter"] - run["resumed"]
+        samples["seconds"].append((labels, round(run["seconds"], 3)))
+        samples["symbols"].append((labels, run["counter"]))
+        samples["rate"].append((labels, round(done / run["seconds"], 3) if run["seconds"] > 0 else 0))
+        samples["hits"].append((labels, run["hits"]))
+        samples["running"].append((labels, 1 if run["running"] else 0))
+    return [
+        ("valueradar_scan_duration_seconds", "Laufzeit des letzten (oder laufenden) Scans", samples["seconds"]),
+        ("valueradar_scan_symbols", "Bearbeitete Symbole im letzten Scan", samples["symbols"]),
+        ("valueradar_scan_symbols_per_second", "Durchsatz des letzten Scans (ohne Resume)", samples["rate"]),
+        ("valueradar_scan_hits", "Treffer im letzten Scan", samples["hits"]),
+        ("valueradar_scan_running", "1, solange der Scan läuft", samples["running"]),
+    ]
+
+
+@app.route("/metrics")
+def prometheus_metrics():
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        return Response("unauthorized\n", status=401, mimetype="text/plain")
+    snap = metrics.REGISTRY.collect()
+    # Quoten und Scan-Werte erst nach dem Zusammenführen aller Worker berechnen
+    gauges = [("valueradar_cache_hit_ratio", "Trefferquote je Cache", _hit_ratios(snap))]
+    gauges += _scan_metrics()
+    for name, help, values in gauges:
+        labelnames = sorted(values[0][0]) if values else []
+        snap[name] = {"type": "gauge", "help": help, "labels": labelnames,
+                      "values": [[[str(l[n]) for n in labelnames], v] for l, v in values]}
+    return Response(metrics.render(snap), mimetype="text/plain; version=0.0.4")
+
+
+# --- PROFILING LANGSAMER REQUESTS (?profile=1 für Admins, siehe profiling.py) ---
+
+# Admins per Benutzername, z.B. VR_ADMIN_USERS=lars,ops
+ADMIN_USERS = {u.strip() for u in os.environ.get("VR_ADMIN_USERS", "").split(",") if u.strip()}
+
+
+def _is_admin():
+    return current_user.is_authenticated and current_user.username in ADMIN_USERS
+
+
+def admin_required(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not _is_admin():
+            return jsonify({"error": "Nur für Admins"}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@app.before_request
+def _start_profile():
+    forced = request.args.get("profile") == "1" and _is_admin()
+    if forced or profiling.should_sample():
+        g.profile = profiling.start(f"{request.method} {request.full_path.rstrip('?')}", forced)
+
+
+@app.after_request
+def _finish_profile(response):
+    trace = g.pop("profile", None)
+    if trace is not None:
+        profile_id = profiling.finish(trace, response.status_code)
+        if profile_id is not None:
+            response.headers["X-Profile-Id"] = str(profile_id)
+    return response
+
+
+@app.teardown_request
+def _drop_profile(exc):
+    # Abbruch ohne after_request: Sampler trotzdem stoppen
+    trace = g.pop("profile", None)
+    if trace is not None:
+        profiling.finish(trace, 500)
+
+
+@app.route("/admin/profiles")
+@login_required
+@admin_required
+def list_profiles():
+    return jsonify(profiling.recent())
 
 
+@app.route("/admin/profiles/<int:profile_id>")
+@login_required
+@admin_required
+def show_profile(profile_id):
+    """Spans + häufigste Stacks; ?format=collapsed -> Text für flamegraph.pl/speedscope."""
+    if request.args.get("format") == "collapsed":
+        text = profiling.collapsed(profile_id)
+        if text is not None:
+            return Response(text, mimetype="text/plain")
+    else:
+        profile = profiling.get(profile_id, top=request.args.get("top", profiling.TOP_STACKS, type=int))
+        if profile is not None:
+            return jsonify(profile)
+    return jsonify({"error": "Profil nicht (mehr) im Ringpuffer"}), 404
+
 
 if __name__ == "__main__":
-    run_background_scan()
+    # Mit debug=True startet Werkzeug einen Reloader-Prozess; der Scheduler läuft
+    # nur im eigentlichen Server-Prozess
+    if os.environ.get("VR_SCHEDULER") == "1" and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_scheduler()
     app.run(debug=True, port=5000)
\ No newline at end of file
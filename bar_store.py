@@ -0,0 +1,330 @@
+import os
+import re
+import json
+import time
+import threading
+
+import numpy as np
+import pandas as pd
+
+import market_data
+import metrics
+
+# ==============================================================================
+# LOKALER OHLCV-SPEICHER (BAR STORE)
+# ==============================================================================
+# Pro Symbol und Intervall wird eine .npy-Datei (strukturiertes Array) abgelegt,
+# die per Memory-Mapping gelesen wird. Scanner und Chart-API lesen von hier und
+# holen bei Yahoo nur noch die Kerzen NACH dem letzten gespeicherten Zeitstempel.
+#
+#   bar_store/<interval>/<SYMBOL>.npy   -> ts (UTC ns), open, high, low, close, volume
+#   bar_store/<interval>/<SYMBOL>.json  -> Zeitzone, abgedeckter Zeitraum, letzter Abruf
+
+BAR_STORE_DIR = os.environ.get("VR_BAR_STORE_DIR", "bar_store")
+
+BAR_DTYPE = np.dtype([
+    ("ts", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Wie alt (Sekunden) der letzte Abruf sein darf, bevor wir Yahoo erneut fragen
+MAX_AGE = {
+    "5m": 60, "15m": 120, "30m": 300, "1h": 600,
+    "1d": 15 * 60, "1wk": 60 * 60, "1mo": 6 * 60 * 60,
+}
+
+# Intraday-Daten liefert Yahoo nur begrenzt zurück -> älteres wird abgeschnitten
+RETENTION_DAYS = {"5m": 60, "15m": 60, "30m": 60, "1h": 730}
+
+# Yahoo-Perioden -> Kalender-Offset (für Abdeckung und Zuschnitt)
+PERIOD_OFFSETS = {
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+# Toleranz beim Abgleich der überlappenden Kerze (Dividenden/Splits verschieben
+# die adjustierten Kurse -> dann komplett neu laden)
+ADJUST_TOLERANCE = 1e-3
+
+
+# fresh = ohne Netzwerk, delta = nur neue Kerzen, full = kompletter Download
+UPDATES = metrics.REGISTRY.counter(
+    "valueradar_bar_store_updates_total", "Bar-Store-Abfragen nach Ergebnis", ("interval", "result"))
+
+
+def _is_intraday(interval):
+    return interval[-1] in "mh"  # 5m, 30m, 1h (aber nicht 1mo)
+
+
+def _safe_name(symbol):
+    return re.sub(r"[^A-Za-z0-9._-]", "_", symbol.upper())
+
+
+def _frame_to_bars(df):
+    """DataFrame (yfinance-Format) -> strukturiertes Array."""
+    df = df.dropna(subset=["Close"])
+    idx = df.index
+    if idx.tz is None:
+        idx = idx.tz_localize("UTC")
+    bars = np.empty(len(df), dtype=BAR_DTYPE)
+    bars["ts"] = idx.tz_convert("UTC").as_unit("ns").asi8
+    for col in COLUMNS:
+        bars[col.lower()] = df[col].to_numpy(dtype="f8") if col in df else np.nan
+    return bars
+
+
+def _bars_to_frame(bars, tz, interval):
+    index = pd.to_datetime(bars["ts"], unit="ns", utc=True).tz_convert(tz)
+    index.name = "Datetime" if _is_intraday(interval) else "Date"
+    return pd.DataFrame({col: bars[col.lower()] for col in COLUMNS}, index=index)
+
+
+def slice_period(df, period):
+    """Schneidet eine Yahoo-Periode ('1d', '5d', '6mo', '1y', 'max', ...) ab der letzten Kerze zu."""
+    if df.empty or period in (None, "max"):
+        return df
+    if period.endswith("d"):
+        # 'Nd' = die letzten N Handelstage (wie yfinance), nicht Kalendertage
+        days = df.index.normalize()
+        keep = days.unique()[-int(period[:-1]):]
+        return df[days.isin(keep)]
+    offset = PERIOD_OFFSETS.get(period)
+    if offset is None:
+        return df
+    return df[df.index >= df.index[-1] - offset]
+
+
+def _period_start(period, now):
+    """Ab wann die gespeicherten Daten mindestens reichen müssen (UTC ns, None = max)."""
+    if period == "max":
+        return None
+    if period.endswith("d"):
+        # Wochenenden/Feiertage: großzügig in Kalendertage umrechnen
+        return (now - pd.Timedelta(days=int(period[:-1]) * 2 + 3)).value
+    offset = PERIOD_OFFSETS.get(period, PERIOD_OFFSETS["1y"])
+    return (now - offset).value
+
+
+def _covering_period(start, now):
+    """Kleinste Yahoo-Periode, die bis `start` zurückreicht."""
+    slack = pd.Timedelta(days=1).value  # `start` stammt von einem früheren "now"
+    for period in PERIOD_OFFSETS:
+        if (now - PERIOD_OFFSETS[period]).value <= start + slack:
+            return period
+    return "max"
+
+
+class BarStore:
+    """Persistenter Kerzen-Speicher mit inkrementellem Update von Yahoo."""
+
+    def __init__(self, root=BAR_STORE_DIR):
+        self.root = root
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Dateien
+    # ------------------------------------------------------------------
+
+    def _paths(self, symbol, interval):
+        base = os.path.join(self.root, interval, _safe_name(symbol))
+        return base + ".npy", base + ".json"
+
+    def _lock(self, symbol, interval):
+        key = (symbol.upper(), interval)
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def read(self, symbol, interval="1d", mmap=True):
+        """Liefert (bars, meta) – bars ist ein Memory-Map; (None, None) wenn nichts da ist."""
+        bars_path, meta_path = self._paths(symbol, interval)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            bars = np.load(bars_path, mmap_mode="r" if mmap else None)
+        except (OSError, ValueError):
+            return None, None
+        return bars, meta
+
+    def write(self, symbol, interval, bars, meta):
+        """Schreibt atomar (temp-Datei + os.replace), Leser sehen nie halbe Dateien."""
+        bars_path, meta_path = self._paths(symbol, interval)
+        os.makedirs(os.path.dirname(bars_path), exist_ok=True)
+        tmp_bars = f"{bars_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp_meta = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_bars, "wb") as f:
+            np.save(f, np.ascontiguousarray(bars, dtype=BAR_DTYPE))
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_bars, bars_path)
+        os.replace(tmp_meta, meta_path)
+
+    def load(self, symbol, interval="1d", period=None):
+        """Nur lokal lesen (kein Netzwerk). Leerer DataFrame, wenn nichts gespeichert ist."""
+        bars, meta = self.read(symbol, interval)
+        if bars is None or len(bars) == 0:
+            return pd.DataFrame(columns=COLUMNS)
+        # Nur den benötigten Teil aus dem Memory-Map kopieren
+        start = _period_start(period, pd.Timestamp(int(bars["ts"][-1]), tz="UTC")) if period else None
+        lo = 0 if start is None else int(np.searchsorted(bars["ts"], start))
+        df = _bars_to_frame(np.array(bars[lo:]), meta.get("tz", "UTC"), interval)
+        return slice_period(df, period)
+
+    # ------------------------------------------------------------------
+    # Update von Yahoo
+    # ------------------------------------------------------------------
+
+    def _download(self, symbol, interval, strict=False, **kwargs):
+        if strict:
+            kwargs["raise_errors"] = True  # yfinance schluckt Fehler sonst und liefert leer
+        df = market_data.history(symbol, interval=interval, **kwargs)
+        if df is None or df.empty:
+            return None
+        return df
+
+    def merge(self, symbol, interval, df, period=None):
+        """Fremd geladene Kerzen (z.B. aus einem Batch-Download) in den Speicher übernehmen."""
+        if df is None or df.empty:
+            return
+        now = pd.Timestamp.now(tz="UTC")
+        with self._lock(symbol, interval):
+            # ohne Memory-Map lesen, sonst scheitert os.replace unter Windows
+            bars, meta = self.read(symbol, interval, mmap=False)
+            if df.index.tz is None and meta is not None and meta.get("tz", "UTC") != "UTC":
+                # Kerzen ohne Zeitzone: Börsendatum, nicht UTC (sonst doppelte Tage)
+                df = market_data.to_exchange_tz(df, meta["tz"])
+            new = _frame_to_bars(df)
+            tz = str(df.index.tz) if df.index.tz is not None else "UTC"
+            if bars is not None:
+                old = bars
+                check = old[old["ts"] == new["ts"][0]]
+                if len(check) and not np.isclose(check["close"][0], new["close"][0],
+                                                 rtol=ADJUST_TOLERANCE):
+                    bars = None  # rückwirkend adjustiert -> alte Kerzen verwerfen
+            if bars is None:
+                meta = {"tz": tz, "start": _period_start(period or "1y", now)}
+                merged = new
+            else:
+                merged = self._combine(old, new)
+                if period and meta.get("start") is not None:
+                    start = _period_start(period, now)
+                    if start is None or start < meta["start"]:
+                        meta["start"] = start
+            meta["fetched_at"] = time.time()
+            self.write(symbol, interval, self._trim(merged, interval), meta)
+
+    def _combine(self, old, new):
+        if len(new) == 0:
+            return old
+        keep = old[old["ts"] < new["ts"][0]]
+        return np.concatenate([keep, new])
+
+    def _trim(self, bars, interval):
+        days = RETENTION_DAYS.get(interval)
+        if not days or len(bars) == 0:
+            return bars
+        cutoff = bars["ts"][-1] - pd.Timedelta(days=days).value
+        return bars[bars["ts"] >= cutoff]
+
+    def update(self, symbol, interval="1d", period="1y", max_age=None, strict=False):
+        """
+        Sorgt dafür, dass `period` abgedeckt und der Stand nicht älter als `max_age` ist.
+        Lädt nur die Kerzen ab der vorletzten gespeicherten nach (Delta).
+        strict=True: Download-Fehler werfen statt nur geloggt zu werden (für Retries
+        in den Scannern, siehe fetch_control.py).
+        """
+        if max_age is None:
+            max_age = MAX_AGE.get(interval, 15 * 60)
+        now = pd.Timestamp.now(tz="UTC")
+        need_start = _period_start(period, now)
+
+        with self._lock(symbol, interval):
+            bars, meta = self.read(symbol, interval, mmap=False)
+            covered = (
+                bars is not None and len(bars) >= 2
+                and (meta.get("start") is None
+                     or (need_start is not None and meta["start"] <= need_start))
+            )
+
+            if covered and time.time() - meta.get("fetched_at", 0) < max_age:
+                UPDATES.inc(interval=interval, result="fresh")
+                return  # frisch genug, kein Netzwerk
+
+            if covered:
+                old = bars
+                # Ab der VORLETZTEN Kerze laden: die vorletzte ist abgeschlossen und dient
+                # als Prüfkerze, die letzte kann noch laufen (heute/aktuelle Stunde).
+                anchor = pd.Timestamp(int(old["ts"][-2]), tz="UTC").tz_convert(meta.get("tz", "UTC"))
+                start = anchor if _is_intraday(interval) else anchor.strftime("%Y-%m-%d")
+                try:
+                    df = self._download(symbol, interval, strict=strict, start=start)
+                except Exception as e:
+                    if strict:
+                        raise
+                    print(f"[BARS] Delta-Fehler {symbol} {interval}: {e}")
+                    return
+                if df is None:
+                    meta["fetched_at"] = time.time()
+                    self.write(symbol, interval, old, meta)
+                    UPDATES.inc(interval=interval, result="delta")
+                    return
+                new = _frame_to_bars(df)
+                check = new[new["ts"] == old["ts"][-2]]
+                if not len(check) or np.isclose(check["close"][0], old["close"][-2],
+                                                rtol=ADJUST_TOLERANCE):
+                    meta["fetched_at"] = time.time()
+                    self.write(symbol, interval, self._trim(self._combine(old, new), interval), meta)
+                    UPDATES.inc(interval=interval, result="delta")
+                    return
+                # Kurse wurden rückwirkend adjustiert (Dividende/Split) -> unten alles neu laden
+
+            # Voll-Download (erstes Mal, Periode reicht nicht, oder Adjustierung)
+            fetch_period = period
+            if meta is not None and need_start is not None:
+                if meta.get("start") is None:
+                    fetch_period = "max"
+                elif meta["start"] < need_start:
+                    fetch_period = _covering_period(meta["start"], now)
+            try:
+                df = self._download(symbol, interval, strict=strict, period=fetch_period)
+            except Exception as e:
+                if strict:
+                    raise
+                print(f"[BARS] Download-Fehler {symbol} {interval}: {e}")
+                return
+            UPDATES.inc(interval=interval, result="full")
+            if df is None:
+                return
+            meta = {
+                "tz": str(df.index.tz) if df.index.tz is not None else "UTC",
+                "start": _period_start(fetch_period, now),
+                "fetched_at": time.time(),
+            }
+            self.write(symbol, interval, self._trim(_frame_to_bars(df), interval), meta)
+
+    def history(self, symbol, period="1y", interval="1d", max_age=None, strict=False):
+        """Ersatz für yf.Ticker(symbol).history(period=..., interval=...), liest lokal."""
+        self.update(symbol, interval=interval, period=period, max_age=max_age, strict=strict)
+        return self.load(symbol, interval=interval, period=period)
+
+
+# Gemeinsame Instanz für app.py, breakout_scan.py & Co.
+STORE = BarStore()
+
+
+def get_history(symbol, period="1y", interval="1d", max_age=None, strict=False):
+    return STORE.history(symbol, period=period, interval=interval, max_age=max_age, strict=strict)
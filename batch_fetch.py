@@ -0,0 +1,141 @@
+import time
+import concurrent.futures
+
+import pandas as pd
+
+import bar_store
+import fetch_control
+import market_data
+
+# ==============================================================================
+# BATCH-DOWNLOAD: MEHRERE SYMBOLE PRO REQUEST
+# ==============================================================================
+# Statt pro Aktie ein yf.Ticker(...).history() (ein HTTP-Request + Overhead pro
+# Symbol) holen wir die History für ganze Blöcke mit yf.download(). Die Blöcke
+# werden als Generator ausgeliefert, damit der Scan schon rechnen kann, während
+# im Hintergrund der nächste Block lädt.
+
+BATCH_SIZE = 50   # Symbole pro Request
+
+
+def chunked(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def download_batch(symbols, period="1y", interval="1d"):
+    """Lädt einen Block und zerlegt das Ergebnis in {symbol: DataFrame (OHLCV)}."""
+    raw = market_data.download(
+        symbols, period=period, interval=interval, group_by="ticker",
+        auto_adjust=True, actions=False, threads=True, progress=False,
+    )
+    frames = {}
+    if raw is None or raw.empty:
+        return frames
+
+    for symbol in symbols:
+        if isinstance(raw.columns, pd.MultiIndex):
+            if symbol not in raw.columns.get_level_values(0):
+                continue
+            df = raw[symbol]
+        else:
+            df = raw  # nur ein Symbol im Block
+        df = df.dropna(subset=["Close"])
+        if not df.empty:
+            # Tageskerzen kommen ohne Zeitzone -> wie history() auf Börsen-Mitternacht
+            frames[symbol] = market_data.to_exchange_tz(df, market_data.timezone(symbol))
+    return frames
+
+
+class EmptyBatch(Exception):
+    """yf.download hat für keinen Ticker des Blocks Daten geliefert (meist Drosselung)."""
+
+
+def _download_checked(chunk, period, interval):
+    frames = download_batch(chunk, period=period, interval=interval)
+    if not frames:
+        raise EmptyBatch(f"keine Daten für {len(chunk)} Symbole")
+    return frames
+
+
+def fetch_chunk(fetcher, chunk, period="1y", interval="1d"):
+    """
+    Block über den Fetcher laden (Retries, adaptives Limit). yf.download wirft nicht,
+    wenn einzelne Ticker gedrosselt werden, sie fehlen nur im Ergebnis -> fehlende
+    Symbole einzeln nachladen. Was auch dann scheitert, steht im Fehlerbericht.
+    """
+    label = f"{chunk[0]}..{chunk[-1]}" if len(chunk) > 1 else chunk[0]
+    try:
+        frames = fetcher.call("download", label, lambda: _download_checked(chunk, period, interval))
+    except fetch_control.FetchFailed:
+        # Alle Symbole einzeln versuchen; deren Ergebnis steht dann je Symbol im Bericht
+        fetcher.forget("download", label)
+        frames = {}
+    for symbol in chunk:
+        if symbol in frames:
+            continue
+        try:
+            df = fetcher.call("history", symbol, lambda s=symbol: market_data.history(
+                s, interval=interval, period=period, raise_errors=True))
+        except fetch_control.FetchFailed:
+            continue
+        if df is None or df.dropna(subset=["Close"]).empty:
+            fetcher.record_failure("history", symbol, "keine Daten im Batch und einzeln")
+            continue
+        frames[symbol] = df.dropna(subset=["Close"])
+    return frames
+
+
+def iter_batches(symbols, chunk_size=BATCH_SIZE, period="1y", interval="1d",
+                 store=None, prefetch=True, fetcher=None):
+    """
+    Liefert (chunk, frames, stats) pro Block. `stats` enthält die Laufzeit des
+    Downloads. Mit `store` werden die Kerzen zusätzlich in den Bar-Store geschrieben.
+    Mit `fetcher` (fetch_control.Fetcher) gehen fehlende Symbole nicht still verloren.
+    """
+    chunks = list(chunked(list(symbols), chunk_size))
+
+    def fetch(index, chunk):
+        t0 = time.time()
+        if fetcher is not None:
+            frames = fetch_chunk(fetcher, chunk, period=period, interval=interval)
+        else:
+            try:
+                frames = download_batch(chunk, period=period, interval=interval)
+            except Exception as e:
+                print(f"[BATCH] Chunk {index + 1}/{len(chunks)} fehlgeschlagen: {e}")
+                frames = {}
+        if store is not None:
+            for symbol, df in frames.items():
+                store.merge(symbol, interval, df, period=period)
+        return frames, time.time() - t0
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        pending = None
+        for index, chunk in enumerate(chunks):
+            if pending is None:
+                pending = executor.submit(fetch, index, chunk)
+            frames, seconds = pending.result()
+            # Nächsten Block schon laden, während der Aufrufer diesen verarbeitet
+            pending = None
+            if prefetch and index + 1 < len(chunks):
+                pending = executor.submit(fetch, index + 1, chunks[index + 1])
+            stats = {
+                "chunk": index + 1,
+                "chunks": len(chunks),
+                "symbols": len(chunk),
+                "received": len(frames),
+                "seconds": round(seconds, 3),
+            }
+            yield chunk, frames, stats
+
+
+def print_stats(stats, extra=""):
+    print(f"[BATCH] Chunk {stats['chunk']}/{stats['chunks']}: "
+          f"{stats['received']}/{stats['symbols']} Symbole in {stats['seconds']:.2f}s {extra}".rstrip())
+
+
+def history_batches(symbols, chunk_size=BATCH_SIZE, period="1y", interval="1d", fetcher=None):
+    """Wie iter_batches, schreibt aber immer in den gemeinsamen Bar-Store."""
+    return iter_batches(symbols, chunk_size=chunk_size, period=period,
+                        interval=interval, store=bar_store.STORE, fetcher=fetcher)
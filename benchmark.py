@@ -0,0 +1,375 @@
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import threading
+import contextlib
+import subprocess
+import concurrent.futures
+
+import numpy as np
+
+import breakout_scan
+import gqbm_panel
+import market_data
+import synthetic_market
+import webfinance
+
+# ==============================================================================
+# OFFLINE-BENCHMARKS (OHNE YAHOO)
+# ==============================================================================
+# Misst Scan-Durchsatz, Indikator- und Serialisierungskosten sowie die Latenz
+# der wichtigsten Endpoints unter paralleler Last – alles gegen den
+# deterministischen synthetic_market, damit Läufe vergleichbar sind.
+#
+#   python benchmark.py                          # alle Gruppen, Ergebnis als JSON
+#   python benchmark.py --only endpoints --latency 0.05
+#   python benchmark.py --compare bench_results/bench-20250101-120000.json
+#   python benchmark.py --only endpoints --archive market_archive   # echte Payloads (Replay)
+#
+# Die Ergebnisse landen in bench_results/ (Datum im Namen) und können mit
+# --compare gegen einen früheren Lauf verglichen werden.
+
+RESULTS_DIR = "bench_results"
+DEFAULT_SYMBOLS = 200
+DEFAULT_LATENCY = 0.02      # simulierte Yahoo-Antwortzeit pro Abruf (s)
+CONCURRENCY = 8
+ENDPOINT_REQUESTS = 400
+GROUPS = ("scans", "indicators", "serialization", "endpoints")
+
+
+# ==============================================================================
+# HELFER
+# ==============================================================================
+
+@contextlib.contextmanager
+def quiet():
+    """Fortschrittsbalken und Treffer der Scanner nicht mitmessen/ausgeben."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def percentiles(samples):
+    """Kennzahlen einer Liste von Sekunden, in Millisekunden."""
+    if not samples:
+        return {"n": 0}
+    ms = np.asarray(samples) * 1000
+    return {
+        "n": len(samples),
+        "mean": round(float(ms.mean()), 3),
+        "p50": round(float(np.percentile(ms, 50)), 3),
+        "p90": round(float(np.percentile(ms, 90)), 3),
+        "p99": round(float(np.percentile(ms, 99)), 3),
+        "max": round(float(ms.max()), 3),
+    }
+
+
+def _timed(fn, repeat=1):
+    """Beste von `repeat` Laufzeiten (s) und das letzte Ergebnis."""
+    best, result = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - t0
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5, cwd=os.path.dirname(os.path.abspath(__file__))
+                              ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+# ==============================================================================
+# 1. SCAN-DURCHSATZ
+# ==============================================================================
+
+def bench_scans(n_symbols, latency, seed=42):
+    """Symbole/Sekunde je Scan-Modus; 'cold' = leerer Bar-Store, 'warm' = alles lokal."""
+    jobs = synthetic_market.symbols(n_symbols)
+    modes = [
+        ("value_thread", lambda: webfinance.run_thread_scan(jobs), webfinance.FETCHER),
+        ("breakout_thread_cold", lambda: breakout_scan.run_thread_scan(jobs), breakout_scan.FETCHER),
+        ("breakout_thread_warm", lambda: breakout_scan.run_thread_scan(jobs), breakout_scan.FETCHER),
+        ("breakout_panel_warm", lambda: breakout_scan.run_panel_scan(jobs), breakout_scan.FETCHER),
+        ("breakout_batch", lambda: breakout_scan.run_batch_scan(jobs), breakout_scan.FETCHER),
+    ]
+    results = {}
+    with synthetic_market.installed(seed=seed, latency=latency) as market:
+        for name, run, fetcher in modes:
+            if fetcher is not None:
+                fetcher.reset()
+            calls = dict(market.calls)
+            with quiet():
+                seconds, hits = _timed(run)
+            results[name] = {
+                "symbols": n_symbols,
+                "seconds": round(seconds, 3),
+                "symbols_per_sec": round(n_symbols / seconds, 1),
+                "hits": len(hits),
+                "upstream_calls": {k: market.calls[k] - calls[k] for k in calls if market.calls[k] != calls[k]},
+            }
+            print(f"  {name:<22} {results[name]['symbols_per_sec']:>8} Symbole/s "
+                  f"({seconds:.2f}s, {len(hits)} Treffer)")
+    return results
+
+
+# ==============================================================================
+# 2. INDIKATOR-KOSTEN PRO SYMBOL
+# ==============================================================================
+
+def bench_indicators(n_symbols, seed=42, repeat=3):
+    """ms pro Symbol: pandas-Einzelberechnung vs. NumPy-Panel."""
+    market = synthetic_market.SyntheticMarket(seed=seed)
+    jobs = synthetic_market.symbols(n_symbols)
+    frames = {symbol: market.history(symbol, period="1y") for symbol, _ in jobs}
+
+    t_ind, _ = _timed(lambda: [breakout_scan.calculate_indicators(df.copy()) for df in frames.values()], repeat)
+    t_eval, _ = _timed(lambda: [breakout_scan.evaluate_history(s, r, frames[s]) for s, r in jobs], repeat)
+    close, volume = gqbm_panel.frames_to_panel(frames)
+    t_panel, _ = _timed(lambda: gqbm_panel.rank_panel(close, volume), repeat)
+
+    results = {
+        "symbols": n_symbols,
+        "bars_per_symbol": int(np.mean([len(df) for df in frames.values()])),
+        "calculate_indicators_ms_per_symbol": round(t_ind * 1000 / n_symbols, 4),
+        "evaluate_history_ms_per_symbol": round(t_eval * 1000 / n_symbols, 4),
+        "panel_ms_per_symbol": round(t_panel * 1000 / n_symbols, 4),
+    }
+    for key, value in results.items():
+        if key.endswith("ms_per_symbol"):
+            print(f"  {key:<38} {value:>8} ms")
+    return results
+
+
+# ==============================================================================
+# 3. SERIALISIERUNG
+# ==============================================================================
+
+def _scan_rows(n_symbols, seed=42):
+    """Synthetische Zeilen im Format der global_watchlist.csv (+ Score)."""
+    rng = np.random.default_rng(seed)
+    return [{
+        "Region": region, "Symbol": symbol, "Name": f"{symbol} Corp",
+        "Price": round(float(rng.uniform(10, 500)), 2), "Reason": f"PEG {round(float(rng.uniform(0.3, 1.5)), 2)}",
+        "Link": f"https://finance.yahoo.com/quote/{symbol}", "Score": int(rng.integers(40, 100)),
+    } for symbol, region in synthetic_market.symbols(n_symbols)]
+
+
+def bench_serialization(n_symbols, seed=42, repeat=5):
+    """Chart-Payload (points/columnar) und vorkomprimierte Scan-Liste: Bauzeit und Größe."""
+    import app
+    from precompressed import EncodedPayload
+
+    results = {}
+    symbol = synthetic_market.symbols(1)[0][0]
+    with synthetic_market.installed(seed=seed):
+        for inv in app.base_caches.values():
+            inv.invalidate()
+        with quiet():
+            app._build_history(symbol, "5Y")  # Basis-Reihen laden, nicht mitmessen
+            for period in ("1D", "1Y", "5Y", "MAX"):
+                for fmt, max_points in (("points", None), ("columnar", None), ("columnar", 800)):
+                    t_build, data = _timed(lambda: app._build_history(symbol, period, fmt, max_points), repeat)
+                    t_json, body = _timed(lambda: json.dumps(data), repeat)
+                    name = f"history_{period}_{fmt}" + (f"_{max_points}" if max_points else "")
+                    results[name] = {"build_ms": round(t_build * 1000, 3),
+                                     "json_ms": round(t_json * 1000, 3), "bytes": len(body)}
+
+    rows = _scan_rows(n_symbols, seed)
+    t_encode, payload = _timed(lambda: EncodedPayload(rows), repeat)
+    results["stocks_payload"] = {
+        "rows": len(rows),
+        "encode_ms": round(t_encode * 1000, 3),
+        "bytes": {enc: len(body) for enc, body in payload.encodings.items()},
+    }
+    for name, r in results.items():
+        if "build_ms" in r:
+            print(f"  {name:<32} build {r['build_ms']:>8} ms  json {r['json_ms']:>8} ms  {r['bytes']:>9} B")
+    print(f"  {'stocks_payload':<32} encode {t_encode * 1000:>7.2f} ms  {results['stocks_payload']['bytes']}")
+    return results
+
+
+# ==============================================================================
+# 4. ENDPOINT-LATENZ UNTER LAST
+# ==============================================================================
+
+ENDPOINTS = {
+    "stocks": "/api/stocks",
+    "stocks_page": "/api/stocks?region=US&sort=-score&limit=50",
+    "details": "/api/details/{symbol}",
+    "history_1Y": "/api/history/{symbol}/1Y",
+    "history_1Y_columnar": "/api/history/{symbol}/1Y?format=columnar&max_points=800",
+    "history_1D": "/api/history/{symbol}/1D",
+}
+
+
+def bench_endpoints(n_symbols, latency, concurrency=CONCURRENCY, requests=ENDPOINT_REQUESTS, seed=42,
+                    archive=None):
+    """
+    p50/p99 je Endpoint mit `concurrency` parallelen Clients (Flask-Testclient).
+    Jeder Endpoint startet mit leeren Caches und leerem Bar-Store; der erste Request
+    pro Symbol zählt als 'cold', alle weiteren als 'warm'.
+    archive: aufgezeichnete Daten (market_data) statt synthetischer abspielen.
+    """
+    import app
+    from scan_store import ScanResultStore
+
+    app.app.config["LOGIN_DISABLED"] = True
+    app.scan_results = ScanResultStore(_scan_rows(n_symbols, seed), version=time.time())
+    app.maybe_reload_scan_results = lambda force=False: None  # CSV auf der Platte ignorieren
+    count = max(1, min(n_symbols, requests // 4))
+    if archive:
+        replay = market_data.Archive(archive)
+        symbols = sorted(set(replay.symbols("history", "1d")) & set(replay.symbols("info")))[:count]
+        if not symbols:
+            raise SystemExit(f"Archiv '{archive}' enthält keine Symbole mit info und History")
+
+        def source():
+            return market_data.isolated(market_data.ReplayProvider(replay))
+    else:
+        symbols = [s for s, _ in synthetic_market.symbols(count)]
+
+        def source():
+            return synthetic_market.installed(seed=seed, latency=latency)
+    local = threading.local()
+
+    def call(url):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.app.test_client()
+        t0 = time.perf_counter()
+        response = client.get(url, headers={"Accept-Encoding": "gzip"})
+        response.get_data()
+        return time.perf_counter() - t0, response.status_code
+
+    results = {}
+    for name, template in ENDPOINTS.items():
+        urls = [template.format(symbol=symbols[i % len(symbols)]) for i in range(requests)]
+        with source(), quiet():
+            for cache in (app.info_cache, app.news_cache, *app.base_caches.values()):
+                cache.invalidate()
+            app.scan_results = ScanResultStore(app.scan_results.rows, version=time.time())
+            seen, cold, warm, errors = set(), [], [], 0
+            t0 = time.perf_counter()
+            with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+                for url, (seconds, status) in zip(urls, executor.map(call, urls)):
+                    (warm if url in seen else cold).append(seconds)
+                    seen.add(url)
+                    errors += status >= 400
+            wall = time.perf_counter() - t0
+        results[name] = {
+            "requests": requests,
+            "concurrency": concurrency,
+            "requests_per_sec": round(requests / wall, 1),
+            "errors": errors,
+            "all": percentiles(cold + warm),
+            "cold": percentiles(cold),
+            "warm": percentiles(warm),
+        }
+        r = results[name]
+        print(f"  {name:<22} p50 {r['all']['p50']:>8} ms  p99 {r['all']['p99']:>8} ms  "
+              f"cold p50 {r['cold']['p50']:>8} ms  {r['requests_per_sec']:>7} req/s"
+              + (f"  {errors} Fehler" if errors else ""))
+    return results
+
+
+# ==============================================================================
+# 5. ERGEBNISSE SPEICHERN & VERGLEICHEN
+# ==============================================================================
+
+COMPARE_KEYS = ("symbols_per_sec", "ms_per_symbol", "build_ms", "encode_ms", "p50", "p99", "requests_per_sec")
+
+
+def _flatten(obj, prefix=""):
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            yield from _flatten(value, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(obj, (int, float)) and not isinstance(obj, bool):
+        yield prefix, obj
+
+
+def compare(old, new):
+    """Relevante Kennzahlen zweier Läufe nebeneinander (Veränderung in %)."""
+    before = dict(_flatten(old.get("results", {})))
+    print(f"\nVergleich mit {old['meta'].get('commit')} vom {old['meta'].get('started')}:")
+    for key, value in _flatten(new.get("results", {})):
+        if not key.endswith(COMPARE_KEYS) or key not in before or not before[key]:
+            continue
+        change = (value - before[key]) / before[key]
+        # Durchsatz: höher ist besser, Zeiten: niedriger ist besser
+        better = change > 0 if key.endswith(("per_sec",)) else change < 0
+        flag = "" if abs(change) < 0.05 else ("  besser" if better else "  SCHLECHTER")
+        print(f"  {key:<60} {before[key]:>10} -> {value:>10} ({change:+.0%}){flag}")
+
+
+def save(report, output=None):
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, time.strftime("bench-%Y%m%d-%H%M%S.json"))
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return output
+
+
+def run(groups=GROUPS, n_symbols=DEFAULT_SYMBOLS, latency=DEFAULT_LATENCY,
+        concurrency=CONCURRENCY, requests=ENDPOINT_REQUESTS, seed=42, archive=None):
+    report = {
+        "meta": {
+            "started": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "symbols": n_symbols,
+            "latency": latency,
+            "concurrency": concurrency,
+            "seed": seed,
+            "archive": archive,
+        },
+        "results": {},
+    }
+    for group in groups:
+        print(f"\n[{group.upper()}]")
+        if group == "scans":
+            report["results"][group] = bench_scans(n_symbols, latency, seed)
+        elif group == "indicators":
+            report["results"][group] = bench_indicators(n_symbols, seed)
+        elif group == "serialization":
+            report["results"][group] = bench_serialization(n_symbols, seed)
+        elif group == "endpoints":
+            report["results"][group] = bench_endpoints(n_symbols, latency, concurrency, requests, seed, archive)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline-Benchmarks mit synthetischen Marktdaten")
+    parser.add_argument("--only", default=",".join(GROUPS), help=f"Gruppen: {', '.join(GROUPS)}")
+    parser.add_argument("--symbols", type=int, default=DEFAULT_SYMBOLS)
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY,
+                        help="Simulierte Upstream-Latenz pro Abruf in Sekunden")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--requests", type=int, default=ENDPOINT_REQUESTS, help="Requests pro Endpoint")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--archive", help="Endpoints mit aufgezeichneten Daten testen (market_data.py)")
+    parser.add_argument("--output", help=f"JSON-Datei (Standard: {RESULTS_DIR}/bench-<Zeit>.json)")
+    parser.add_argument("--compare", help="Früheren Lauf (JSON) zum Vergleich")
+    args = parser.parse_args()
+
+    groups = [g.strip() for g in args.only.split(",") if g.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"Unbekannte Gruppen: {', '.join(sorted(unknown))}")
+
+    report = run(groups, args.symbols, args.latency, args.concurrency, args.requests, args.seed, args.archive)
+    print(f"\nGespeichert in '{save(report, args.output)}'")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), report)
@@ -1,103 +1,30 @@
-import yfinance as yf
 import pandas as pd
-import requests
 import concurrent.futures
-from io import StringIO
 import time
+import argparse
+
+import bar_store
+import batch_fetch
+import fetch_control
+import gqbm_panel
+import indicator_state
+import scan_checkpoint
+import scan_feed
+import scan_output
+import scan_pipeline
+import universe
 
 # ==============================================================================
 # KONFIGURATION: Generalisiertes Quantitatives Breakout-Modell (GQBM)
 # ==============================================================================
 # Basierend auf [cite: 81, 82] - Gewichtung der Dimensionen
 SCORE_THRESHOLD = 70      # Ab diesem Score landet die Aktie auf der Liste
-MAX_WORKERS = 20          # Performance für Massen-Scan
-
-# ==============================================================================
-# 1. DATENQUELLEN (ROBUST & GEFIXT)
-# ==============================================================================
-# Browser-Header gegen Blockaden
-HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
-
-def get_sp500_tickers():
-    """Lade S&P 500 (USA) dynamisch (funktioniert gut)"""
-    print("Lade S&P 500 (USA)...")
-    try:
-        url = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
-        r = requests.get(url, headers=HEADERS)
-        df = pd.read_html(StringIO(r.text))[0]
-        tickers = df['Symbol'].str.replace('.', '-', regex=False).tolist()
-        return [(t, "US") for t in tickers]
-    except Exception as e:
-        print(f"Fehler US-Liste: {e}")
-        return []
-
-def get_dax_tickers():
-    """DAX 40 (Deutschland) - Hardcoded für 100% Stabilität"""
-    print("Lade DAX 40 (Deutschland)...")
-    # Liste aller DAX-40 Werte mit korrekter .DE Endung für Yahoo
-    tickers = [
-        "ADS.DE", "AIR.DE", "ALV.DE", "BAS.DE", "BAYN.DE", "BEI.DE", "BMW.DE", "BNR.DE",
-        "CBK.DE", "CON.DE", "1COV.DE", "DTG.DE", "DBK.DE", "DB1.DE", "DHL.DE", "DTE.DE",
-        "EOAN.DE", "FRE.DE", "HNR1.DE", "HEI.DE", "HEN3.DE", "IFX.DE", "MBG.DE", "MRK.DE",
-        "MTX.DE", "MUV2.DE", "PUM.DE", "QIA.DE", "RWE.DE", "SAP.DE", "SRT3.DE", "SIE.DE",
-        "ENR.DE", "SY1.DE", "VOW3.DE", "VNA.DE", "ZAL.DE", "SHL.DE", "HLAG.DE", "RHM.DE"
-    ]
-    return [(t, "DE") for t in tickers]
-
-def get_asia_tickers():
-    """Top Asien Auswahl (Japan .T & Hong Kong .HK)"""
-    print("Lade Top Asien (Japan & China Tech)...")
-    # Wir nehmen die liquidesten High-Beta Werte aus Asien (Tech, Auto, Semi)
-    # Statt blind 225 langweilige Werte zu scannen, fokussieren wir auf Alpha-Kandidaten.
-    tickers = [
-        # --- JAPAN (Nikkei Leaders) ---
-        "7203.T", # Toyota
-        "6758.T", # Sony
-        "8035.T", # Tokyo Electron (Chip)
-        "9984.T", # SoftBank (Tech Invest)
-        "6861.T", # Keyence (Automation)
-        "6920.T", # Lasertec (Semi - High Volatility!)
-        "7974.T", # Nintendo
-        "6501.T", # Hitachi
-        "4063.T", # Shin-Etsu
-        "7741.T", # HOYA
-        "6146.T", # Disco Corp
-        "6954.T", # Fanuc
-        "7011.T", # Mitsubishi Heavy
-        "8058.T", # Mitsubishi Corp
-        "8306.T", # MUFG Bank
-        "9432.T", # NTT
-        "4502.T", # Takeda Pharma
-        "6367.T", # Daikin
-        # --- HONG KONG / CHINA (Tech Giants) ---
-        "0700.HK", # Tencent
-        "9988.HK", # Alibaba
-        "3690.HK", # Meituan
-        "1810.HK", # Xiaomi
-        "1211.HK", # BYD (EV Leader)
-        "0981.HK", # SMIC (Chips)
-        "9618.HK", # JD.com
-        "2015.HK", # Li Auto
-        "9868.HK", # Xpeng
-        "1024.HK", # Kuaishou
-        "0992.HK", # Lenovo
-        "2269.HK", # WuXi Biologics
-    ]
-    return [(t, "ASIA") for t in tickers]
-
-def get_euro_stoxx_tickers():
-    """Erweiterte Euro-Liste (Frankreich, Niederlande, Spanien, Italien)"""
-    print("Lade Euro Stoxx (EU)...")
-    tickers = [
-        "ASML.AS", "MC.PA", "OR.PA", "SAP.DE", "SIE.DE", "TTE.PA", "IDEX.PA",
-        "SAN.MC", "AIR.PA", "IBE.MC", "RMS.PA", "SU.PA", "AI.PA", "DTE.DE", 
-        "BNP.PA", "ABI.BR", "ITX.MC", "VOW3.DE", "BAYN.DE", "BMW.DE", "INGA.AS", 
-        "BAS.DE", "MBG.DE", "KER.PA", "AD.AS", "CS.PA", "SAF.PA", "MUV2.DE", 
-        "ENEL.MI", "ISP.MI", "ENI.MI", "STLAM.MI", "RACE.MI", "ORA.PA", "DG.PA", 
-        "BN.PA", "CAP.PA", "NOKIA.HE", "AH.AS", "UNA.AS", "PHIA.AS", "BBVA.MC",
-        "STM.PA", "LR.PA", "RI.PA"
-    ]
-    return [(t, "EU") for t in tickers]
+MAX_WORKERS = 20          # Obergrenze, das tatsächliche Limit regelt fetch_control
+INCREMENTAL_MAX_AGE = 60  # Sekunden: so frisch müssen die Kerzen beim Intraday-Rescan sein
+OUTPUT_FILE = "global_breakout_scan_v2.csv"
+FETCHER = fetch_control.Fetcher(max_workers=MAX_WORKERS)
+# Märkte (universe.py / Ordner universes/), Reihenfolge = Region bei Dubletten
+UNIVERSES = ("sp500", "dax40", "asia_top30", "eurostoxx")
 
 # ==============================================================================
 # 2. TECHNISCHE INDIKATOREN (HELFER)
@@ -135,132 +62,405 @@ def calculate_indicators(df):
 # 3. DER ANALYST (GQBM LOGIK)
 # ==============================================================================
 
-def analyze_stock_gqbm(data_packet):
-    symbol, region = data_packet
+def score_gqbm(curr):
+    """
+    GQBM-Score für eine Kerze. `curr` enthält Close, Volume, die Indikatoren aus
+    calculate_indicators sowie BBW_AVG (6-Monats-Schnitt) und HIGH_52.
+    Liefert (score, reasons, rvol).
+    """
+    score = 0
+    reasons = []
     
-    try:
-        stock = yf.Ticker(symbol)
-        df = stock.history(period="1y") # 1 Jahr History für 200 SMA
+    # 1. TREND (20 Pkt) [cite: 82]
+    if curr['Close'] > curr['EMA_10'] > curr['EMA_20'] > curr['SMA_50'] > curr['SMA_200']:
+        score += 20
+        reasons.append("Trend: Perfect Order")
+    elif curr['Close'] > curr['SMA_50'] > curr['SMA_200']:
+        score += 10
         
-        if df.empty or len(df) < 200: return None
+    # 2. VOLATILITÄT / SQUEEZE (20 Pkt) [cite: 82]
+    # Vergleich aktuelle BBW mit 6-Monats-Schnitt
+    avg_bbw = curr['BBW_AVG']
+    if curr['BBW'] < avg_bbw * 0.8: 
+        score += 20
+        reasons.append("Vol: Squeeze")
+    elif curr['BBW'] < avg_bbw:
+        score += 10
 
-        df = calculate_indicators(df)
-        if df is None: return None
+    # 3. MOMENTUM / RSI (15 Pkt) [cite: 82]
+    # Power Zone 55-70 vor Ausbruch, >70 am Ausbruch
+    if 65 <= curr['RSI'] <= 80:
+        score += 15
+        reasons.append(f"Mom: Power Zone ({int(curr['RSI'])})")
+    elif 50 <= curr['RSI'] < 65:
+        score += 5
         
-        curr = df.iloc[-1]
-        score = 0
-        reasons = []
+    # 4. VOLUMEN / RVOL (25 Pkt) [cite: 82]
+    # Volumen > 150% (1.5x) des Schnitts
+    rvol = curr['Volume'] / curr['Vol_SMA50'] if curr['Vol_SMA50'] > 0 else 0
+    if rvol > 2.0:
+        score += 25
+        reasons.append(f"Vol: Explosive (x{round(rvol,1)})")
+    elif rvol > 1.5:
+        score += 15
+        reasons.append(f"Vol: High (x{round(rvol,1)})")
         
-        # 1. TREND (20 Pkt) [cite: 82]
-        if curr['Close'] > curr['EMA_10'] > curr['EMA_20'] > curr['SMA_50'] > curr['SMA_200']:
-            score += 20
-            reasons.append("Trend: Perfect Order")
-        elif curr['Close'] > curr['SMA_50'] > curr['SMA_200']:
-            score += 10
-            
-        # 2. VOLATILITÄT / SQUEEZE (20 Pkt) [cite: 82]
-        # Vergleich aktuelle BBW mit 6-Monats-Schnitt
-        avg_bbw = df['BBW'].rolling(120).mean().iloc[-1]
-        if curr['BBW'] < avg_bbw * 0.8: 
-            score += 20
-            reasons.append("Vol: Squeeze")
-        elif curr['BBW'] < avg_bbw:
-            score += 10
-
-        # 3. MOMENTUM / RSI (15 Pkt) [cite: 82]
-        # Power Zone 55-70 vor Ausbruch, >70 am Ausbruch
-        if 65 <= curr['RSI'] <= 80:
-            score += 15
-            reasons.append(f"Mom: Power Zone ({int(curr['RSI'])})")
-        elif 50 <= curr['RSI'] < 65:
-            score += 5
-            
-        # 4. VOLUMEN / RVOL (25 Pkt) [cite: 82]
-        # Volumen > 150% (1.5x) des Schnitts
-        rvol = curr['Volume'] / curr['Vol_SMA50'] if curr['Vol_SMA50'] > 0 else 0
-        if rvol > 2.0:
-            score += 25
-            reasons.append(f"Vol: Explosive (x{round(rvol,1)})")
-        elif rvol > 1.5:
-            score += 15
-            reasons.append(f"Vol: High (x{round(rvol,1)})")
-            
-        # 5. PATTERN / NEAR HIGH (20 Pkt) [cite: 82]
-        # Ersatz für geometrische Muster: Nähe zum 52-Wochen-Hoch (<5%)
-        high_52 = df['Close'].max()
-        dist = (high_52 - curr['Close']) / high_52
-        if dist < 0.05:
-            score += 20
-            reasons.append("Pat: Near ATH")
-        elif dist < 0.15:
-            score += 10
-            
-        if score >= SCORE_THRESHOLD:
-            return {
-                'Region': region, 'Symbol': symbol,
-                'Price': round(curr['Close'], 2), 'Score': score,
-                'RVol': round(rvol, 2), 'RSI': int(curr['RSI']),
-                'Setup': ", ".join(reasons)
-            }
+    # 5. PATTERN / NEAR HIGH (20 Pkt) [cite: 82]
+    # Ersatz für geometrische Muster: Nähe zum 52-Wochen-Hoch (<5%)
+    high_52 = curr['HIGH_52']
+    dist = (high_52 - curr['Close']) / high_52
+    if dist < 0.05:
+        score += 20
+        reasons.append("Pat: Near ATH")
+    elif dist < 0.15:
+        score += 10
+
+    return score, reasons, rvol
+
+
+def make_hit(symbol, region, curr):
+    """Treffer-Zeile (dict) oder None, wenn der Score unter SCORE_THRESHOLD liegt."""
+    score, reasons, rvol = score_gqbm(curr)
+    if score >= SCORE_THRESHOLD:
+        return {
+            'Region': region, 'Symbol': symbol,
+            'Price': round(curr['Close'], 2), 'Score': score,
+            'RVol': round(rvol, 2), 'RSI': int(curr['RSI']),
+            'Setup': ", ".join(reasons)
+        }
+    return None
+
+
+def analyze_stock_gqbm(data_packet):
+    symbol, region = data_packet
+    
+    try:
+        # 1 Jahr History für 200 SMA – aus dem lokalen Bar-Store, nur das Delta kommt von Yahoo
+        df = FETCHER.call("history", symbol,
+                          lambda: bar_store.get_history(symbol, period="1y", strict=True))
+        return evaluate_history(symbol, region, df)
             
-    except:
+    except fetch_control.FetchFailed:
+        return None  # steht im Fehlerbericht
+    except Exception as e:
+        print(f"[GQBM] {symbol}: {e}")
         return None
-    return None
+
+
+def evaluate_history(symbol, region, df):
+    """GQBM-Bewertung auf einer fertigen Tages-History (ohne Netzwerk, auch für scan_engine.py)."""
+    if df is None or df.empty or len(df) < 200: return None
+
+    # Kopie: die History kann von anderen Strategien mitbenutzt werden
+    df = calculate_indicators(df.copy())
+    if df is None: return None
+    
+    curr = df.iloc[-1].to_dict()
+    curr['BBW_AVG'] = df['BBW'].rolling(120).mean().iloc[-1]
+    curr['HIGH_52'] = df['Close'].max()
+    return make_hit(symbol, region, curr)
+
+# ==============================================================================
+# 3b. INKREMENTELLER MODUS (INTRADAY-RESCANS)
+# ==============================================================================
+
+def analyze_stock_incremental(data_packet):
+    """
+    Wie analyze_stock_gqbm, aber über einen gespeicherten IndicatorState:
+    nur neue Kerzen werden eingerechnet (O(1) pro Kerze), die laufende Kerze
+    des Tages wird bewertet, ohne den Zustand zu verändern.
+    """
+    symbol, region = data_packet
+
+    try:
+        bar_store.STORE.update(symbol, period="1y", max_age=INCREMENTAL_MAX_AGE)
+        tail = bar_store.STORE.load(symbol, period="5d")
+        if tail.empty:
+            return None
+        ts = tail.index.as_unit("ns").asi8
+
+        state = indicator_state.load_state(symbol)
+        if state is not None:
+            # Zustand passt nicht mehr zum Store (Lücke oder adjustierte Kurse) -> neu aufbauen
+            match = ts == state.last_ts
+            if not match.any() or abs(tail['Close'].to_numpy()[match][0] - state.last_close) > 1e-9 * abs(state.last_close):
+                state = None
+        if state is None:
+            full = bar_store.STORE.load(symbol, period="1y")
+            if len(full) < 200: return None
+            state = indicator_state.IndicatorState.from_frame(full.iloc[:-1])
+            indicator_state.save_state(symbol, state)
+
+        # Abgeschlossene Kerzen übernehmen, die letzte bleibt vorläufig
+        closes, volumes = tail['Close'].to_numpy(), tail['Volume'].to_numpy()
+        pushed = False
+        for i in range(len(tail) - 1):
+            if ts[i] > state.last_ts:
+                state.push(int(ts[i]), float(closes[i]), float(volumes[i]))
+                pushed = True
+        if pushed:
+            indicator_state.save_state(symbol, state)
+
+        if ts[-1] > state.last_ts:
+            curr = state.peek(float(closes[-1]), float(volumes[-1]))
+        else:
+            curr = state.peek()
+        if curr['bars'] < 200: return None
+        return make_hit(symbol, region, curr)
+
+    except Exception as e:
+        print(f"[INCR] {symbol}: {e}")
+        return None
+
 
 # ==============================================================================
 # 4. HAUPTPROGRAMM
 # ==============================================================================
 
-if __name__ == "__main__":
-    start = time.time()
-    
-    # 1. Listen laden
-    us = get_sp500_tickers()
-    de = get_dax_tickers()
-    asia = get_asia_tickers()
-    eu = get_euro_stoxx_tickers()
-    
-    # Zusammenführen und Duplikate entfernen (z.B. SAP ist in DAX und EuroStoxx)
-    seen = set()
-    all_jobs = []
-    for item in us + de + asia + eu:
-        if item[0] not in seen:
-            all_jobs.append(item)
-            seen.add(item[0])
+def load_universe():
+    """Alle Märkte laden, Duplikate entfernen (z.B. SAP ist in DAX und EuroStoxx)."""
+    return universe.load_jobs(UNIVERSES)
 
-    print("\n" + "="*80)
-    print(f"STARTE GLOBAL SCAN (FIXED): {len(all_jobs)} Aktien")
-    print(f"Märkte: US S&P500 ({len(us)}), DAX 40 ({len(de)}), Asia Top 30 ({len(asia)}), Euro Stoxx ({len(eu)})")
-    print(f"Strategie: GQBM Breakout (Score >= {SCORE_THRESHOLD})")
-    print("="*80)
-    print(f"{'Reg':<4} | {'Sym':<8} | {'Scr':<3} | {'Price':<8} | {'RVol':<4} | Setup")
-    print("-" * 80)
-    
+
+def print_hit(res):
+    print(f"{res['Region']:<4} | {res['Symbol']:<8} | {res['Score']:<3} | {res['Price']:<8} | {res['RVol']:<4} | {res['Setup']}")
+
+
+def symbol_done(symbol, res, checkpoint=None, feed=None):
+    """
+    Symbol fertig: im Checkpoint festhalten (fehlgeschlagene Abrufe bleiben für
+    --resume offen) und Treffer/Fortschritt an den Live-Feed melden.
+    """
+    if checkpoint is not None and not FETCHER.has_failed(symbol):
+        checkpoint.mark(symbol, res)
+    if feed is not None:
+        feed.advance(res)
+
+
+def run_thread_scan(all_jobs, analyzer=analyze_stock_gqbm, checkpoint=None, feed=None):
+    """Klassischer Modus: ein Thread pro Aktie lädt und rechnet mit pandas."""
     results = []
-    
-    # Scan starten
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        future_to_stock = {executor.submit(analyze_stock_gqbm, job): job for job in all_jobs}
+    with scan_checkpoint.worker_pool(MAX_WORKERS) as executor:
+        future_to_stock = {executor.submit(analyzer, job): job for job in all_jobs}
         counter = 0
-        
+
         for future in concurrent.futures.as_completed(future_to_stock):
             counter += 1
             if counter % 50 == 0:
                 print(f"Progress: {counter}/{len(all_jobs)}...", end="\r")
-            
+
             res = future.result()
+            symbol_done(future_to_stock[future][0], res, checkpoint, feed)
             if res:
                 results.append(res)
-                print(f"{res['Region']:<4} | {res['Symbol']:<8} | {res['Score']:<3} | {res['Price']:<8} | {res['RVol']:<4} | {res['Setup']}")
+                print_hit(res)
+    return results
+
+
+def run_panel_scan(all_jobs, checkpoint=None, feed=None):
+    """
+    Panel-Modus: Threads aktualisieren nur den Bar-Store (Netzwerk), danach wird
+    das ganze Universum in EINEM NumPy-Durchlauf bewertet (gqbm_panel).
+    Mit Checkpoint wird nur der Abruf fortgesetzt; bewertet wird immer alles,
+    Treffer erscheinen im Live-Feed deshalb erst nach dem Abruf.
+    """
+    def refresh(job):
+        # Über den Fetcher: Retries, und was scheitert, steht im Fehlerbericht
+        try:
+            FETCHER.call("history", job[0], lambda: bar_store.STORE.update(job[0], period="1y", strict=True))
+        except fetch_control.FetchFailed:
+            pass
+        symbol_done(job[0], None, checkpoint, feed)
+
+    to_refresh = checkpoint.pending(all_jobs) if checkpoint is not None else all_jobs
+    with scan_checkpoint.worker_pool(MAX_WORKERS) as executor:
+        for counter, _ in enumerate(executor.map(refresh, to_refresh), 1):
+            if counter % 50 == 0:
+                print(f"Progress: {counter}/{len(to_refresh)}...", end="\r")
+
+    t0 = time.time()
+    close, volume = gqbm_panel.build_panel([sym for sym, _ in all_jobs], period="1y")
+    table = gqbm_panel.rank_panel(close, volume, regions=dict(all_jobs), threshold=SCORE_THRESHOLD)
+    print(f"Panel: {close.shape[1]} Symbole x {close.shape[0]} Tage in {time.time() - t0:.2f}s bewertet")
+
+    results = table.to_dict(orient="records")
+    for res in results:
+        print_hit(res)
+        if feed is not None:
+            feed.hit(res)
+    return results
+
+
+def fetch_history(job):
+    """I/O-Stufe der Pipeline: History laden, zu kurze Reihen gar nicht erst weiterreichen."""
+    symbol, _ = job
+    try:
+        df = FETCHER.call("history", symbol,
+                          lambda: bar_store.get_history(symbol, period="1y", strict=True))
+    except fetch_control.FetchFailed:
+        return None  # steht im Fehlerbericht
+    if df is None or len(df) < 200:
+        return None
+    return df[['Close', 'Volume']]  # nur das wird gerechnet -> weniger zu picklen
+
+
+def evaluate_job(job, df):
+    """CPU-Stufe der Pipeline (läuft im Worker-Prozess)."""
+    symbol, region = job
+    return evaluate_history(symbol, region, df)
+
+
+def run_pipeline_scan(all_jobs, cpu_workers=scan_pipeline.CPU_WORKERS, checkpoint=None, feed=None):
+    """
+    Pipeline-Modus: Threads laden nur, ein Prozess-Pool rechnet calculate_indicators
+    und den Score auf allen Kernen (scan_pipeline.py).
+    Checkpoint nur für fehlerfreie Jobs, der Live-Fortschritt zählt jeden Job.
+    """
+    def progress(job, res):
+        if feed is not None:
+            feed.advance(res)
+
+    results, stats = scan_pipeline.run_pipeline(
+        all_jobs, fetch_history, evaluate_job,
+        io_workers=MAX_WORKERS, cpu_workers=cpu_workers, on_result=print_hit,
+        on_done=lambda job, res: symbol_done(job[0], res, checkpoint), on_progress=progress)
+    scan_pipeline.print_stats(stats)
+    return results
+
 
-    # Speichern
+def run_batch_scan(all_jobs, chunk_size=batch_fetch.BATCH_SIZE, checkpoint=None, feed=None):
+    """
+    Batch-Modus: History blockweise per yf.download() laden und jeden Block direkt
+    vektorisiert bewerten, während der nächste Block im Hintergrund lädt.
+    """
+    regions = dict(all_jobs)
+    results = []
+    for chunk, frames, stats in batch_fetch.history_batches(list(regions), chunk_size=chunk_size,
+                                                            fetcher=FETCHER):
+        t0 = time.time()
+        if frames:
+            close, volume = gqbm_panel.frames_to_panel(frames)
+            table = gqbm_panel.rank_panel(close, volume, regions=regions, threshold=SCORE_THRESHOLD)
+            hits = table.to_dict(orient="records")
+        else:
+            hits = []
+        batch_fetch.print_stats(stats, f"| Score {time.time() - t0:.2f}s | {len(hits)} Treffer")
+        # Fehlgeschlagene Symbole bleiben im Checkpoint offen (--resume lädt sie erneut)
+        by_symbol = {res['Symbol']: res for res in hits}
+        for sym in chunk:
+            symbol_done(sym, by_symbol.get(sym), checkpoint, feed)
+        for res in hits:
+            print_hit(res)
+        results.extend(hits)
+    return results
+
+
+def save_results(results, filename=OUTPUT_FILE):
+    # Speichern (atomar, die App liest die Datei evtl. gerade)
     if results:
         df = pd.DataFrame(results).sort_values(by='Score', ascending=False)
-        filename = "global_breakout_scan_v2.csv"
-        df.to_csv(filename, index=False)
+        scan_output.write_csv_atomic(df, filename)
         print("\n" + "="*80)
         print(f"FERTIG! {len(results)} Treffer gespeichert in '{filename}'")
     else:
         print("\nKeine Treffer gefunden.")
-    
-    print(f"Dauer: {round((time.time() - start)/60, 1)} Minuten")
\ No newline at end of file
+
+
+def run_scan(output=OUTPUT_FILE, mode="thread", chunk_size=batch_fetch.BATCH_SIZE, all_jobs=None,
+             cpu_workers=scan_pipeline.CPU_WORKERS, resume=False):
+    """
+    Kompletter Scan inkl. Speichern – wird auch vom Scheduler (scheduler.py) aufgerufen.
+    mode: "thread" (Standard), "pipeline", "panel", "batch" oder "incremental".
+    resume=True: abgebrochenen Lauf fortsetzen (scan_checkpoint.py).
+    """
+    start = time.time()
+    FETCHER.reset()
+    if all_jobs is None:
+        all_jobs = load_universe()
+    print("\n" + "="*80)
+    print(f"STARTE GLOBAL SCAN (FIXED): {len(all_jobs)} Aktien")
+    print(f"Strategie: GQBM Breakout (Score >= {SCORE_THRESHOLD})")
+    print("="*80)
+    print(f"{'Reg':<4} | {'Sym':<8} | {'Scr':<3} | {'Price':<8} | {'RVol':<4} | Setup")
+    print("-" * 80)
+
+    checkpoint = scan_checkpoint.ScanCheckpoint(f"breakout-{mode}", resume=resume, jobs=all_jobs)
+    previous = checkpoint.hits()
+    todo = checkpoint.pending(all_jobs)
+    if resume:
+        print(f"Fortsetzen: {len(all_jobs) - len(todo)} Aktien schon erledigt, {len(previous)} Treffer übernommen.")
+
+    # Live-Feed fürs Dashboard; im Panel-Modus werden alle Treffer neu berechnet
+    feed = scan_feed.ScanFeed("breakout", total=len(all_jobs), done=len(all_jobs) - len(todo))
+    if mode != "panel":
+        for res in previous:
+            feed.hit(res)
+
+    # Scan starten
+    try:
+        if mode == "incremental":
+            results = run_thread_scan(todo, analyzer=analyze_stock_incremental, checkpoint=checkpoint, feed=feed)
+        elif mode == "batch":
+            results = run_batch_scan(todo, chunk_size=chunk_size, checkpoint=checkpoint, feed=feed)
+        elif mode == "panel":
+            results = run_panel_scan(all_jobs, checkpoint=checkpoint, feed=feed)
+        elif mode == "pipeline":
+            results = run_pipeline_scan(todo, cpu_workers=cpu_workers, checkpoint=checkpoint, feed=feed)
+        else:
+            results = run_thread_scan(todo, checkpoint=checkpoint, feed=feed)
+    except BaseException:
+        checkpoint.close()
+        feed.close()
+        print(f"\nAbgebrochen – {len(checkpoint)} Aktien gesichert, weiter mit --resume.")
+        raise
+    results = previous + results
+
+    if FETCHER.calls:
+        FETCHER.print_report()
+        FETCHER.write_report()
+    save_results(results, output)
+    scan_output.record_history("breakout", results, started_at=start, symbols=len(all_jobs))
+    feed.finish()
+    if FETCHER.summary()["failed"]:
+        checkpoint.close()  # fehlgeschlagene Symbole kann --resume nachholen
+    else:
+        checkpoint.finish()
+    print(f"Dauer: {round((time.time() - start)/60, 1)} Minuten")
+    return {"symbols": len(all_jobs), "hits": len(results), "fetch": FETCHER.summary(),
+            "seconds": round(time.time() - start, 1)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GQBM Breakout-Scan")
+    parser.add_argument("--panel", action="store_true",
+                        help="Alle Aktien vektorisiert in einem NumPy-Durchlauf bewerten")
+    parser.add_argument("--batch", action="store_true",
+                        help="History blockweise (mehrere Symbole pro Request) laden")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Laden in Threads, Rechnen im Prozess-Pool (skaliert mit den Kernen)")
+    parser.add_argument("--cpu-workers", type=int, default=scan_pipeline.CPU_WORKERS,
+                        help=f"Mit --pipeline: Rechen-Prozesse (Standard: {scan_pipeline.CPU_WORKERS})")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Intraday-Rescan über gespeicherte Indikator-Zustände (O(1) pro Kerze)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Abgebrochenen Scan fortsetzen (erledigte Aktien überspringen)")
+    parser.add_argument("--every", type=float, default=0,
+                        help="Mit --incremental: alle N Minuten erneut scannen (0 = einmalig)")
+    parser.add_argument("--chunk-size", type=int, default=batch_fetch.BATCH_SIZE,
+                        help=f"Symbole pro Batch-Request (Standard: {batch_fetch.BATCH_SIZE})")
+    args = parser.parse_args()
+
+    mode = ("incremental" if args.incremental else "batch" if args.batch
+            else "panel" if args.panel else "pipeline" if args.pipeline else "thread")
+
+    # 1. Listen laden
+    all_jobs = load_universe()
+
+    while True:
+        started = time.time()
+        run_scan(mode=mode, chunk_size=args.chunk_size, all_jobs=all_jobs, cpu_workers=args.cpu_workers,
+                 resume=args.resume)
+        args.resume = False  # Folge-Läufe (--every) beginnen neu
+        if not (args.incremental and args.every > 0):
+            break
+        time.sleep(max(0, args.every * 60 - (time.time() - started)))
@@ -0,0 +1,173 @@
+import sys
+import time
+import threading
+import concurrent.futures
+from collections import OrderedDict
+
+import pandas as pd
+
+# ==============================================================================
+# TTL + LRU CACHE MIT STALE-WHILE-REVALIDATE
+# ==============================================================================
+# - frisch (Alter < ttl):             Wert sofort zurück
+# - abgelaufen (< ttl + stale_ttl):    alter Wert sofort zurück, Refresh im Hintergrund
+# - zu alt / nicht vorhanden:          Loader läuft synchron
+# Einträge werden nach geschätztem Speicherverbrauch (LRU) verdrängt.
+#
+# SingleFlight bündelt gleichzeitige Anfragen zum selben Schlüssel: nur der erste
+# Aufrufer lädt, alle anderen warten auf sein Ergebnis.
+
+# Gemeinsamer Pool für Hintergrund-Refreshes aller Caches
+_refresh_pool = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="swr")
+
+
+def estimate_size(obj, _depth=0):
+    """Grobe Speicherschätzung in Bytes (DataFrames, dicts, Listen, Strings)."""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(deep=True))
+    size = sys.getsizeof(obj)
+    if _depth > 4:
+        return size
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+                    for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(estimate_size(v, _depth + 1) for v in obj)
+    return size
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Höchstens ein laufender Aufruf pro Schlüssel; Wartende teilen sich das Ergebnis."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+class SWRCache:
+    """Thread-sicherer Cache pro Datenart (z.B. info, history, news)."""
+
+    def __init__(self, name, ttl, stale_ttl=0, max_bytes=32 * 1024 * 1024):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()   # key -> (value, stored_at, size)
+        self._bytes = 0
+        self._refreshing = set()
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get(self, key, loader):
+        """Wert für `key`; `loader()` holt ihn bei Bedarf (Exceptions gehen an den Aufrufer)."""
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, stored_at, _ = entry
+                age = now - stored_at
+                if age < self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                if age < self.ttl + self.stale_ttl:
+                    self._data.move_to_end(key)
+                    self.stale_hits += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        _refresh_pool.submit(self._refresh, key, loader)
+                    return value
+            self.misses += 1
+
+        return self._flight.do(key, lambda: self._load(key, loader))
+
+    def _load(self, key, loader):
+        value = loader()
+        self.put(key, value)
+        return value
+
+    def _refresh(self, key, loader):
+        try:
+            self._flight.do(key, lambda: self._load(key, loader))
+        except Exception as e:
+            print(f"[CACHE] Refresh {self.name}/{key} fehlgeschlagen: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            if size > self.max_bytes:
+                return  # passt nie rein
+            self._data[key] = (value, time.time(), size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, _, evicted) = self._data.popitem(last=False)
+                self._bytes -= evicted
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._data.clear()
+                self._bytes = 0
+            else:
+                old = self._data.pop(key, None)
+                if old is not None:
+                    self._bytes -= old[2]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+            }
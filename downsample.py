@@ -0,0 +1,81 @@
+import numpy as np
+
+# ==============================================================================
+# DOWNSAMPLING FÜR LANGE CHARTS (LTTB)
+# ==============================================================================
+# Largest-Triangle-Three-Buckets: erster und letzter Punkt bleiben, dazwischen
+# wird die Reihe in gleich große Buckets geteilt und pro Bucket der Punkt mit
+# der größten Dreiecksfläche (zum vorher gewählten Punkt und zum Schnitt des
+# nächsten Buckets) behalten -> Spitzen und Form bleiben erhalten.
+#
+# Alle Reihen eines Charts nutzen dieselben Buckets: OHLC wird pro Bucket
+# aggregiert (Open erster, High max, Low min, Close letzter), MA/RSI per LTTB.
+
+MIN_POINTS = 10
+
+
+def lttb_buckets(n, n_out):
+    """Bucketgrenzen (Länge n_out + 1): erster/letzter Punkt eigene Buckets."""
+    inner = np.linspace(1, n - 1, n_out - 1).astype(int)
+    return np.concatenate([[0], inner, [n]])
+
+
+def lttb_select(x, y, edges):
+    """Index des gewählten Punkts pro Bucket. NaNs werden nie gewählt, solange es Alternativen gibt."""
+    n_out = len(edges) - 1
+    valid = ~np.isnan(y)
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = 0
+    selected[-1] = len(x) - 1
+    prev = 0
+    for i in range(1, n_out - 1):
+        lo, hi = edges[i], edges[i + 1]
+        nxt = slice(edges[i + 1], edges[i + 2])
+        bucket_valid = valid[lo:hi]
+        if not bucket_valid.any():
+            selected[i] = lo  # Wert bleibt NaN -> null
+            continue
+        if not valid[prev] or not valid[nxt].any():
+            # Kein Bezugspunkt (z.B. RSI-Anlauf): erster gültiger Punkt im Bucket
+            j = lo + int(np.argmax(bucket_valid))
+        else:
+            avg_x = x[nxt].mean()
+            avg_y = np.nanmean(y[nxt])
+            area = np.abs((x[prev] - avg_x) * (y[lo:hi] - y[prev])
+                          - (x[prev] - x[lo:hi]) * (avg_y - y[prev]))
+            j = lo + int(np.argmax(np.where(bucket_valid, area, -1.0)))
+        selected[i] = j
+        prev = j
+    return selected
+
+
+def downsample_ohlc(o, h, l, c, edges):
+    """OHLC pro Bucket zusammenfassen."""
+    starts = edges[:-1]
+    return (
+        o[starts],
+        np.maximum.reduceat(h, starts),
+        np.minimum.reduceat(l, starts),
+        c[edges[1:] - 1],
+    )
+
+
+def downsample_chart(ts, o, h, l, c, lines, max_points):
+    """
+    ts/o/h/l/c: Arrays gleicher Länge, lines: {name: Array}.
+    Liefert (bucket_ts, o, h, l, c, {name: (line_ts, values)}) mit max_points Punkten,
+    bzw. die Eingaben unverändert, wenn die Reihe schon kurz genug ist.
+    """
+    n = len(ts)
+    max_points = max(int(max_points), MIN_POINTS)
+    if n <= max_points:
+        return ts, o, h, l, c, {name: (ts, values) for name, values in lines.items()}
+
+    edges = lttb_buckets(n, max_points)
+    x = ts.astype("f8")
+    o2, h2, l2, c2 = downsample_ohlc(o, h, l, c, edges)
+    sampled = {}
+    for name, values in lines.items():
+        idx = lttb_select(x, values, edges)
+        sampled[name] = (ts[idx], values[idx])
+    return ts[edges[:-1]], o2, h2, l2, c2, sampled
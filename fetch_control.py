@@ -0,0 +1,245 @@
+import json
+import time
+import random
+import threading
+from collections import deque
+
+try:
+    from yfinance.exceptions import (
+        YFRateLimitError, YFTickerMissingError, YFPricesMissingError, YFTzMissingError,
+    )
+    RATE_LIMIT_ERRORS = (YFRateLimitError,)
+    PERMANENT_ERRORS = (YFTickerMissingError, YFPricesMissingError, YFTzMissingError)
+except ImportError:  # ältere yfinance-Versionen ohne eigene Exceptions
+    RATE_LIMIT_ERRORS = ()
+    PERMANENT_ERRORS = ()
+
+import market_data
+
+# Im Replay-Modus fehlende Daten kommen auch beim nächsten Versuch nicht
+PERMANENT_ERRORS = PERMANENT_ERRORS + (market_data.ReplayMissing,)
+
+# ==============================================================================
+# ADAPTIVE PARALLELITÄT + RETRIES FÜR YAHOO-ABRUFE
+# ==============================================================================
+# Ein festes MAX_WORKERS ist entweder zu vorsichtig oder löst an schlechten Tagen
+# Drosselung (HTTP 429) aus, und ein `except: return None` verliert dann still
+# ein Drittel des Universums. Deshalb:
+#
+# - AdaptiveLimiter (AIMD): pro Fenster ohne Fehler und unter der Ziel-Latenz
+#   ein Slot mehr, bei Fehlerquote/Latenz darüber oder bei 429 halbieren.
+#   Nach einem 429 pausieren zusätzlich alle Abrufe kurz.
+# - Fetcher: Retries mit exponentiellem Backoff + Jitter ("full jitter"), dauerhaft
+#   fehlende Symbole werden nicht wiederholt. Was auch nach allen Versuchen
+#   scheitert, landet im Fehlerbericht statt im Nichts.
+
+DEFAULT_RETRIES = 3
+BASE_DELAY = 1.0          # Sekunden, verdoppelt sich pro Versuch
+MAX_DELAY = 30.0
+TARGET_LATENCY = 3.0      # Median-Latenz (s), ab der wir das Limit senken
+MAX_ERROR_RATE = 0.1
+RATE_LIMIT_PAUSE = 5.0    # alle Slots pausieren nach einem 429
+REPORT_FILE = "scan_failures.json"
+
+
+def classify(exc):
+    """'rate_limit', 'permanent' (z.B. Symbol delistet) oder 'transient'."""
+    if isinstance(exc, RATE_LIMIT_ERRORS):
+        return "rate_limit"
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    if status == 429 or "too many requests" in str(exc).lower():
+        return "rate_limit"
+    if isinstance(exc, PERMANENT_ERRORS) or status == 404:
+        return "permanent"
+    return "transient"
+
+
+class FetchFailed(Exception):
+    """Abruf auch nach allen Retries fehlgeschlagen (steht im Fehlerbericht)."""
+
+    def __init__(self, kind, symbol, error):
+        super().__init__(f"{kind} {symbol}: {error}")
+        self.kind = kind
+        self.symbol = symbol
+        self.error = error
+
+
+class AdaptiveLimiter:
+    """Begrenzt gleichzeitige Abrufe; das Limit folgt Latenz und Fehlerquote (AIMD)."""
+
+    def __init__(self, initial=4, min_limit=1, max_limit=20, target_latency=TARGET_LATENCY,
+                 max_error_rate=MAX_ERROR_RATE, window=20):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(max(min_limit, min(initial, max_limit)))
+        self.target_latency = target_latency
+        self.max_error_rate = max_error_rate
+        self.window = window
+        self._samples = deque(maxlen=window)   # (latency, error)
+        self._since_change = 0
+        self._since_decrease = 0
+        self._in_flight = 0
+        self._pause_until = 0.0
+        self._cond = threading.Condition()
+        self.peak = int(self.limit)
+        self.increases = 0
+        self.decreases = 0
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                wait = self._pause_until - time.time()
+                if wait <= 0 and self._in_flight < int(self.limit):
+                    break
+                self._cond.wait(timeout=wait if wait > 0 else None)
+            self._in_flight += 1
+
+    def release(self, latency, error=None):
+        """error: None oder Kategorie aus classify()."""
+        with self._cond:
+            self._in_flight -= 1
+            # Dauerhaft fehlende Symbole sagen nichts über die Last bei Yahoo
+            self._samples.append((latency, error is not None and error != "permanent"))
+            self._since_change += 1
+            self._since_decrease += 1
+            if error == "rate_limit":
+                self._pause_until = max(self._pause_until, time.time() + RATE_LIMIT_PAUSE)
+                self._decrease()
+            elif self._since_change >= self.window:
+                errors = sum(1 for _, failed in self._samples if failed) / len(self._samples)
+                latencies = sorted(l for l, _ in self._samples)
+                if errors > self.max_error_rate or latencies[len(latencies) // 2] > self.target_latency:
+                    self._decrease()
+                else:
+                    self._increase()
+            self._cond.notify_all()
+
+    def _decrease(self):
+        # Abrufe, die vor der Senkung gestartet sind, melden dieselbe Drosselung noch
+        # einmal -> höchstens einmal pro "Runde" (so viele Antworten wie Slots) halbieren
+        if self.decreases and self._since_decrease < int(self.limit):
+            return
+        self.limit = max(float(self.min_limit), self.limit / 2)
+        self.decreases += 1
+        self._since_change = 0
+        self._since_decrease = 0
+        self._samples.clear()
+
+    def _increase(self):
+        if self.limit < self.max_limit:
+            self.limit = min(float(self.max_limit), self.limit + 1)
+            self.increases += 1
+            self.peak = max(self.peak, int(self.limit))
+        self._since_change = 0
+
+    def stats(self):
+        with self._cond:
+            return {
+                "limit": int(self.limit),
+                "peak": self.peak,
+                "in_flight": self._in_flight,
+                "increases": self.increases,
+                "decreases": self.decreases,
+            }
+
+
+class Fetcher:
+    """Abrufe über einen AdaptiveLimiter mit Retries; sammelt endgültige Fehler."""
+
+    def __init__(self, max_workers=20, initial=None, retries=DEFAULT_RETRIES,
+                 base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+        self.limiter = AdaptiveLimiter(initial=initial or max(1, max_workers // 4),
+                                       max_limit=max_workers)
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self.failures = {}   # (kind, symbol) -> Eintrag für den Bericht
+        self.calls = 0
+        self.retried = 0
+
+    def reset(self):
+        """Neuer Lauf: Bericht leeren, das gelernte Limit bleibt."""
+        with self._lock:
+            self.failures = {}
+            self.calls = 0
+            self.retried = 0
+
+    def backoff(self, attempt):
+        """Full Jitter: zufällig zwischen 0 und dem exponentiellen Deckel."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, kind, symbol, fn):
+        """fn() mit Retries ausführen; wirft FetchFailed, wenn nichts hilft."""
+        with self._lock:
+            self.calls += 1
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            started = time.time()
+            try:
+                result = fn()
+            except Exception as e:
+                category = classify(e)
+                self.limiter.release(time.time() - started, category)
+                if category == "permanent" or attempt == self.retries:
+                    self._fail(kind, symbol, e, category, attempt + 1)
+                    raise FetchFailed(kind, symbol, e) from e
+                with self._lock:
+                    self.retried += 1
+                time.sleep(self.backoff(attempt))
+                continue
+            self.limiter.release(time.time() - started)
+            return result
+
+    def _fail(self, kind, symbol, error, category, attempts):
+        with self._lock:
+            self.failures[(kind, symbol)] = {
+                "symbol": symbol,
+                "kind": kind,
+                "category": category,
+                "attempts": attempts,
+                "error": str(error)[:200],
+            }
+
+    def record_failure(self, kind, symbol, error, category="permanent"):
+        """Fehler ohne call() festhalten (z.B. Symbol fehlt in einer Batch-Antwort)."""
+        self._fail(kind, symbol, error, category, 1)
+
+    def forget(self, kind, symbol):
+        """Fehler zurücknehmen, wenn ein Ersatzweg die Daten doch geliefert hat."""
+        with self._lock:
+            self.failures.pop((kind, symbol), None)
+
+    def has_failed(self, symbol):
+        """Ist ein Abruf für `symbol` endgültig (nicht nur mangels Daten) gescheitert?"""
+        with self._lock:
+            return any(sym == symbol and f["category"] != "permanent"
+                       for (_, sym), f in self.failures.items())
+
+    def report(self):
+        """Endgültig fehlgeschlagene Abrufe, sortiert nach Symbol."""
+        with self._lock:
+            return sorted(self.failures.values(), key=lambda f: (f["symbol"], f["kind"]))
+
+    def summary(self):
+        failed = self.report()
+        return {
+            "calls": self.calls,
+            "retried": self.retried,
+            "failed": len([f for f in failed if f["category"] != "permanent"]),
+            "missing": len([f for f in failed if f["category"] == "permanent"]),
+            **{f"limit_{k}": v for k, v in self.limiter.stats().items()},
+        }
+
+    def print_report(self, max_lines=20):
+        failed = self.report()
+        s = self.summary()
+        print(f"\n[FETCH] {s['calls']} Abrufe, {s['retried']} Retries, Limit {s['limit_limit']} "
+              f"(Spitze {s['limit_peak']}), {s['failed']} fehlgeschlagen, {s['missing']} ohne Daten")
+        for f in [f for f in failed if f["category"] != "permanent"][:max_lines]:
+            print(f"  ❌ {f['symbol']:<10} {f['kind']:<8} {f['category']:<10} "
+                  f"nach {f['attempts']} Versuchen: {f['error']}")
+
+    def write_report(self, filename=REPORT_FILE):
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump({"summary": self.summary(), "failures": self.report()}, f, indent=2)
@@ -0,0 +1,228 @@
+import json
+import time
+import argparse
+import concurrent.futures
+
+import numpy as np
+
+import bar_store
+import breakout_scan
+import gqbm_panel
+import universe
+
+# ==============================================================================
+# GQBM-BACKTEST: SCORE FÜR JEDEN TAG JEDES SYMBOLS
+# ==============================================================================
+# Der Scan bewertet nur die letzte Kerze, SCORE_THRESHOLD und die Punkte je
+# Dimension sind daher Bauchgefühl. Hier rechnen wir den Score mit
+# gqbm_panel.score_panel() für das ganze Panel (Tage x Symbole) in einem
+# NumPy-Durchlauf und vergleichen ihn mit den Renditen der folgenden Tage.
+#
+# Renditen zählen in Handelstagen des jeweiligen Symbols (rechtsbündiges Panel,
+# Feiertage anderer Börsen sind keine Lücken). Jeder Tag ist eine Beobachtung,
+# die Zeitfenster überlappen sich also – für Vergleiche zwischen Buckets und
+# Schwellen reicht das, eine Equity-Kurve ist es nicht.
+
+HORIZONS = (5, 20, 60)
+SCORE_BUCKETS = (0, 30, 50, 60, 70, 80, 90, 101)   # Bucket = [von, bis)
+THRESHOLDS = tuple(range(50, 100, 5))
+COMPONENTS = ("trend", "squeeze", "momentum", "volume", "pattern")
+REFRESH_WORKERS = 8
+
+
+# ==============================================================================
+# 1. PANEL & RENDITEN
+# ==============================================================================
+
+def refresh_store(symbols, period="10y", workers=REFRESH_WORKERS):
+    """Bar-Store für den Backtest-Zeitraum füllen (einmalig Netzwerk, danach lokal)."""
+    def refresh(symbol):
+        try:
+            bar_store.STORE.update(symbol, period=period, max_age=24 * 3600)
+        except Exception as e:
+            print(f"[BARS] {symbol}: {e}")
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for counter, _ in enumerate(executor.map(refresh, symbols), 1):
+            if counter % 50 == 0:
+                print(f"Progress: {counter}/{len(symbols)}...", end="\r")
+
+
+def load_panel(symbols, period="10y"):
+    """Rechtsbündige Close-/Volumen-Arrays (Tage x Symbole) aus dem Bar-Store."""
+    close, volume = gqbm_panel.build_panel(symbols, period=period)
+    raw_close = close.to_numpy(dtype="f8")
+    c = gqbm_panel.align_right(raw_close)
+    v = gqbm_panel.align_right(volume.to_numpy(dtype="f8"), order_by=raw_close)
+    return c, v, list(close.columns)
+
+
+def forward_returns(close, horizons=HORIZONS):
+    """{h: Rendite von Tag t bis t+h} – NaN, wo t+h noch nicht existiert."""
+    out = {}
+    for h in horizons:
+        fwd = np.full_like(close, np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fwd[:-h] = close[h:] / close[:-h] - 1
+        out[h] = fwd
+    return out
+
+
+def weighted_score(score, parts, weights):
+    """Score mit skalierten Dimensionen (z.B. {"volume": 0.5}); Zellen ohne Score bleiben NaN."""
+    total = sum(parts[name] * weights.get(name, 1.0) for name in COMPONENTS)
+    return np.where(np.isfinite(score), total, np.nan)
+
+
+# ==============================================================================
+# 2. AUSWERTUNG
+# ==============================================================================
+
+def _stats(mask, fwd):
+    """Anzahl, Mittel, Median und Trefferquote (> 0) der Renditen je Horizont."""
+    out = {"n": int(mask.sum())}
+    for h, values in fwd.items():
+        x = values[mask]
+        x = x[np.isfinite(x)]
+        out[h] = {
+            "n": int(x.size),
+            "mean": round(float(x.mean()), 5) if x.size else None,
+            "median": round(float(np.median(x)), 5) if x.size else None,
+            "hit_rate": round(float((x > 0).mean()), 4) if x.size else None,
+        }
+    return out
+
+
+def _entries(score, threshold):
+    """Tage, an denen der Score die Schwelle neu überschreitet (nicht jeder Tag darüber)."""
+    above = score >= threshold
+    before = np.zeros_like(above)
+    before[1:] = above[:-1]
+    return above & ~before
+
+
+def run_backtest(close, volume, horizons=HORIZONS, weights=None,
+                 buckets=SCORE_BUCKETS, thresholds=THRESHOLDS):
+    """Score auf dem ganzen Panel und Forward-Renditen nach Bucket, Dimension und Schwelle."""
+    t0 = time.perf_counter()
+    score, parts, _ = gqbm_panel.score_panel(close, volume)
+    if weights:
+        score = weighted_score(score, parts, weights)
+    t_score = time.perf_counter() - t0
+
+    fwd = forward_returns(close, horizons)
+    valid = np.isfinite(score)
+    with np.errstate(invalid="ignore"):
+        report = {
+            "symbols": close.shape[1],
+            "days": close.shape[0],
+            "cells": int(valid.sum()),
+            "weights": weights or {},
+            "baseline": _stats(valid, fwd),
+            "buckets": [
+                {"from": lo, "to": hi, **_stats(valid & (score >= lo) & (score < hi), fwd)}
+                for lo, hi in zip(buckets[:-1], buckets[1:])
+            ],
+            "components": {
+                name: [
+                    {"points": int(points), **_stats(valid & (parts[name] == points), fwd)}
+                    for points in np.unique(parts[name][valid])
+                ]
+                for name in COMPONENTS
+            },
+            "thresholds": [
+                {"threshold": t,
+                 "days": _stats(valid & (score >= t), fwd),
+                 "entries": _stats(valid & _entries(score, t), fwd)}
+                for t in thresholds
+            ],
+        }
+    report["seconds"] = {"score": round(t_score, 3), "total": round(time.perf_counter() - t0, 3)}
+    return report
+
+
+# ==============================================================================
+# 3. AUSGABE
+# ==============================================================================
+
+def _fmt(stats, horizons):
+    cells = []
+    for h in horizons:
+        s = stats[h]
+        if s["mean"] is None:
+            cells.append(f"{'-':>22}")
+        else:
+            cells.append(f"{s['mean']:>+8.2%} {s['median']:>+7.2%} {s['hit_rate']:>5.0%}")
+    return " | ".join(cells)
+
+
+def print_report(report, horizons=HORIZONS):
+    head = " | ".join(f"{f'{h}T: Mittel Median Quote':>22}" for h in horizons)
+    print(f"\nGQBM-Backtest: {report['symbols']} Symbole x {report['days']} Tage, "
+          f"{report['cells']} bewertete Tage, Score in {report['seconds']['score']}s "
+          f"(gesamt {report['seconds']['total']}s)")
+    if report["weights"]:
+        print(f"Gewichte: {report['weights']}")
+
+    print("\n" + "=" * 100)
+    print(f"{'Score-Bucket':<14} {'Tage':>9} | {head}")
+    print("-" * 100)
+    print(f"{'alle':<14} {report['baseline']['n']:>9} | {_fmt(report['baseline'], horizons)}")
+    for b in report["buckets"]:
+        print(f"{b['from']:>3}-{b['to'] - 1:<10} {b['n']:>9} | {_fmt(b, horizons)}")
+
+    print("\n" + "=" * 100)
+    print(f"{'Dimension':<14} {'Tage':>9} | {head}")
+    print("-" * 100)
+    for name, levels in report["components"].items():
+        for level in levels:
+            print(f"{name + ' ' + str(level['points']):<14} {level['n']:>9} | {_fmt(level, horizons)}")
+
+    print("\n" + "=" * 100)
+    print(f"{'Schwelle':<14} {'Signale':>9} | {head}   (nur neue Überschreitungen)")
+    print("-" * 100)
+    for t in report["thresholds"]:
+        entries = t["entries"]
+        print(f"{'>= ' + str(t['threshold']):<14} {entries['n']:>9} | {_fmt(entries, horizons)}")
+
+
+def _parse_weights(text):
+    weights = {}
+    for item in (text or "").split(","):
+        if item.strip():
+            name, _, value = item.partition("=")
+            if name.strip() not in COMPONENTS:
+                raise SystemExit(f"Unbekannte Dimension '{name.strip()}' (verfügbar: {', '.join(COMPONENTS)})")
+            weights[name.strip()] = float(value)
+    return weights
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GQBM-Score über die ganze Historie testen")
+    parser.add_argument("--universes", default=",".join(breakout_scan.UNIVERSES),
+                        help=f"Kommagetrennt, verfügbar: {', '.join(universe.available())}")
+    parser.add_argument("--period", default="10y", choices=list(bar_store.PERIOD_OFFSETS))
+    parser.add_argument("--refresh", action="store_true",
+                        help="Bar-Store vorher für den Zeitraum auffüllen (Netzwerk)")
+    parser.add_argument("--weights", default="",
+                        help="Dimensionen skalieren, z.B. volume=0.5,pattern=1.5")
+    parser.add_argument("--thresholds", default=",".join(map(str, THRESHOLDS)),
+                        help="Zu testende Score-Schwellen (kommagetrennt)")
+    parser.add_argument("--json", help="Bericht zusätzlich als JSON speichern")
+    args = parser.parse_args()
+
+    jobs = universe.load_jobs([u.strip() for u in args.universes.split(",") if u.strip()])
+    symbols = [symbol for symbol, _ in jobs]
+    if args.refresh:
+        refresh_store(symbols, period=args.period)
+
+    t0 = time.time()
+    close, volume, _ = load_panel(symbols, period=args.period)
+    print(f"Panel geladen in {time.time() - t0:.2f}s")
+    report = run_backtest(close, volume, weights=_parse_weights(args.weights),
+                          thresholds=[int(t) for t in args.thresholds.split(",") if t.strip()])
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBericht gespeichert in '{args.json}'")
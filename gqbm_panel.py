@@ -0,0 +1,249 @@
+import numpy as np
+import pandas as pd
+
+import bar_store
+
+# ==============================================================================
+# GQBM PANEL-MODUS: ALLE AKTIEN IN EINEM NUMPY-DURCHLAUF
+# ==============================================================================
+# Statt pro Aktie einen pandas-DataFrame durch calculate_indicators() zu schicken,
+# rechnen wir auf einer Matrix (Tage x Symbole). Jede Spalte ist rechtsbündig
+# ausgerichtet (die letzte Kerze jedes Symbols steht in der letzten Zeile), damit
+# Aktien mit unterschiedlicher Historie / Feiertagen korrekt nebeneinander stehen.
+#
+# Die Logik entspricht breakout_scan.calculate_indicators + analyze_stock_gqbm.
+
+MIN_BARS = 200        # wie len(df) < 200 -> None
+BBW_AVG_WINDOW = 120  # "6-Monats-Schnitt" der Bollinger-Breite
+HIGH_WINDOW = 252     # 52-Wochen-Hoch (entspricht period="1y")
+
+
+# ==============================================================================
+# 1. ROLLING-HELFER (SPALTENWEISE, NaN = "keine Kerze")
+# ==============================================================================
+
+def align_right(values, order_by=None):
+    """Schiebt pro Spalte alle gültigen Werte ans Ende (NaNs nach oben)."""
+    mask = np.isfinite(values if order_by is None else order_by)
+    order = np.argsort(mask, axis=0, kind="stable")
+    return np.take_along_axis(values, order, axis=0)
+
+
+def _shifted_diff(cum, window):
+    out = cum.copy()
+    out[window:] -= cum[:-window]
+    return out
+
+
+def rolling_mean(values, window):
+    """Wie Series.rolling(window).mean(): NaN, solange nicht `window` gültige Werte da sind."""
+    valid = np.isfinite(values)
+    total = _shifted_diff(np.cumsum(np.where(valid, values, 0.0), axis=0), window)
+    count = _shifted_diff(np.cumsum(valid, axis=0), window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count == window, total / window, np.nan)
+
+
+def rolling_std(values, window):
+    """Wie Series.rolling(window).std() (ddof=1), über laufende Summen."""
+    # Pro Spalte zentrieren, sonst frisst die Auslöschung bei großen Kursen Stellen
+    shift = np.nanmean(values, axis=0) if np.isfinite(values).any() else 0.0
+    centered = values - shift
+    valid = np.isfinite(centered)
+    x = np.where(valid, centered, 0.0)
+    s1 = _shifted_diff(np.cumsum(x, axis=0), window)
+    s2 = _shifted_diff(np.cumsum(x * x, axis=0), window)
+    count = _shifted_diff(np.cumsum(valid, axis=0), window)
+    var = (s2 - s1 * s1 / window) / (window - 1)
+    return np.where(count == window, np.sqrt(np.maximum(var, 0.0)), np.nan)
+
+
+def ema(values, span):
+    """Wie Series.ewm(span=span, adjust=False).mean(), startet bei der ersten gültigen Kerze."""
+    alpha = 2.0 / (span + 1.0)
+    out = np.full_like(values, np.nan)
+    prev = np.full(values.shape[1], np.nan)
+    for t in range(values.shape[0]):
+        x = values[t]
+        step = alpha * x + (1 - alpha) * prev
+        prev = np.where(np.isnan(prev), x, np.where(np.isnan(x), prev, step))
+        out[t] = prev
+    return out
+
+
+def rolling_max(values, window):
+    """Rollierendes Maximum (min_periods=1) in O(T*N) nach van Herk/Gil-Werman."""
+    t, n = values.shape
+    x = np.where(np.isfinite(values), values, -np.inf)
+    # vorne window-1 Zeilen auffüllen, dann auf ganze Blöcke aufrunden
+    pad_front = window - 1
+    total = pad_front + t
+    pad_back = (-total) % window
+    padded = np.concatenate([
+        np.full((pad_front, n), -np.inf), x, np.full((pad_back, n), -np.inf)
+    ])
+    blocks = padded.reshape(-1, window, n)
+    prefix = np.maximum.accumulate(blocks, axis=1).reshape(-1, n)
+    suffix = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(-1, n)
+    # Fenster [i, i+window-1] im gepolsterten Array = max(suffix[i], prefix[i+window-1])
+    out = np.maximum(suffix[:t], prefix[window - 1:window - 1 + t])
+    return np.where(np.isfinite(out), out, np.nan)
+
+
+# ==============================================================================
+# 2. INDIKATOREN + SCORE FÜR DAS GANZE PANEL
+# ==============================================================================
+
+def compute_indicators(close, volume):
+    """
+    close/volume: rechtsbündige Arrays (Tage x Symbole).
+    Liefert ein dict mit denselben Indikatoren wie calculate_indicators().
+    """
+    ind = {
+        "EMA_10": ema(close, 10),
+        "EMA_20": ema(close, 20),
+        "SMA_50": rolling_mean(close, 50),
+        "SMA_200": rolling_mean(close, 200),
+        "Vol_SMA50": rolling_mean(volume, 50),
+    }
+
+    bb_mid = rolling_mean(close, 20)
+    bb_std = rolling_std(close, 20)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ind["BBW"] = (4 * bb_std) / bb_mid  # (Up - Low) / Mid
+    ind["BBW_AVG"] = rolling_mean(ind["BBW"], BBW_AVG_WINDOW)
+
+    # RSI (SMA-Variante wie im Einzel-Scan; erste Kerze zählt als 0)
+    valid = np.isfinite(close)
+    delta = np.full_like(close, np.nan)
+    delta[1:] = close[1:] - close[:-1]
+    gain = np.where(valid, np.where(delta > 0, delta, 0.0), np.nan)
+    loss = np.where(valid, np.where(delta < 0, -delta, 0.0), np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rs = rolling_mean(gain, 14) / rolling_mean(loss, 14)
+        ind["RSI"] = 100 - (100 / (1 + rs))
+
+    ind["HIGH_52"] = rolling_max(close, HIGH_WINDOW)
+    ind["BARS"] = np.cumsum(valid, axis=0)
+    return ind
+
+
+def score_components(close, volume, ind):
+    """Punkte je GQBM-Dimension für jede Zelle (Tage x Symbole)."""
+    c = close
+    with np.errstate(invalid="ignore", divide="ignore"):
+        perfect = ((c > ind["EMA_10"]) & (ind["EMA_10"] > ind["EMA_20"])
+                   & (ind["EMA_20"] > ind["SMA_50"]) & (ind["SMA_50"] > ind["SMA_200"]))
+        uptrend = (c > ind["SMA_50"]) & (ind["SMA_50"] > ind["SMA_200"])
+        trend = np.where(perfect, 20, np.where(uptrend, 10, 0))
+
+        bbw, avg_bbw = ind["BBW"], ind["BBW_AVG"]
+        squeeze = np.where(bbw < avg_bbw * 0.8, 20, np.where(bbw < avg_bbw, 10, 0))
+
+        rsi = ind["RSI"]
+        momentum = np.where((rsi >= 65) & (rsi <= 80), 15,
+                            np.where((rsi >= 50) & (rsi < 65), 5, 0))
+
+        vsma = ind["Vol_SMA50"]
+        rvol = np.where(vsma > 0, volume / np.where(vsma > 0, vsma, 1.0), 0.0)
+        vol = np.where(rvol > 2.0, 25, np.where(rvol > 1.5, 15, 0))
+
+        high = ind["HIGH_52"]
+        dist = (high - c) / high
+        pattern = np.where(dist < 0.05, 20, np.where(dist < 0.15, 10, 0))
+
+    return {
+        "trend": trend, "squeeze": squeeze, "momentum": momentum,
+        "volume": vol, "pattern": pattern, "rvol": rvol,
+    }
+
+
+def score_panel(close, volume):
+    """GQBM-Score für jede Kerze jedes Symbols. Zellen mit < MIN_BARS Historie -> NaN."""
+    ind = compute_indicators(close, volume)
+    parts = score_components(close, volume, ind)
+    score = (parts["trend"] + parts["squeeze"] + parts["momentum"]
+             + parts["volume"] + parts["pattern"]).astype("f8")
+    score[ind["BARS"] < MIN_BARS] = np.nan
+    score[~np.isfinite(close)] = np.nan
+    return score, parts, ind
+
+
+# ==============================================================================
+# 3. PANEL LADEN & RANKING
+# ==============================================================================
+
+def frames_to_panel(frames):
+    """{symbol: OHLCV-DataFrame} -> Close- und Volumen-Matrix (Datum x Symbol)."""
+    closes, volumes = {}, {}
+    for symbol, df in frames.items():
+        if df.empty:
+            continue
+        # Zeitzonen der Börsen vereinheitlichen, nur das Datum zählt
+        idx = df.index.tz_localize(None).normalize() if df.index.tz is not None else df.index
+        closes[symbol] = pd.Series(df["Close"].to_numpy(), index=idx)
+        volumes[symbol] = pd.Series(df["Volume"].to_numpy(), index=idx)
+    close = pd.DataFrame(closes).sort_index()
+    volume = pd.DataFrame(volumes).reindex(close.index)
+    return close, volume
+
+
+def build_panel(symbols, period="1y", interval="1d", store=None):
+    """Close- und Volumen-Matrix (Datum x Symbol) aus dem lokalen Bar-Store."""
+    store = store or bar_store.STORE
+    return frames_to_panel({s: store.load(s, interval=interval, period=period) for s in symbols})
+
+
+def _setup_text(trend, squeeze, momentum, vol, pattern, rsi, rvol):
+    reasons = []
+    if trend == 20:
+        reasons.append("Trend: Perfect Order")
+    if squeeze == 20:
+        reasons.append("Vol: Squeeze")
+    if momentum == 15:
+        reasons.append(f"Mom: Power Zone ({int(rsi)})")
+    if vol == 25:
+        reasons.append(f"Vol: Explosive (x{round(rvol, 1)})")
+    elif vol == 15:
+        reasons.append(f"Vol: High (x{round(rvol, 1)})")
+    if pattern == 20:
+        reasons.append("Pat: Near ATH")
+    return ", ".join(reasons)
+
+
+def rank_panel(close, volume, regions=None, threshold=None):
+    """
+    close/volume: DataFrames (Datum x Symbol). Bewertet die letzte Kerze jedes Symbols
+    und liefert eine nach Score sortierte Tabelle im Format von analyze_stock_gqbm.
+    """
+    symbols = list(close.columns)
+    c = align_right(close.to_numpy(dtype="f8"))
+    v = align_right(volume.to_numpy(dtype="f8"), order_by=close.to_numpy(dtype="f8"))
+    score, parts, ind = score_panel(c, v)
+
+    last = {name: arr[-1] for name, arr in parts.items()}
+    table = pd.DataFrame({
+        "Region": [(regions or {}).get(s, "") for s in symbols],
+        "Symbol": symbols,
+        "Price": np.round(c[-1], 2),
+        "Score": score[-1],
+        "RVol": np.round(last["rvol"], 2),
+        "RSI": ind["RSI"][-1],
+    })
+    # Einzel-Scan verwirft Symbole ohne RSI (int(NaN) wirft) und mit zu wenig Historie
+    table = table[np.isfinite(table["Score"]) & np.isfinite(table["RSI"])]
+    if threshold is not None:
+        table = table[table["Score"] >= threshold]
+
+    rows = table.index.to_numpy()
+    table = table.assign(
+        Score=table["Score"].astype(int),
+        RSI=table["RSI"].astype(int),
+        Setup=[
+            _setup_text(last["trend"][i], last["squeeze"][i], last["momentum"][i],
+                        last["volume"][i], last["pattern"][i],
+                        ind["RSI"][-1][i], last["rvol"][i])
+            for i in rows
+        ],
+    )
+    return table.sort_values("Score", ascending=False, kind="stable").reset_index(drop=True)
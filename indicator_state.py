@@ -0,0 +1,283 @@
+import os
+import json
+import math
+import threading
+from collections import deque
+
+# ==============================================================================
+# INKREMENTELLE INDIKATOREN (O(1) PRO NEUER KERZE)
+# ==============================================================================
+# Für Intraday-Rescans: statt jedes Mal calculate_indicators() über ein ganzes
+# Jahr laufen zu lassen, hält IndicatorState laufende Summen / EMAs / Fenster pro
+# Symbol. Abgeschlossene Kerzen werden mit push() übernommen, die laufende
+# (heutige) Kerze wird mit peek() bewertet, ohne den Zustand zu verändern.
+#
+# Die Werte entsprechen breakout_scan.calculate_indicators (gleiche Fenster,
+# RSI als einfacher 14er-Schnitt, Bollinger-Std mit ddof=1).
+
+STATE_DIR = os.environ.get("VR_STATE_DIR", "indicator_state")
+STATE_VERSION = 1
+
+NAN = float("nan")
+
+
+class RollingWindow:
+    """Gleitendes Fenster mit laufender Summe (und Quadratsumme für die Std)."""
+
+    def __init__(self, size, values=()):
+        self.size = size
+        self.values = deque(values, maxlen=size)
+        self.total = math.fsum(self.values)
+        self.total_sq = math.fsum(v * v for v in self.values)
+
+    def push(self, x):
+        if len(self.values) == self.size:
+            old = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(x)
+        self.total += x
+        self.total_sq += x * x
+
+    def _sums(self, x=None):
+        n, total, total_sq = len(self.values), self.total, self.total_sq
+        if x is not None:
+            if n == self.size:
+                old = self.values[0]
+                total -= old
+                total_sq -= old * old
+            else:
+                n += 1
+            total += x
+            total_sq += x * x
+        return n, total, total_sq
+
+    def mean(self, x=None):
+        n, total, _ = self._sums(x)
+        return total / n if n == self.size else NAN
+
+    def std(self, x=None):
+        n, total, total_sq = self._sums(x)
+        if n != self.size or n < 2:
+            return NAN
+        return math.sqrt(max((total_sq - total * total / n) / (n - 1), 0.0))
+
+
+class EMA:
+    """EMA wie pandas ewm(span, adjust=False): Start mit dem ersten Wert."""
+
+    def __init__(self, span, value=None):
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = value
+
+    def push(self, x):
+        self.value = self.peek(x)
+
+    def peek(self, x=None):
+        if x is None:
+            return NAN if self.value is None else self.value
+        if self.value is None:
+            return x
+        return self.alpha * x + (1 - self.alpha) * self.value
+
+
+class RollingMax:
+    """Maximum der letzten `size` Werte mit monotoner Deque (amortisiert O(1))."""
+
+    def __init__(self, size, entries=(), count=0):
+        self.size = size
+        self.count = count
+        self.entries = deque(entries)  # (index, value), Werte fallend
+
+    def push(self, x):
+        while self.entries and self.entries[-1][1] <= x:
+            self.entries.pop()
+        self.entries.append((self.count, x))
+        self.count += 1
+        while self.entries[0][0] <= self.count - 1 - self.size:
+            self.entries.popleft()
+
+    def peek(self, x=None):
+        # Nach einem push() fiele höchstens der älteste Eintrag aus dem Fenster
+        first_valid = self.count - self.size + (1 if x is not None else 0)
+        best = NAN if x is None else x
+        for index, value in self.entries:
+            if index >= first_valid:
+                best = value if math.isnan(best) else max(best, value)
+                break
+        return best
+
+
+class IndicatorState:
+    """Zustand aller GQBM-Indikatoren eines Symbols."""
+
+    def __init__(self):
+        self.bars = 0
+        self.last_ts = None
+        self.last_close = None
+        self.last_volume = None
+        self.ema10 = EMA(10)
+        self.ema20 = EMA(20)
+        self.sma50 = RollingWindow(50)
+        self.sma200 = RollingWindow(200)
+        self.bb20 = RollingWindow(20)
+        self.gain14 = RollingWindow(14)
+        self.loss14 = RollingWindow(14)
+        self.vol50 = RollingWindow(50)
+        self.bbw120 = RollingWindow(120)
+        self.high252 = RollingMax(252)
+
+    # ------------------------------------------------------------------
+    # Update / Auswertung
+    # ------------------------------------------------------------------
+
+    def _delta(self, close):
+        delta = 0.0 if self.last_close is None else close - self.last_close
+        return max(delta, 0.0), max(-delta, 0.0)
+
+    def push(self, ts, close, volume):
+        """Abgeschlossene Kerze übernehmen (O(1))."""
+        gain, loss = self._delta(close)
+        self.ema10.push(close)
+        self.ema20.push(close)
+        self.sma50.push(close)
+        self.sma200.push(close)
+        self.bb20.push(close)
+        bbw = self._bbw(self.bb20.mean(), self.bb20.std())
+        if not math.isnan(bbw):
+            self.bbw120.push(bbw)
+        self.gain14.push(gain)
+        self.loss14.push(loss)
+        self.vol50.push(volume)
+        self.high252.push(close)
+        self.bars += 1
+        self.last_ts = ts
+        self.last_close = close
+        self.last_volume = volume
+
+    @staticmethod
+    def _bbw(mid, std):
+        if math.isnan(mid) or math.isnan(std) or mid == 0:
+            return NAN
+        return (4 * std) / mid  # (Up - Low) / Mid
+
+    @staticmethod
+    def _rsi(gain, loss):
+        if math.isnan(gain) or math.isnan(loss):
+            return NAN
+        if loss == 0:
+            return NAN if gain == 0 else 100.0
+        return 100 - 100 / (1 + gain / loss)
+
+    def peek(self, close=None, volume=None):
+        """
+        Indikatoren für die letzte Kerze. Mit close/volume: als ob diese (laufende)
+        Kerze angehängt würde – der Zustand bleibt unverändert.
+        """
+        if close is None:
+            close, volume = self.last_close, self.last_volume
+            x = None
+        else:
+            x = close
+        gain, loss = self._delta(close) if x is not None else (None, None)
+
+        bbw = self._bbw(self.bb20.mean(x), self.bb20.std(x))
+        if x is None or math.isnan(bbw):
+            bbw_avg = self.bbw120.mean()
+        else:
+            bbw_avg = self.bbw120.mean(bbw)
+
+        return {
+            "Close": close,
+            "Volume": volume,
+            "EMA_10": self.ema10.peek(x),
+            "EMA_20": self.ema20.peek(x),
+            "SMA_50": self.sma50.mean(x),
+            "SMA_200": self.sma200.mean(x),
+            "BBW": bbw,
+            "BBW_AVG": bbw_avg,
+            "RSI": self._rsi(self.gain14.mean(gain), self.loss14.mean(loss)),
+            "Vol_SMA50": self.vol50.mean(volume if x is not None else None),
+            "HIGH_52": self.high252.peek(x),
+            "bars": self.bars + (1 if x is not None else 0),
+        }
+
+    @classmethod
+    def from_frame(cls, df):
+        """Aufwärmen aus einem OHLCV-DataFrame (einmalig O(n))."""
+        state = cls()
+        ts = df.index.as_unit("ns").asi8 if hasattr(df.index, "as_unit") else df.index.asi8
+        for t, close, volume in zip(ts, df["Close"].to_numpy(), df["Volume"].to_numpy()):
+            state.push(int(t), float(close), float(volume))
+        return state
+
+    # ------------------------------------------------------------------
+    # Checkpoint
+    # ------------------------------------------------------------------
+
+    def to_dict(self):
+        return {
+            "version": STATE_VERSION,
+            "bars": self.bars,
+            "last_ts": self.last_ts,
+            "last_close": self.last_close,
+            "last_volume": self.last_volume,
+            "ema10": self.ema10.value,
+            "ema20": self.ema20.value,
+            "sma200": list(self.sma200.values),  # enthält auch die 50er/20er-Fenster
+            "gain14": list(self.gain14.values),
+            "loss14": list(self.loss14.values),
+            "vol50": list(self.vol50.values),
+            "bbw120": list(self.bbw120.values),
+            "high252": [list(e) for e in self.high252.entries],
+            "high_count": self.high252.count,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != STATE_VERSION:
+            return None
+        state = cls()
+        closes = data["sma200"]
+        state.bars = data["bars"]
+        state.last_ts = data["last_ts"]
+        state.last_close = data["last_close"]
+        state.last_volume = data["last_volume"]
+        state.ema10 = EMA(10, data["ema10"])
+        state.ema20 = EMA(20, data["ema20"])
+        # Summen werden aus den Fenstern neu gebildet -> kein Drift über Checkpoints
+        state.sma200 = RollingWindow(200, closes)
+        state.sma50 = RollingWindow(50, closes[-50:])
+        state.bb20 = RollingWindow(20, closes[-20:])
+        state.gain14 = RollingWindow(14, data["gain14"])
+        state.loss14 = RollingWindow(14, data["loss14"])
+        state.vol50 = RollingWindow(50, data["vol50"])
+        state.bbw120 = RollingWindow(120, data["bbw120"])
+        state.high252 = RollingMax(252, [tuple(e) for e in data["high252"]], data["high_count"])
+        return state
+
+
+# ==============================================================================
+# SPEICHERN / LADEN (EIN JSON PRO SYMBOL)
+# ==============================================================================
+
+def _state_path(symbol, root=STATE_DIR):
+    safe = "".join(ch if ch.isalnum() or ch in "._-" else "_" for ch in symbol.upper())
+    return os.path.join(root, safe + ".json")
+
+
+def load_state(symbol, root=STATE_DIR):
+    try:
+        with open(_state_path(symbol, root), "r", encoding="utf-8") as f:
+            return IndicatorState.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_state(symbol, state, root=STATE_DIR):
+    path = _state_path(symbol, root)
+    os.makedirs(root, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state.to_dict(), f)
+    os.replace(tmp, path)
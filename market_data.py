@@ -0,0 +1,460 @@
+import os
+import re
+import gzip
+import json
+import argparse
+import time
+import tempfile
+import threading
+import contextlib
+import concurrent.futures
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+import metrics
+import profiling
+
+# ==============================================================================
+# DATENQUELLE FÜR ALLE MODULE (LIVE / AUFZEICHNEN / ABSPIELEN)
+# ==============================================================================
+# App, Scanner und Bar-Store fragen Yahoo nicht mehr direkt über yf.Ticker,
+# sondern über info(), news(), history() und download() dieses Moduls. Welche
+# Quelle dahinter steckt, bestimmt VR_DATA_MODE:
+#
+#   live    (Standard) yfinance
+#   record  yfinance + jede Antwort roh im Archiv ablegen
+#   replay  nur aus dem Archiv, kein Netzwerk (fehlende Daten -> ReplayMissing)
+#
+# Archiv (VR_DATA_ARCHIVE, Standard market_archive/):
+#   info/<SYMBOL>.json.gz, news/<SYMBOL>.json.gz
+#   history/<interval>/<SYMBOL>.npz   -> ts (UTC ns) + OHLCV, Zeitzone
+#
+# History wird pro Symbol und Intervall zusammengeführt, ein Replay bedient
+# daher auch Delta-Abrufe (start=...) und kürzere Perioden aus derselben Datei.
+#
+# Replay nutzen wir, um neue Instanzen beim Deploy vorzuwärmen (--warm füllt
+# den Bar-Store) und für Lasttests von /api/details und /api/history mit
+# echten Payload-Größen.
+
+MODES = ("live", "record", "replay")
+ARCHIVE_DIR = os.environ.get("VR_DATA_ARCHIVE", "market_archive")
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+class ReplayMissing(LookupError):
+    """Im Archiv liegt nichts für diese Anfrage (Replay-Modus fragt nie Yahoo)."""
+
+
+def _safe_name(symbol):
+    return re.sub(r"[^A-Za-z0-9._-]", "_", symbol.upper())
+
+
+def _is_intraday(interval):
+    return interval[-1] in "mh"
+
+
+def _slice_period(df, period):
+    # Import hier: bar_store nutzt selbst dieses Modul als Datenquelle
+    import bar_store
+    return bar_store.slice_period(df, period)
+
+
+# ==============================================================================
+# 1. QUELLEN
+# ==============================================================================
+
+class YahooProvider:
+    """Live-Daten über yfinance."""
+    name = "live"
+
+    def info(self, symbol):
+        return yf.Ticker(symbol).info
+
+    def news(self, symbol):
+        return yf.Ticker(symbol).news
+
+    def history(self, symbol, interval="1d", **kwargs):
+        return yf.Ticker(symbol).history(interval=interval, **kwargs)
+
+    def download(self, symbols, **kwargs):
+        return yf.download(symbols, **kwargs)
+
+    def timezone(self, symbol):
+        # Nach einem Download liegt die Zeitzone in yfinance' tz-Cache (kein Request)
+        return yf.Ticker(symbol).fast_info["timezone"]
+
+
+class Archive:
+    """Kompakte lokale Ablage roher Antworten (gzip-JSON bzw. komprimiertes .npz)."""
+
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _path(self, kind, symbol, interval=None):
+        if kind == "history":
+            return os.path.join(self.root, "history", interval, f"{_safe_name(symbol)}.npz")
+        return os.path.join(self.root, kind, f"{_safe_name(symbol)}.json.gz")
+
+    @staticmethod
+    def _replace(path, write):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+
+    # --- info / news ---
+
+    def put_json(self, kind, symbol, value):
+        body = json.dumps(value, default=str, separators=(",", ":")).encode("utf-8")
+        self._replace(self._path(kind, symbol), lambda f: f.write(gzip.compress(body, mtime=0)))
+
+    def get_json(self, kind, symbol):
+        try:
+            with open(self._path(kind, symbol), "rb") as f:
+                return json.loads(gzip.decompress(f.read()))
+        except FileNotFoundError:
+            raise ReplayMissing(f"{kind} {symbol}") from None
+
+    # --- history ---
+
+    def put_history(self, symbol, interval, df):
+        if df is None or df.empty:
+            return
+        df = df.dropna(subset=["Close"])
+        tz = str(df.index.tz) if df.index.tz is not None else "UTC"
+        idx = df.index if df.index.tz is not None else df.index.tz_localize("UTC")
+        ts = idx.tz_convert("UTC").as_unit("ns").asi8
+        values = np.column_stack([df[col].to_numpy(dtype="f8") if col in df else
+                                  np.full(len(df), np.nan) for col in COLUMNS])
+        path = self._path("history", symbol, interval)
+        with self._lock:
+            try:
+                old_ts, old_values, _ = self._read_history(path)
+                keep = ~np.isin(old_ts, ts)  # neue Antwort gewinnt (Adjustierungen)
+                ts = np.concatenate([old_ts[keep], ts])
+                values = np.concatenate([old_values[keep], values])
+                order = np.argsort(ts, kind="stable")
+                ts, values = ts[order], values[order]
+            except FileNotFoundError:
+                pass
+            self._replace(path, lambda f: np.savez_compressed(f, ts=ts, values=values, tz=np.array(tz)))
+
+    @staticmethod
+    def _read_history(path):
+        with np.load(path) as data:
+            return data["ts"], data["values"], str(data["tz"])
+
+    def timezone(self, symbol, interval="1d"):
+        try:
+            return self._read_history(self._path("history", symbol, interval))[2]
+        except FileNotFoundError:
+            raise ReplayMissing(f"history {symbol} {interval}") from None
+
+    def get_history(self, symbol, interval="1d", period=None, start=None):
+        try:
+            ts, values, tz = self._read_history(self._path("history", symbol, interval))
+        except FileNotFoundError:
+            raise ReplayMissing(f"history {symbol} {interval}") from None
+        index = pd.to_datetime(ts, unit="ns", utc=True).tz_convert(tz)
+        index.name = "Datetime" if _is_intraday(interval) else "Date"
+        df = pd.DataFrame(values, index=index, columns=COLUMNS)
+        if start is not None:
+            start = pd.Timestamp(start)
+            df = df[df.index >= (start.tz_localize(tz) if start.tz is None else start)]
+        if period is not None:
+            df = _slice_period(df, period)
+        return df
+
+    # --- Übersicht ---
+
+    def symbols(self, kind="history", interval="1d"):
+        folder = os.path.join(self.root, kind, interval) if kind == "history" else os.path.join(self.root, kind)
+        if not os.path.isdir(folder):
+            return []
+        suffix = ".npz" if kind == "history" else ".json.gz"
+        return sorted(name[:-len(suffix)] for name in os.listdir(folder) if name.endswith(suffix))
+
+    def stats(self):
+        out = {}
+        for dirpath, _, files in os.walk(self.root):
+            files = [f for f in files if not f.endswith(".tmp")]
+            if files:
+                rel = os.path.relpath(dirpath, self.root)
+                out[rel] = {"files": len(files),
+                            "bytes": sum(os.path.getsize(os.path.join(dirpath, f)) for f in files)}
+        return out
+
+
+class RecordingProvider:
+    """Fragt die innere Quelle und legt jede Antwort zusätzlich im Archiv ab."""
+    name = "record"
+
+    def __init__(self, inner=None, archive=None):
+        self.inner = inner or YahooProvider()
+        self.archive = archive or Archive()
+
+    def info(self, symbol):
+        value = self.inner.info(symbol)
+        if value:
+            self.archive.put_json("info", symbol, value)
+        return value
+
+    def news(self, symbol):
+        value = self.inner.news(symbol)
+        if value is not None:
+            self.archive.put_json("news", symbol, value)
+        return value
+
+    def history(self, symbol, interval="1d", **kwargs):
+        df = self.inner.history(symbol, interval=interval, **kwargs)
+        self.archive.put_history(symbol, interval, df)
+        return df
+
+    def timezone(self, symbol):
+        return self.inner.timezone(symbol)
+
+    def download(self, symbols, **kwargs):
+        raw = self.inner.download(symbols, **kwargs)
+        interval = kwargs.get("interval", "1d")
+        if raw is not None and not raw.empty:
+            if isinstance(raw.columns, pd.MultiIndex):
+                frames = {symbol: raw[symbol] for symbol in raw.columns.get_level_values(0).unique()}
+            elif isinstance(symbols, str) or len(symbols) == 1:
+                frames = {symbols if isinstance(symbols, str) else symbols[0]: raw}
+            else:
+                frames = {}
+            for symbol, df in frames.items():
+                # Tageskerzen ohne Zeitzone -> Börsen-Mitternacht wie bei history(),
+                # sonst liegen im Archiv zwei Schlüssel für denselben Tag
+                try:
+                    tz = self.inner.timezone(symbol)
+                except Exception as e:
+                    print(f"[DATA] Zeitzone für {symbol} unbekannt: {e}")
+                    tz = None
+                self.archive.put_history(symbol, interval, to_exchange_tz(df, tz))
+        return raw
+
+
+class ReplayProvider:
+    """Liefert nur Archiv-Daten; nichts geht ins Netz."""
+    name = "replay"
+
+    def __init__(self, archive=None):
+        self.archive = archive or Archive()
+
+    def info(self, symbol):
+        return self.archive.get_json("info", symbol)
+
+    def news(self, symbol):
+        return self.archive.get_json("news", symbol)
+
+    def history(self, symbol, interval="1d", period=None, start=None, **_):
+        return self.archive.get_history(symbol, interval, period=period, start=start)
+
+    def timezone(self, symbol):
+        return self.archive.timezone(symbol)
+
+    def download(self, symbols, period="1y", interval="1d", **_):
+        symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+        frames = {}
+        for symbol in symbols:
+            try:
+                df = self.archive.get_history(symbol, interval, period=period)
+            except ReplayMissing:
+                continue  # wie yfinance: fehlende Symbole fehlen einfach im Ergebnis
+            if not _is_intraday(interval):
+                df = df.tz_localize(None)  # wie yf.download: Tageskerzen ohne Zeitzone
+            frames[symbol] = df
+        return pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+
+def from_env(mode=None, archive_dir=None):
+    mode = (mode or os.environ.get("VR_DATA_MODE", "live")).lower()
+    archive = Archive(archive_dir or ARCHIVE_DIR)
+    if mode == "record":
+        return RecordingProvider(archive=archive)
+    if mode == "replay":
+        return ReplayProvider(archive=archive)
+    if mode != "live":
+        raise ValueError(f"Unbekannter VR_DATA_MODE '{mode}' (erlaubt: {', '.join(MODES)})")
+    return YahooProvider()
+
+
+# ==============================================================================
+# 2. AKTIVE QUELLE (EINE PRO PROZESS)
+# ==============================================================================
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def provider():
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = from_env()
+    return _provider
+
+
+def use(new):
+    """Quelle für den ganzen Prozess setzen; liefert die bisherige."""
+    global _provider
+    with _provider_lock:
+        old, _provider = _provider, new
+    return old
+
+
+@contextlib.contextmanager
+def using(new):
+    old = use(new)
+    try:
+        yield new
+    finally:
+        use(old)
+
+
+@contextlib.contextmanager
+def isolated(source, store_root=None):
+    """Quelle setzen und einen eigenen, leeren Bar-Store nutzen (Benchmarks, Lasttests)."""
+    import bar_store
+    saved = bar_store.STORE
+    with contextlib.ExitStack() as stack:
+        root = store_root or stack.enter_context(tempfile.TemporaryDirectory(prefix="vr-data-"))
+        bar_store.STORE = bar_store.BarStore(root)
+        try:
+            with using(source):
+                yield source
+        finally:
+            bar_store.STORE = saved
+
+
+UPSTREAM_SECONDS = metrics.REGISTRY.histogram(
+    "valueradar_upstream_duration_seconds", "Dauer der Abrufe bei der Datenquelle", ("kind",))
+UPSTREAM_ERRORS = metrics.REGISTRY.counter(
+    "valueradar_upstream_errors_total", "Fehlgeschlagene Abrufe bei der Datenquelle", ("kind", "category"))
+
+
+def _timed(kind, fn, *args, **kwargs):
+    """Abruf mit Latenz-Histogramm und Fehlerzähler (Kategorie wie fetch_control)."""
+    started = time.perf_counter()
+    try:
+        with profiling.span(f"upstream.{kind}"):
+            return fn(*args, **kwargs)
+    except Exception as e:
+        import fetch_control   # importiert dieses Modul
+        UPSTREAM_ERRORS.inc(kind=kind, category=fetch_control.classify(e))
+        raise
+    finally:
+        UPSTREAM_SECONDS.observe(time.perf_counter() - started, kind=kind)
+
+
+def info(symbol):
+    return _timed("info", provider().info, symbol)
+
+
+def news(symbol):
+    return _timed("news", provider().news, symbol)
+
+
+def history(symbol, interval="1d", **kwargs):
+    """Wie yf.Ticker(symbol).history(interval=..., period=... oder start=...)."""
+    return _timed("history", provider().history, symbol, interval=interval, **kwargs)
+
+
+def download(symbols, **kwargs):
+    """Wie yf.download(symbols, ...)."""
+    return _timed("download", provider().download, symbols, **kwargs)
+
+
+def timezone(symbol):
+    """Zeitzone der Börse (z.B. 'America/New_York') oder None, wenn unbekannt."""
+    try:
+        return provider().timezone(symbol)
+    except Exception as e:
+        print(f"[DATA] Zeitzone für {symbol} unbekannt: {e}")
+        return None
+
+
+def to_exchange_tz(df, tz):
+    """
+    Index in die Börsen-Zeitzone bringen. yf.download liefert Tageskerzen ohne
+    Zeitzone (Datum an der Börse); als UTC gelesen läge jeder Tag neben der
+    history()-Kerze desselben Tages (Börsen-Mitternacht).
+    """
+    if df is None or df.empty or not tz:
+        return df
+    if df.index.tz is None:
+        df = df.tz_localize(tz, ambiguous="NaT", nonexistent="shift_forward")
+        return df[df.index.notna()]
+    return df.tz_convert(tz)
+
+
+# ==============================================================================
+# 3. AUFZEICHNEN & VORWÄRMEN (CLI)
+# ==============================================================================
+
+def record(symbols, kinds=("info", "history", "news"), period="max", intraday=True,
+           archive=None, workers=8):
+    """Archiv für `symbols` live befüllen (für späteres Replay / Deploy-Warmup)."""
+    recorder = RecordingProvider(archive=archive or Archive())
+
+    def grab(symbol):
+        failed = []
+        for kind in kinds:
+            try:
+                if kind == "history":
+                    recorder.history(symbol, interval="1d", period=period)
+                    if intraday:
+                        recorder.history(symbol, interval="5m", period="1mo")
+                else:
+                    getattr(recorder, kind)(symbol)
+            except Exception as e:
+                failed.append(f"{kind}: {e}")
+        return symbol, failed
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for counter, (symbol, failed) in enumerate(executor.map(grab, symbols), 1):
+            if failed:
+                print(f"\n[ARCHIV] {symbol}: {'; '.join(failed)}")
+            print(f"Aufgezeichnet: {counter}/{len(symbols)}...", end="\r")
+    print()
+
+
+def warm(archive=None, store=None, intervals=("1d", "5m")):
+    """Bar-Store einer neuen Instanz aus dem Archiv füllen – ohne Netzwerk."""
+    import bar_store
+    archive = archive or Archive()
+    store = store or bar_store.STORE
+    count = 0
+    for interval in intervals:
+        for symbol in archive.symbols("history", interval):
+            df = archive.get_history(symbol, interval)
+            store.merge(symbol, interval, df, period="max" if interval == "1d" else "1mo")
+            count += 1
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Marktdaten-Archiv (Aufzeichnen / Replay / Warmup)")
+    parser.add_argument("--record", help="Universen aufzeichnen, kommagetrennt (z.B. sp500,dax40)")
+    parser.add_argument("--kinds", default="info,history,news")
+    parser.add_argument("--period", default="max", help="History-Zeitraum beim Aufzeichnen")
+    parser.add_argument("--warm", action="store_true", help="Bar-Store aus dem Archiv füllen")
+    parser.add_argument("--archive", default=ARCHIVE_DIR)
+    args = parser.parse_args()
+
+    archive = Archive(args.archive)
+    if args.record:
+        import universe
+        jobs = universe.load_jobs([u.strip() for u in args.record.split(",") if u.strip()])
+        record([s for s, _ in jobs], kinds=[k.strip() for k in args.kinds.split(",")],
+               period=args.period, archive=archive)
+    if args.warm:
+        print(f"Bar-Store vorgewärmt: {warm(archive)} Reihen")
+    for folder, s in archive.stats().items():
+        print(f"{folder:<20} {s['files']:>6} Dateien {s['bytes'] / 1e6:>8.1f} MB")
@@ -0,0 +1,240 @@
+import os
+import json
+import time
+import bisect
+import threading
+import contextlib
+
+# ==============================================================================
+# METRIKEN IM PROMETHEUS-TEXTFORMAT (für /metrics)
+# ==============================================================================
+# Ohne prometheus_client: Counter und Histogramme leben pro Prozess in REGISTRY,
+# die App rendert sie als Text (Format 0.0.4). Ist Flask, pandas oder Yahoo
+# langsam? -> Route-Latenzen (app.py) neben Upstream-Latenzen (market_data.py).
+#
+# Unter gunicorn hat jeder Worker eine eigene REGISTRY, ein Scrape landet aber
+# nur bei einem. Mit VR_METRICS_DIR schreibt jeder Worker seinen Stand
+# (höchstens alle FLUSH_INTERVAL Sekunden) als <pid>.json in den Ordner, und
+# /metrics summiert alle Dateien. Dateien beendeter Worker zählen weiter mit
+# (Counter bleiben monoton), nur ihre Gauges fallen weg.
+
+METRICS_DIR = os.environ.get("VR_METRICS_DIR")
+FLUSH_INTERVAL = 5.0
+# Sekunden; reicht von Cache-Treffern (ms) bis zu Yahoo-Timeouts
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}   # Label-Werte (Tupel) -> Wert
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def snapshot(self):
+        with self._lock:
+            values = [[list(k), v if not isinstance(v, list) else list(v)] for k, v in self._values.items()]
+        return {"type": self.kind, "help": self.help, "labels": list(self.labelnames), "values": values}
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Histogram(_Metric):
+    """Bucket-Zähler (nicht kumuliert) + Summe + Anzahl je Label-Kombination."""
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            counts[i] += 1          # i == len(buckets) -> nur +Inf
+            counts[-2] += value
+            counts[-1] += 1
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self):
+        snap = super().snapshot()
+        snap["buckets"] = list(self.buckets)
+        return snap
+
+
+class Registry:
+    """Alle Metriken eines Prozesses; Collectors liefern Werte erst beim Scrape."""
+
+    def __init__(self, directory=METRICS_DIR):
+        self.directory = directory
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+        self._flushed_at = 0.0
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def collector(self, fn):
+        """fn() -> [(name, type, help, {labels}, value), ...] ('counter'/'gauge')."""
+        self._collectors.append(fn)
+        return fn
+
+    def snapshot(self):
+        """Stand dieses Prozesses als JSON-fähiges dict (name -> Metrik)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        snap = {m.name: m.snapshot() for m in metrics}
+        for fn in self._collectors:
+            try:
+                samples = list(fn())
+            except Exception as e:
+                print(f"[METRICS] Collector {getattr(fn, '__name__', fn)} fehlgeschlagen: {e}")
+                continue
+            for name, kind, help, labels, value in samples:
+                entry = snap.setdefault(name, {"type": kind, "help": help,
+                                               "labels": sorted(labels), "values": []})
+                entry["values"].append([[str(labels[n]) for n in entry["labels"]], value])
+        return snap
+
+    # ------------------------------------------------------------------
+    # Mehrere Worker (VR_METRICS_DIR)
+    # ------------------------------------------------------------------
+
+    def flush(self, force=False):
+        """Eigenen Stand in den gemeinsamen Ordner schreiben (gedrosselt)."""
+        if not self.directory:
+            return
+        now = time.time()
+        if not force and now - self._flushed_at < FLUSH_INTERVAL:
+            return
+        self._flushed_at = now
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    def collect(self):
+        """Stand für einen Scrape: dieser Prozess oder die Summe aller Worker."""
+        if not self.directory:
+            return self.snapshot()
+        self.flush(force=True)
+        merged = {}
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+                    snap = json.load(f)
+            except (OSError, ValueError):
+                continue
+            alive = _alive(int(filename[:-5])) if filename[:-5].isdigit() else False
+            merge(merged, snap, gauges=alive)
+        return merged
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True   # existiert, gehört aber einem anderen Nutzer
+    return True
+
+
+def merge(target, snap, gauges=True):
+    """Werte aus `snap` in `target` aufsummieren (Histogramme bucketweise)."""
+    for name, metric in snap.items():
+        if metric["type"] == "gauge" and not gauges:
+            continue
+        entry = target.setdefault(name, {**metric, "values": []})
+        index = {tuple(k): i for i, (k, _) in enumerate(entry["values"])}
+        for labels, value in metric["values"]:
+            i = index.get(tuple(labels))
+            if i is None:
+                index[tuple(labels)] = len(entry["values"])
+                entry["values"].append([labels, list(value) if isinstance(value, list) else value])
+            elif isinstance(value, list):
+                entry["values"][i][1] = [a + b for a, b in zip(entry["values"][i][1], value)]
+            else:
+                entry["values"][i][1] += value
+    return target
+
+
+# ==============================================================================
+# TEXTFORMAT
+# ==============================================================================
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(snap):
+    """dict aus snapshot()/collect() -> Prometheus-Text."""
+    lines = []
+    for name in sorted(snap):
+        metric = snap[name]
+        names = metric["labels"]
+        lines.append(f"# HELP {name} {_escape(metric['help'])}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for labels, value in sorted(metric["values"], key=lambda v: v[0]):
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, labels)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(metric["buckets"] + [float("inf")], value):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(names, labels, ('le', _number(float(bound))))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, labels)} {_number(float(value[-2]))}")
+            lines.append(f"{name}_count{_labels(names, labels)} {value[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+# Gemeinsame Instanz für app.py, market_data.py & Co.
+REGISTRY = Registry()
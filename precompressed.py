@@ -0,0 +1,67 @@
+import gzip
+import json
+import hashlib
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:  # steht in requirements.txt; fehlt es trotzdem, gibt es nur gzip
+    brotli = None
+
+# ==============================================================================
+# VORSERIALISIERTE, VORKOMPRIMIERTE JSON-ANTWORTEN MIT ETAG
+# ==============================================================================
+# Für Daten, die sich nur selten ändern (Scan-Ergebnisse): JSON wird einmal
+# gebaut und als identity/gzip/br-Bytes abgelegt. Pro Request bleibt nur die
+# Auswahl der Kodierung und ggf. ein 304 Not Modified.
+
+MIN_COMPRESS_BYTES = 512   # kleinere Antworten lohnen das Komprimieren nicht
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5         # 9+ kostet ein Vielfaches an CPU für wenige Prozent Größe
+PREFERRED_ENCODINGS = ("br", "gzip", "identity")
+
+
+class EncodedPayload:
+    """
+    JSON-Body in allen verfügbaren Kodierungen plus ETag (Inhalt + Header).
+    compress: welche Kodierungen vorab gebaut werden – für Einzelabfragen, die
+    nicht gecacht werden, reicht das billige gzip.
+    """
+
+    def __init__(self, data, headers=None, compress=("gzip", "br")):
+        self.headers = dict(headers or {})
+        self.body = json.dumps(data, separators=(",", ":"), ensure_ascii=False,
+                               default=str).encode("utf-8")
+        digest = hashlib.sha1(self.body)
+        digest.update(json.dumps(self.headers, sort_keys=True).encode("utf-8"))
+        self.etag = digest.hexdigest()[:20]
+        self.encodings = {"identity": self.body}
+        if len(self.body) >= MIN_COMPRESS_BYTES:
+            if "gzip" in compress:
+                self.encodings["gzip"] = gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0)
+            if "br" in compress and brotli is not None:
+                self.encodings["br"] = brotli.compress(self.body, quality=BROTLI_QUALITY)
+
+    def _etag(self, encoding):
+        # Jede Kodierung ist eine eigene Repräsentation -> eigener (starker) ETag
+        return self.etag if encoding == "identity" else f"{self.etag}-{encoding}"
+
+    def response(self, req):
+        """Flask-Response für `req`: 304, wenn der Client eine der Varianten schon hat."""
+        offered = [e for e in PREFERRED_ENCODINGS if e in self.encodings]
+        encoding = req.accept_encodings.best_match(offered, default="identity")
+        etag = self._etag(encoding)
+
+        if any(req.if_none_match.contains_weak(self._etag(e)) for e in self.encodings):
+            resp = Response(status=304)
+        else:
+            resp = Response(self.encodings[encoding], mimetype="application/json")
+            if encoding != "identity":
+                resp.headers["Content-Encoding"] = encoding
+        resp.set_etag(etag)
+        resp.headers["Vary"] = "Accept-Encoding"
+        # Immer beim Server nachfragen (Login-Daten), dank ETag meist nur ein 304
+        resp.headers["Cache-Control"] = "private, no-cache"
+        resp.headers.update(self.headers)
+        return resp
@@ -0,0 +1,224 @@
+import os
+import sys
+import time
+import random
+import itertools
+import threading
+import contextlib
+from collections import Counter, deque
+
+# ==============================================================================
+# PROFILING EINZELNER REQUESTS (OPT-IN, OHNE REDEPLOY)
+# ==============================================================================
+# Ein Request wird profiliert, wenn ein Admin ?profile=1 anhängt oder er in die
+# Stichprobe VR_PROFILE_SAMPLE_RATE (0..1, Standard 0 = aus) fällt. Dann:
+#
+# - Spans: span("upstream.info") & Co. messen Abschnitte – auch in den
+#   Upstream-Threads, wenn die Aufgabe mit bind() übergeben wurde.
+# - Stack-Stichproben: ein Hilfs-Thread liest alle SAMPLE_INTERVAL Sekunden
+#   sys._current_frames() der beteiligten Threads und zählt die Stacks
+#   (Collapsed-Format für flamegraph.pl / speedscope).
+#
+# Behalten werden Requests per ?profile=1 immer, Stichproben nur ab SLOW_MS.
+# Die letzten BUFFER_SIZE Profile liegen im Ringpuffer dieses Prozesses
+# (unter gunicorn also je Worker).
+
+SAMPLE_RATE = float(os.environ.get("VR_PROFILE_SAMPLE_RATE", "0"))
+SLOW_MS = float(os.environ.get("VR_PROFILE_SLOW_MS", "1000"))
+SAMPLE_INTERVAL = float(os.environ.get("VR_PROFILE_INTERVAL_MS", "5")) / 1000
+BUFFER_SIZE = 100
+MAX_DEPTH = 64          # tiefere Stacks werden oben abgeschnitten
+TOP_STACKS = 25
+
+_local = threading.local()
+_ids = itertools.count(1)
+_buffer = deque(maxlen=BUFFER_SIZE)
+_buffer_lock = threading.Lock()
+
+
+class Trace:
+    """Spans und Stack-Stichproben eines Requests (aus mehreren Threads befüllt)."""
+
+    def __init__(self, label, forced=False):
+        self.label = label
+        self.forced = forced
+        self.started = time.perf_counter()
+        self.wall = time.time()
+        self.spans = []
+        self.threads = Counter()    # Thread-ID -> aktive bind()-Aufrufe
+        self.samples = Counter()    # Collapsed-Stack -> Anzahl
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def add_span(self, name, started, seconds):
+        with self.lock:
+            self.spans.append({
+                "name": name,
+                "start_ms": round((started - self.started) * 1000, 2),
+                "ms": round(seconds * 1000, 2),
+                "thread": threading.current_thread().name,
+            })
+
+    # ------------------------------------------------------------------
+    # Stack-Stichproben
+    # ------------------------------------------------------------------
+
+    def start_sampling(self):
+        self._sampler = threading.Thread(target=self._sample_loop, name="profile-sampler", daemon=True)
+        self._sampler.start()
+
+    def stop_sampling(self):
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def _sample_loop(self):
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            frames = sys._current_frames()
+            with self.lock:
+                threads = [tid for tid, active in self.threads.items() if active]
+            stacks = [_collapse(frames[tid]) for tid in threads if tid in frames]
+            with self.lock:
+                self.samples.update(stacks)
+
+    # ------------------------------------------------------------------
+    # Ergebnis
+    # ------------------------------------------------------------------
+
+    def result(self, status, ms):
+        with self.lock:
+            spans = sorted(self.spans, key=lambda s: s["start_ms"])
+            samples = dict(self.samples)
+        totals = {}
+        for s in spans:
+            entry = totals.setdefault(s["name"], {"name": s["name"], "count": 0, "ms": 0.0})
+            entry["count"] += 1
+            entry["ms"] = round(entry["ms"] + s["ms"], 2)
+        return {
+            "label": self.label,
+            "time": self.wall,
+            "status": status,
+            "ms": round(ms, 2),
+            "reason": "flag" if self.forced else "sample",
+            "summary": sorted(totals.values(), key=lambda t: -t["ms"]),
+            "spans": spans,
+            "samples": sum(samples.values()),
+            "sample_interval_ms": SAMPLE_INTERVAL * 1000,
+            "stacks": samples,
+        }
+
+
+def _collapse(frame):
+    """Frame -> 'modul:funktion;modul:funktion;...' (äußerster Aufruf zuerst)."""
+    names = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        code = frame.f_code
+        names.append(f"{os.path.splitext(os.path.basename(code.co_filename))[0]}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+# ==============================================================================
+# API FÜR APP & MODULE
+# ==============================================================================
+
+def current():
+    return getattr(_local, "trace", None)
+
+
+def should_sample():
+    return SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE
+
+
+@contextlib.contextmanager
+def span(name):
+    """Abschnitt messen, falls der Thread gerade zu einem profilierten Request gehört."""
+    trace = current()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_span(name, started, time.perf_counter() - started)
+
+
+def _enter(trace):
+    previous = current()
+    _local.trace = trace
+    with trace.lock:
+        trace.threads[threading.get_ident()] += 1
+    return previous
+
+
+def _leave(trace, previous):
+    with trace.lock:
+        trace.threads[threading.get_ident()] -= 1
+    _local.trace = previous
+
+
+def bind(fn):
+    """fn für einen anderen Thread (Pool) an den aktuellen Trace hängen; ohne Trace unverändert."""
+    trace = current()
+    if trace is None:
+        return fn
+
+    def run(*args, **kwargs):
+        previous = _enter(trace)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _leave(trace, previous)
+    return run
+
+
+def start(label, forced=False):
+    """Profiling für den aktuellen Thread (Request) beginnen."""
+    trace = Trace(label, forced)
+    _enter(trace)
+    trace.start_sampling()
+    return trace
+
+
+def finish(trace, status=None):
+    """Beenden; Profil-ID, wenn es im Ringpuffer gelandet ist, sonst None."""
+    trace.stop_sampling()
+    _leave(trace, None)
+    ms = (time.perf_counter() - trace.started) * 1000
+    if not trace.forced and ms < SLOW_MS:
+        return None
+    profile = trace.result(status, ms)
+    with _buffer_lock:
+        profile["id"] = next(_ids)
+        _buffer.append(profile)
+    return profile["id"]
+
+
+def recent():
+    """Übersicht der gespeicherten Profile, neueste zuerst (ohne Spans und Stacks)."""
+    with _buffer_lock:
+        profiles = list(_buffer)
+    return [{k: p[k] for k in ("id", "label", "time", "status", "ms", "reason", "samples")}
+            | {"top": p["summary"][:3]} for p in reversed(profiles)]
+
+
+def get(profile_id, top=TOP_STACKS):
+    """Ein Profil mit Spans und den häufigsten Stacks (top=None: alle)."""
+    with _buffer_lock:
+        profile = next((p for p in _buffer if p["id"] == profile_id), None)
+    if profile is None:
+        return None
+    stacks = sorted(profile["stacks"].items(), key=lambda s: -s[1])
+    return {**profile, "stacks": [{"stack": s, "count": n} for s, n in stacks[:top]]}
+
+
+def collapsed(profile_id):
+    """Alle Stacks im Collapsed-Format ('a;b;c 12' pro Zeile) oder None."""
+    with _buffer_lock:
+        profile = next((p for p in _buffer if p["id"] == profile_id), None)
+    if profile is None:
+        return None
+    return "".join(f"{stack} {count}\n" for stack, count in
+                   sorted(profile["stacks"].items(), key=lambda s: -s[1]))
@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import contextlib
+import concurrent.futures
+
+# ==============================================================================
+# CHECKPOINTS FÜR LANGE SCANS (--resume)
+# ==============================================================================
+# Jeder fertig bewertete Symbol wird sofort als eine JSON-Zeile angehängt
+# ({"symbol": ..., "hit": Treffer oder null}). Bricht ein Lauf ab (Netzwerk,
+# Strg+C, Neustart), setzt `--resume` dort fort: erledigte Symbole werden
+# übersprungen, ihre Treffer übernommen. Nach einem vollständigen Lauf wird
+# der Checkpoint gelöscht.
+#
+# Symbole, deren Abruf endgültig fehlgeschlagen ist (fetch_control), werden
+# nicht als erledigt markiert – ein Resume versucht sie erneut.
+#
+# Die erste Zeile hält fest, für welches Universum (Hash der Symbolliste) und
+# wann der Lauf begonnen wurde. Passt das Universum nicht mehr oder ist der
+# Checkpoint älter als MAX_AGE, beginnt --resume neu – sonst kämen Tage alte
+# Treffer in die Liste und Symbole mit neuen Kursen würden übersprungen.
+#
+# Die Scans laufen in worker_pool(): bei Strg+C werden noch wartende Symbole
+# verworfen statt abgearbeitet – sonst liefe der Scan nach dem Abbruch zu Ende,
+# ohne dass die Ergebnisse noch im Checkpoint landen.
+
+CHECKPOINT_DIR = os.environ.get("VR_CHECKPOINT_DIR", "scan_checkpoints")
+MAX_AGE = float(os.environ.get("VR_CHECKPOINT_MAX_AGE_HOURS", "24")) * 3600
+
+
+@contextlib.contextmanager
+def worker_pool(max_workers):
+    """
+    ThreadPoolExecutor, der bei einem Abbruch (KeyboardInterrupt, Fehler) nicht
+    auf die restlichen Aufgaben wartet, sondern sie verwirft. Symbole, die gerade
+    laufen, werden noch fertig, aber nicht mehr markiert (--resume holt sie nach).
+    """
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        yield executor
+    except BaseException:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+
+
+def universe_hash(jobs):
+    """Fingerabdruck der Symbolliste, unabhängig von der Reihenfolge."""
+    digest = hashlib.sha1()
+    for item in sorted(str(job) for job in jobs):
+        digest.update(item.encode("utf-8") + b"\n")
+    return digest.hexdigest()[:16]
+
+
+def _jsonable(obj):
+    # numpy-Skalare aus pandas-Zeilen
+    return obj.item() if hasattr(obj, "item") else str(obj)
+
+
+class ScanCheckpoint:
+    """
+    Append-only Fortschritt eines Scans (eine Datei pro Scan-Name).
+    jobs: das Universum des Laufs; ein Resume gilt nur für dasselbe Universum.
+    """
+
+    def __init__(self, name, resume=False, root=CHECKPOINT_DIR, jobs=()):
+        self.name = name
+        self.path = os.path.join(root, f"{name}.jsonl")
+        self.universe = universe_hash(jobs)
+        self.created = time.time()
+        self.done = {}   # Symbol -> Treffer (dict) oder None
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        resumed = resume and self._load()
+        self._file = open(self.path, "a" if resumed else "w", encoding="utf-8")
+        if not resumed:
+            self._file.write(json.dumps({"universe": self.universe, "created": self.created}) + "\n")
+            self._file.flush()
+
+    def _load(self):
+        """Vorherigen Lauf einlesen; False, wenn es keinen passenden gibt (-> neu beginnen)."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                try:
+                    header = json.loads(f.readline())
+                except ValueError:
+                    header = {}
+                if header.get("universe") != self.universe:
+                    print(f"[CHECKPOINT] {self.name}: anderes Universum als beim Abbruch – beginne neu.")
+                    return False
+                age = time.time() - header.get("created", 0)
+                if age > MAX_AGE:
+                    print(f"[CHECKPOINT] {self.name}: {age / 3600:.0f}h alt – beginne neu.")
+                    return False
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # letzte Zeile beim Abbruch nur halb geschrieben
+                    self.done[entry["symbol"]] = entry.get("hit")
+        except OSError:
+            return False
+        self.created = header["created"]
+        return True
+
+    def pending(self, jobs):
+        """Noch offene (Symbol, Region)-Jobs."""
+        return [job for job in jobs if job[0] not in self.done]
+
+    def hits(self):
+        """Treffer aus dem vorherigen (abgebrochenen) Lauf."""
+        return [hit for hit in self.done.values() if hit]
+
+    def mark(self, symbol, hit=None):
+        line = json.dumps({"symbol": symbol, "hit": hit}, default=_jsonable)
+        with self._lock:
+            if self._file.closed:
+                return  # nach einem Abbruch noch laufende Worker
+            self.done[symbol] = hit
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def finish(self):
+        """Lauf vollständig (Ergebnisse sind gespeichert) -> Checkpoint entfernen."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def __len__(self):
+        return len(self.done)
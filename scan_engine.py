@@ -0,0 +1,286 @@
+import abc
+import time
+import argparse
+import concurrent.futures
+from collections import Counter
+
+import bar_store
+import breakout_scan
+import fetch_control
+import market_data
+import webfinance
+import scan_checkpoint
+import scan_feed
+import scan_output
+
+# ==============================================================================
+# GEMEINSAMER SCAN FÜR ALLE STRATEGIEN
+# ==============================================================================
+# Ein Lauf statt webfinance.py und breakout_scan.py nacheinander: die Universen
+# werden zusammengeführt (Dubletten nur einmal), es gibt einen Fetcher, einen
+# Fehlerbericht und einen Checkpoint für alle Strategien.
+#
+# Abrufe spart das kaum: Value braucht nur ticker.info, Breakout nur die
+# History – ein kombinierter Lauf kostet info plus History für die Vereinigung
+# der Universen, also etwa so viel wie beide Skripte einzeln. Eingespart werden
+# nur die doppelt gelisteten Symbole. Erst wenn zwei Strategien dieselbe
+# Datenart brauchen, lädt SymbolData sie trotzdem nur einmal.
+#
+# Strategien sind Plug-ins: sie geben an, welche Daten sie brauchen (`needs`),
+# und bewerten ein Symbol allein aus diesen Daten. Die Daten werden erst beim
+# ersten Zugriff geladen – eine Strategie, die früh aussteigt, spart den Abruf.
+
+MAX_WORKERS = 20
+DEFAULT_STRATEGIES = ("breakout", "value")
+
+
+def _load_info(symbol):
+    return market_data.info(symbol) or {}
+
+
+def _load_history(symbol):
+    # Wie breakout_scan.analyze_stock_gqbm: 1 Jahr Tageskerzen aus dem Bar-Store
+    return bar_store.get_history(symbol, period="1y", strict=True)
+
+
+# Datenart -> Loader(symbol)
+DATA_LOADERS = {
+    "info": _load_info,
+    "history": _load_history,
+}
+
+
+class SymbolData:
+    """
+    Daten eines Symbols; jede Datenart wird beim ersten get() genau einmal geladen
+    (über den Fetcher: adaptives Limit, Retries, Fehlerbericht).
+    """
+
+    def __init__(self, symbol, fetcher, loaders=DATA_LOADERS):
+        self.symbol = symbol
+        self._fetcher = fetcher
+        self._loaders = loaders
+        self._values = {}
+        self.errors = {}
+
+    def get(self, kind):
+        if kind not in self._values:
+            loader = self._loaders[kind]
+            try:
+                self._values[kind] = self._fetcher.call(kind, self.symbol, lambda: loader(self.symbol))
+            except fetch_control.FetchFailed as e:
+                self._values[kind] = None
+                self.errors[kind] = str(e.error)
+        return self._values[kind]
+
+    def fetched(self):
+        return list(self._values)
+
+
+class Strategy(abc.ABC):
+    """Basis für Scan-Strategien."""
+    name = None
+    needs = ()      # Datenarten aus DATA_LOADERS
+    output = None   # CSV-Export
+
+    @abc.abstractmethod
+    def universe(self):
+        """Liste von (Symbol, Region)."""
+
+    @abc.abstractmethod
+    def evaluate(self, symbol, region, data):
+        """Treffer-Zeile (dict) oder None."""
+
+    def print_hit(self, hit):
+        print(hit)
+
+    @abc.abstractmethod
+    def save(self, results):
+        """Treffer speichern (CSV)."""
+
+
+class ValueStrategy(Strategy):
+    """Value-Screen aus webfinance.py (ticker.info)."""
+    name = "value"
+    needs = ("info",)
+    output = webfinance.OUTPUT_FILE
+
+    def universe(self):
+        return webfinance.load_universe()
+
+    def evaluate(self, symbol, region, data):
+        # Kein Trend-Vorfilter auf der History: das Ergebnis muss dem von
+        # webfinance.py entsprechen, und dessen Regel steht in evaluate_info()
+        info = data.get("info")
+        if not info:
+            return None
+        return webfinance.evaluate_info(symbol, region, info)
+
+    def print_hit(self, hit):
+        webfinance.print_hit(hit)
+
+    def save(self, results):
+        webfinance.save_results(results, self.output)
+
+
+class BreakoutStrategy(Strategy):
+    """GQBM-Breakout aus breakout_scan.py (Tages-History)."""
+    name = "breakout"
+    needs = ("history",)
+    output = breakout_scan.OUTPUT_FILE
+
+    def universe(self):
+        return breakout_scan.load_universe()
+
+    def evaluate(self, symbol, region, data):
+        return breakout_scan.evaluate_history(symbol, region, data.get("history"))
+
+    def print_hit(self, hit):
+        breakout_scan.print_hit(hit)
+
+    def save(self, results):
+        breakout_scan.save_results(results, self.output)
+
+
+STRATEGIES = {
+    "value": ValueStrategy,
+    "breakout": BreakoutStrategy,
+}
+
+
+def build_plan(strategies):
+    """
+    Universen aller Strategien zusammenführen: {Symbol: [(Strategie, Region), ...]}
+    plus die Anzahl Symbole pro Strategie.
+    """
+    plan = {}
+    sizes = {}
+    for strategy in strategies:
+        missing = set(strategy.needs) - set(DATA_LOADERS)
+        if missing:
+            raise ValueError(f"Strategie {strategy.name}: keine Loader für {sorted(missing)}")
+        jobs = strategy.universe()
+        sizes[strategy.name] = len(jobs)
+        for symbol, region in jobs:
+            plan.setdefault(symbol, []).append((strategy, region))
+    return plan, sizes
+
+
+def scan_symbol(symbol, assignments, fetcher, loaders=DATA_LOADERS):
+    """Alle Strategien für ein Symbol; liefert ([(Strategie, Treffer)], geladene Datenarten)."""
+    data = SymbolData(symbol, fetcher, loaders)
+    hits = []
+    for strategy, region in assignments:
+        try:
+            hit = strategy.evaluate(symbol, region, data)
+        except Exception as e:
+            print(f"[ENGINE] {strategy.name}/{symbol}: {e}")
+            hit = None
+        if hit:
+            hits.append((strategy, hit))
+    return hits, data.fetched()
+
+
+def run_engine(plan, fetcher, max_workers=MAX_WORKERS, loaders=DATA_LOADERS, checkpoint=None,
+               feeds=None):
+    """
+    Alle Symbole parallel scannen; liefert ({Strategie: [Treffer]}, Abrufe pro Datenart).
+    max_workers ist nur die Obergrenze, wie viele Abrufe gleichzeitig laufen, regelt der Fetcher.
+    checkpoint: erledigte Symbole mit {Strategie: Treffer} festhalten (--resume).
+    feeds: {Strategie: scan_feed.ScanFeed} für Live-Treffer im Dashboard.
+    """
+    results = {}
+    fetches = Counter()
+    with scan_checkpoint.worker_pool(max_workers) as executor:
+        futures = {executor.submit(scan_symbol, symbol, assignments, fetcher, loaders): symbol
+                   for symbol, assignments in plan.items()}
+        total = len(futures)
+        for counter, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            print(f"Fortschritt: {counter}/{total} checked...", end="\r")
+            hits, fetched = future.result()
+            fetches.update(fetched)
+            symbol = futures[future]
+            by_strategy = {strategy.name: hit for strategy, hit in hits}
+            if checkpoint is not None and not fetcher.has_failed(symbol):
+                checkpoint.mark(symbol, by_strategy or None)
+            for strategy, _ in plan[symbol] if feeds else ():
+                feeds[strategy.name].advance(by_strategy.get(strategy.name))
+            for strategy, hit in hits:
+                results.setdefault(strategy.name, []).append(hit)
+                strategy.print_hit(hit)
+    return results, fetches
+
+
+def run_scan(strategies=DEFAULT_STRATEGIES, max_workers=MAX_WORKERS, resume=False):
+    """
+    Kompletter Scan aller Strategien inkl. Speichern – wird auch vom Scheduler aufgerufen.
+    resume=True: abgebrochenen Lauf fortsetzen (scan_checkpoint.py).
+    """
+    start = time.time()
+    selected = [STRATEGIES[name]() for name in strategies]
+    plan, sizes = build_plan(selected)
+
+    checkpoint = scan_checkpoint.ScanCheckpoint("engine-" + "-".join(s.name for s in selected), resume=resume,
+                                                jobs=plan)
+    todo = {symbol: assignments for symbol, assignments in plan.items() if symbol not in checkpoint.done}
+    if resume:
+        print(f"Fortsetzen: {len(plan) - len(todo)} Symbole schon erledigt.")
+
+    print(f"\nStarte Scan ({', '.join(s.name for s in selected)}) für {len(todo)} Symbole...")
+    print("=" * 80)
+    fetcher = fetch_control.Fetcher(max_workers=max_workers)
+
+    # Live-Feed pro Strategie; beim Resume zählen erledigte Symbole gleich mit
+    finished = {symbol: checkpoint.done[symbol] or {} for symbol in plan if symbol not in todo}
+    done = Counter(strategy.name for symbol in finished for strategy, _ in plan[symbol])
+    feeds = {s.name: scan_feed.ScanFeed(s.name, total=sizes[s.name], done=done[s.name]) for s in selected}
+    for hits in finished.values():
+        for name, hit in hits.items():
+            feeds[name].hit(hit)
+    try:
+        results, fetches = run_engine(todo, fetcher, max_workers=max_workers, checkpoint=checkpoint,
+                                      feeds=feeds)
+    except BaseException:
+        checkpoint.close()
+        for feed in feeds.values():
+            feed.close()
+        print(f"\nAbgebrochen – {len(checkpoint)} Symbole gesichert, weiter mit --resume.")
+        raise
+    for hits in finished.values():
+        for name, hit in hits.items():
+            results.setdefault(name, []).append(hit)
+    fetcher.print_report()
+    fetcher.write_report()
+
+    for strategy in selected:
+        hits = results.get(strategy.name, [])
+        strategy.save(hits)
+        scan_output.record_history(strategy.name, hits, started_at=start, symbols=sizes[strategy.name])
+        feeds[strategy.name].finish()
+
+    if fetcher.summary()["failed"]:
+        checkpoint.close()  # fehlgeschlagene Symbole kann --resume nachholen
+    else:
+        checkpoint.finish()
+
+    seconds = round(time.time() - start, 1)
+    print(f"Abrufe: {dict(fetches)} | Dauer: {round(seconds / 60, 1)} Minuten")
+    return {
+        "symbols": len(plan),
+        "hits": {s.name: len(results.get(s.name, [])) for s in selected},
+        "fetches": dict(fetches),
+        "fetch": fetcher.summary(),
+        "seconds": seconds,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alle Scans in einem Durchlauf")
+    parser.add_argument("--strategies", default=",".join(DEFAULT_STRATEGIES),
+                        help=f"Kommagetrennt, verfügbar: {', '.join(STRATEGIES)}")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--resume", action="store_true",
+                        help="Abgebrochenen Scan fortsetzen (erledigte Symbole überspringen)")
+    args = parser.parse_args()
+    run_scan([s.strip() for s in args.strategies.split(",") if s.strip()], max_workers=args.workers,
+             resume=args.resume)
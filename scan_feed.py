@@ -0,0 +1,201 @@
+import os
+import json
+import time
+import threading
+
+# ==============================================================================
+# LIVE-FEED LAUFENDER SCANS (für /api/stocks/stream)
+# ==============================================================================
+# Die CSV entsteht erst, wenn der ganze Scan fertig ist. Damit das Dashboard
+# die ersten Treffer schon nach Sekunden sieht, hängen die Scanner jedes
+# Ereignis als JSON-Zeile an eine Datei pro Strategie an:
+#
+#   {"event": "start",    "total": 612, "time": ...}
+#   {"event": "hit",      "hit": {...Treffer-Zeile wie in der CSV...}}
+#   {"event": "progress", "counter": 120, "total": 612}
+#   {"event": "done",     "hits": 17, "seconds": 95.3}
+#
+# Die App liest die Datei mit follow() ab einem Byte-Offset weiter (der Scan
+# läuft in einem anderen Prozess). Jeder Lauf beginnt eine neue Datei (neue
+# Inode) – Leser erkennen daran, dass sie von vorne anfangen müssen.
+
+FEED_DIR = os.environ.get("VR_FEED_DIR", "scan_feed")
+PROGRESS_INTERVAL = 0.5  # Sekunden zwischen zwei Fortschritts-Zeilen
+POLL_INTERVAL = 0.5
+STALE_SECONDS = 600      # so lange ohne neue Zeile gilt ein Lauf ohne "done" als abgebrochen
+
+
+def _jsonable(obj):
+    # numpy-Skalare aus pandas-Zeilen
+    return obj.item() if hasattr(obj, "item") else str(obj)
+
+
+def feed_path(name, root=FEED_DIR):
+    return os.path.join(root, f"{name}.jsonl")
+
+
+class ScanFeed:
+    """Schreibt Treffer und Fortschritt eines laufenden Scans (thread-sicher)."""
+
+    def __init__(self, name, total, root=FEED_DIR, done=0):
+        self.path = feed_path(name, root)
+        self.total = total
+        self.counter = done     # beim Resume schon erledigte Symbole
+        self.hits = 0
+        self.started = time.time()
+        self._last_progress = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        # Neue Datei per Rename -> neue Inode, laufende Leser merken den Wechsel
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self._line({"event": "start", "total": total, "done": done, "time": self.started}))
+        os.replace(tmp, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    @staticmethod
+    def _line(event):
+        return json.dumps(event, default=_jsonable) + "\n"
+
+    def _write(self, event):
+        if not self._file.closed:
+            self._file.write(self._line(event))
+            self._file.flush()
+
+    def hit(self, res):
+        with self._lock:
+            self.hits += 1
+            self._write({"event": "hit", "hit": res})
+
+    def advance(self, res=None, count=1):
+        """count Symbole erledigt (res: Treffer oder None); Fortschritt gedrosselt."""
+        if res:
+            self.hit(res)
+        with self._lock:
+            self.counter += count
+            now = time.time()
+            if now - self._last_progress >= PROGRESS_INTERVAL or self.counter >= self.total:
+                self._last_progress = now
+                self._write({"event": "progress", "counter": self.counter, "total": self.total})
+
+    def finish(self):
+        """Nach dem Speichern der CSV: Leser dürfen die fertige Liste laden."""
+        with self._lock:
+            self._write({"event": "done", "hits": self.hits,
+                         "seconds": round(time.time() - self.started, 1)})
+            self._file.close()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+# ==============================================================================
+# LESEN (App)
+# ==============================================================================
+
+def _read_events(f):
+    """Vollständige Zeilen ab der aktuellen Position; halbe Zeilen bleiben liegen."""
+    events = []
+    while True:
+        pos = f.tell()
+        line = f.readline()
+        if not line.endswith("\n"):
+            f.seek(pos)
+            return events
+        try:
+            events.append((f.tell(), json.loads(line)))
+        except ValueError:
+            continue
+
+
+def cursor(name, root=FEED_DIR):
+    """
+    Startpunkt für einen neuen Leser: läuft gerade ein Scan, alles ab Beginn
+    (bisherige Treffer nachliefern), ist er fertig, nur noch Neues.
+    """
+    try:
+        with open(feed_path(name, root), "r", encoding="utf-8") as f:
+            inode = os.fstat(f.fileno()).st_ino
+            events = _read_events(f)
+    except OSError:
+        return None, 0
+    if events and events[-1][1]["event"] == "done":
+        return inode, events[-1][0]
+    return inode, 0
+
+
+def last_run(name, root=FEED_DIR):
+    """
+    Zusammenfassung des letzten Laufs: Symbole gesamt/erledigt, Treffer, Laufzeit,
+    fertig ja/nein, läuft noch ja/nein. None, wenn es noch keinen Feed gibt.
+    """
+    try:
+        with open(feed_path(name, root), "r", encoding="utf-8") as f:
+            updated = os.fstat(f.fileno()).st_mtime
+            events = [event for _, event in _read_events(f)]
+    except OSError:
+        return None
+    if not events or events[0]["event"] != "start":
+        return None
+    start = events[0]
+    run = {"total": start["total"], "resumed": start.get("done", 0), "counter": start.get("done", 0),
+           "hits": 0, "started": start["time"], "seconds": time.time() - start["time"], "done": False}
+    for event in events[1:]:
+        if event["event"] == "hit":
+            run["hits"] += 1
+        elif event["event"] == "progress":
+            run["counter"] = event["counter"]
+        elif event["event"] == "done":
+            run.update(done=True, hits=event["hits"], seconds=event["seconds"])
+    # Abgestürzte Scans schreiben kein "done" -> nach STALE_SECONDS Stille nicht mehr "läuft"
+    run["running"] = not run["done"] and time.time() - updated < STALE_SECONDS
+    return run
+
+
+def is_running(name, root=FEED_DIR):
+    run = last_run(name, root)
+    return bool(run and run["running"])
+
+
+def names(root=FEED_DIR):
+    """Strategien, für die es einen Feed gibt."""
+    try:
+        return sorted(f[:-len(".jsonl")] for f in os.listdir(root) if f.endswith(".jsonl"))
+    except OSError:
+        return []
+
+
+def follow(name, inode=None, offset=0, root=FEED_DIR, poll=POLL_INTERVAL, timeout=None):
+    """
+    Ereignisse ab (inode, offset) verfolgen. Liefert (inode, offset, event) – mit
+    event=None nach jeder leeren Runde, damit der Aufrufer Heartbeats senden kann.
+    Beginnt ein neuer Lauf, geht es bei dessen Anfang weiter.
+    """
+    path = feed_path(name, root)
+    deadline = None if timeout is None else time.time() + timeout
+    f = None
+    try:
+        while deadline is None or time.time() < deadline:
+            try:
+                current = os.stat(path).st_ino
+            except OSError:
+                current = None
+            if current is not None and (f is None or current != inode):
+                if f is not None:
+                    f.close()
+                f = open(path, "r", encoding="utf-8")
+                if current != inode:
+                    offset = 0
+                inode = os.fstat(f.fileno()).st_ino
+                f.seek(offset)
+            events = _read_events(f) if f is not None else []
+            for offset, event in events:
+                yield inode, offset, event
+            if not events:
+                yield inode, offset, None
+                time.sleep(poll)
+    finally:
+        if f is not None:
+            f.close()
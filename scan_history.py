@@ -0,0 +1,238 @@
+import os
+import json
+import math
+import time
+import sqlite3
+import argparse
+import threading
+
+import pandas as pd
+
+# ==============================================================================
+# SCAN-HISTORIE (SQLITE)
+# ==============================================================================
+# Jeder Scan-Lauf wird mit allen Treffern angehängt statt die letzte CSV zu
+# überschreiben. WAL-Modus: die App liest, während ein Scanner schreibt.
+# Die CSVs bleiben als Export für die App (global_watchlist.csv) erhalten.
+#
+#   scans:   ein Eintrag pro Lauf (Strategie, Zeitpunkt, Anzahl Symbole/Treffer)
+#   results: ein Eintrag pro Treffer; die komplette Zeile steht als JSON in `data`
+
+DB_PATH = os.environ.get("VR_SCAN_DB", "scan_history.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    scan_id     INTEGER PRIMARY KEY AUTOINCREMENT,
+    strategy    TEXT NOT NULL,
+    started_at  REAL,
+    finished_at REAL NOT NULL,
+    symbols     INTEGER,
+    hits        INTEGER
+);
+CREATE TABLE IF NOT EXISTS results (
+    scan_id  INTEGER NOT NULL REFERENCES scans(scan_id),
+    strategy TEXT NOT NULL,
+    symbol   TEXT NOT NULL,
+    region   TEXT,
+    score    REAL,
+    price    REAL,
+    data     TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_scans_strategy ON scans(strategy, scan_id);
+CREATE INDEX IF NOT EXISTS idx_results_scan ON results(scan_id, symbol);
+CREATE INDEX IF NOT EXISTS idx_results_symbol ON results(symbol, strategy, scan_id);
+"""
+
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+def connect(path=DB_PATH):
+    """Neue Verbindung (eine pro Thread/Prozess), Schema wird beim ersten Mal angelegt."""
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    with _init_lock:
+        if path not in _initialized:
+            conn.executescript(SCHEMA)
+            _initialized.add(path)
+    return conn
+
+
+def _value(row, name):
+    value = row.get(name.capitalize())
+    if value is None:
+        value = row.get(name)
+    return value
+
+
+def _number(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+def _clean(row):
+    return {k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in row.items()}
+
+
+# ==============================================================================
+# SCHREIBEN
+# ==============================================================================
+
+def record_scan(strategy, results, started_at=None, finished_at=None, symbols=None, path=DB_PATH):
+    """Einen Scan-Lauf samt Treffern in einer Transaktion anhängen; liefert die scan_id."""
+    finished_at = finished_at or time.time()
+    conn = connect(path)
+    try:
+        with conn:
+            cur = conn.execute(
+                "INSERT INTO scans (strategy, started_at, finished_at, symbols, hits) VALUES (?, ?, ?, ?, ?)",
+                (strategy, started_at, finished_at, symbols, len(results)),
+            )
+            scan_id = cur.lastrowid
+            conn.executemany(
+                "INSERT INTO results (scan_id, strategy, symbol, region, score, price, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        scan_id,
+                        strategy,
+                        str(_value(row, "symbol")).upper(),
+                        _value(row, "region"),
+                        _number(_value(row, "score")),
+                        _number(_value(row, "price")),
+                        json.dumps(_clean(row), default=str),
+                    )
+                    for row in results
+                ],
+            )
+        return scan_id
+    finally:
+        conn.close()
+
+
+def import_csv(filename, strategy, path=DB_PATH):
+    """Alte Scan-CSV als Lauf übernehmen (Zeitpunkt = Änderungsdatum der Datei)."""
+    df = pd.read_csv(filename)
+    finished_at = os.path.getmtime(filename)
+    return record_scan(strategy, df.to_dict(orient="records"), finished_at=finished_at, path=path)
+
+
+# ==============================================================================
+# LESEN
+# ==============================================================================
+
+def _scan_meta(row):
+    return dict(row) if row is not None else None
+
+
+def list_scans(strategy=None, limit=50, path=DB_PATH):
+    conn = connect(path)
+    try:
+        if strategy:
+            rows = conn.execute(
+                "SELECT * FROM scans WHERE strategy = ? ORDER BY scan_id DESC LIMIT ?", (strategy, limit))
+        else:
+            rows = conn.execute("SELECT * FROM scans ORDER BY scan_id DESC LIMIT ?", (limit,))
+        return [dict(r) for r in rows]
+    finally:
+        conn.close()
+
+
+def get_scan(scan_id, path=DB_PATH):
+    """{"scan": Metadaten, "results": [Zeilen wie in der CSV]} oder None."""
+    conn = connect(path)
+    try:
+        meta = conn.execute("SELECT * FROM scans WHERE scan_id = ?", (scan_id,)).fetchone()
+        if meta is None:
+            return None
+        rows = conn.execute("SELECT data FROM results WHERE scan_id = ?", (scan_id,))
+        return {"scan": _scan_meta(meta), "results": [json.loads(r["data"]) for r in rows]}
+    finally:
+        conn.close()
+
+
+def latest_scan(strategy, path=DB_PATH):
+    """Letzter Schnappschuss einer Strategie ("value", "breakout", ...)."""
+    conn = connect(path)
+    try:
+        row = conn.execute(
+            "SELECT scan_id FROM scans WHERE strategy = ? ORDER BY scan_id DESC LIMIT 1", (strategy,)
+        ).fetchone()
+    finally:
+        conn.close()
+    return get_scan(row["scan_id"], path) if row else None
+
+
+def symbol_history(symbol, strategy=None, path=DB_PATH):
+    """Score/Preis eines Symbols über alle Läufe, in denen es ein Treffer war."""
+    sql = (
+        "SELECT r.scan_id, r.strategy, s.finished_at, r.score, r.price FROM results r "
+        "JOIN scans s ON s.scan_id = r.scan_id WHERE r.symbol = ?"
+    )
+    params = [symbol.upper()]
+    if strategy:
+        sql += " AND r.strategy = ?"
+        params.append(strategy)
+    conn = connect(path)
+    try:
+        return [dict(r) for r in conn.execute(sql + " ORDER BY r.scan_id", params)]
+    finally:
+        conn.close()
+
+
+def diff_scans(old_id=None, new_id=None, strategy=None, path=DB_PATH):
+    """
+    Unterschied zweier Läufe: neue Treffer, weggefallene Treffer, Score-Änderungen.
+    Ohne IDs: die beiden letzten Läufe von `strategy`.
+    """
+    conn = connect(path)
+    try:
+        if old_id is None or new_id is None:
+            ids = [r["scan_id"] for r in conn.execute(
+                "SELECT scan_id FROM scans WHERE strategy = ? ORDER BY scan_id DESC LIMIT 2", (strategy,))]
+            if len(ids) < 2:
+                return None
+            new_id, old_id = ids
+
+        def load(scan_id):
+            rows = conn.execute("SELECT symbol, score, price FROM results WHERE scan_id = ?", (scan_id,))
+            return {r["symbol"]: dict(r) for r in rows}
+
+        old, new = load(old_id), load(new_id)
+    finally:
+        conn.close()
+
+    changed = []
+    for symbol in sorted(old.keys() & new.keys()):
+        before, after = old[symbol]["score"], new[symbol]["score"]
+        if before is not None and after is not None and before != after:
+            changed.append({"symbol": symbol, "old": before, "new": after, "delta": after - before})
+    changed.sort(key=lambda c: -abs(c["delta"]))
+    return {
+        "old_scan": old_id,
+        "new_scan": new_id,
+        "new": [new[s] for s in sorted(new.keys() - old.keys())],
+        "dropped": [old[s] for s in sorted(old.keys() - new.keys())],
+        "changed": changed,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scan-Historie (SQLite)")
+    parser.add_argument("--import-csv", metavar="DATEI", help="Alte Scan-CSV übernehmen")
+    parser.add_argument("--strategy", default="breakout", help="Strategie für --import-csv / --diff")
+    parser.add_argument("--diff", action="store_true", help="Letzte zwei Läufe vergleichen")
+    args = parser.parse_args()
+
+    if args.import_csv:
+        print(f"Scan {import_csv(args.import_csv, args.strategy)} importiert.")
+    elif args.diff:
+        print(json.dumps(diff_scans(strategy=args.strategy), indent=2, default=str))
+    else:
+        for scan in list_scans():
+            print(scan)
@@ -0,0 +1,36 @@
+import os
+import time
+
+import scan_history
+
+# ==============================================================================
+# SCAN-ERGEBNISSE SICHER SCHREIBEN
+# ==============================================================================
+# Die App liest die CSVs, während ein Scan läuft. Deshalb erst in eine temporäre
+# Datei im selben Ordner schreiben und dann per os.replace() austauschen: Leser
+# sehen immer entweder die alte oder die neue, nie eine halbe Datei.
+#
+# Zusätzlich wird jeder Lauf in der Scan-Historie (scan_history.py) angehängt.
+
+
+def write_csv_atomic(df, filename):
+    folder = os.path.dirname(os.path.abspath(filename))
+    tmp = os.path.join(folder, f".{os.path.basename(filename)}.{os.getpid()}.tmp")
+    try:
+        df.to_csv(tmp, index=False)
+        os.replace(tmp, filename)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def record_history(strategy, results, started_at=None, symbols=None):
+    """Lauf in scan_history.db anhängen; ein DB-Fehler kostet nicht den ganzen Scan."""
+    try:
+        scan_id = scan_history.record_scan(strategy, results, started_at=started_at,
+                                           finished_at=time.time(), symbols=symbols)
+        print(f"[HISTORY] Scan {scan_id} ({strategy}, {len(results)} Treffer) gespeichert.")
+        return scan_id
+    except Exception as e:
+        print(f"[HISTORY-ERROR] Konnte Scan nicht speichern: {e}")
+        return None
@@ -0,0 +1,196 @@
+import os
+import time
+import queue
+import threading
+import multiprocessing
+import concurrent.futures
+
+# ==============================================================================
+# ZWEISTUFIGE SCAN-PIPELINE: I/O-THREADS -> BEGRENZTE QUEUE -> PROZESS-POOL
+# ==============================================================================
+# Im Thread-Modus rechnen dieselben Threads, die auf Yahoo warten, auch die
+# pandas-Indikatoren – die Rechenarbeit läuft dann wegen des GIL praktisch auf
+# einem Kern. Hier laden Threads nur (Stufe 1) und legen die Frames in eine
+# begrenzte Queue; ein Prozess-Pool rechnet (Stufe 2) auf allen Kernen.
+#
+# Backpressure: ist die Queue voll, blockieren die Lade-Threads; im Pool sind
+# höchstens 2 Aufgaben pro Prozess gleichzeitig, der Rest wartet in der Queue.
+#
+# Bricht die Rechen-Stufe ab (Strg+C, kaputter Prozess-Pool), geben die
+# Lade-Threads auf: sie warten nur PUT_TIMEOUT-weise auf Platz in der Queue
+# und prüfen dazwischen das Stop-Signal – sonst hinge der Interpreter beim
+# Beenden an den blockierten (nicht-daemon) Pool-Threads.
+
+QUEUE_SIZE = 64
+PUT_TIMEOUT = 0.5
+CPU_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # ein Kern bleibt für die I/O-Stufe
+
+_DONE = object()
+
+
+class StageStats:
+    """Durchsatz einer Stufe: Anzahl, Fehler, summierte Arbeitszeit."""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.empty = 0
+        self.errors = 0
+        self.busy = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds, empty=False, error=False):
+        with self._lock:
+            self.items += 1
+            self.busy += seconds
+            self.empty += empty
+            self.errors += error
+
+    def as_dict(self, wall, workers):
+        return {
+            "items": self.items,
+            "empty": self.empty,
+            "errors": self.errors,
+            "per_sec": round(self.items / wall, 1) if wall > 0 else 0.0,
+            # Anteil der Worker-Zeit, in der wirklich gearbeitet wurde
+            "utilization": round(self.busy / (wall * workers), 2) if wall > 0 else 0.0,
+        }
+
+
+def _timed(compute, job, payload):
+    """Läuft im Worker-Prozess: Ergebnis plus reine Rechenzeit."""
+    t0 = time.perf_counter()
+    return compute(job, payload), time.perf_counter() - t0
+
+
+def _drain(q):
+    while True:
+        try:
+            q.get_nowait()
+        except queue.Empty:
+            return
+
+
+def run_pipeline(jobs, fetch, compute, io_workers=20, cpu_workers=CPU_WORKERS,
+                 queue_size=QUEUE_SIZE, on_result=None, on_done=None, on_progress=None):
+    """
+    fetch(job) -> Payload oder None (Threads, Netzwerk),
+    compute(job, payload) -> Ergebnis oder None (Prozess-Pool; beide müssen
+    picklebar sein, also Funktionen auf Modulebene).
+    on_result(result) wird für jedes Ergebnis aufgerufen, on_done(job, result)
+    für jeden fehlerfrei abgeschlossenen Job (z.B. Checkpoints) und
+    on_progress(job, result) für jeden Job, auch nach Fehlern (result None;
+    z.B. Fortschrittsanzeige). Liefert (Ergebnisse, Statistik).
+    """
+    start = time.time()
+    q = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    io_stats, cpu_stats = StageStats("io"), StageStats("cpu")
+    lock = threading.Lock()
+    results = []
+    waits = {"producer": 0.0, "max_depth": 0}
+
+    def finished(job, result, error=False):
+        if on_done is not None and not error:
+            on_done(job, result)
+        if on_progress is not None:
+            on_progress(job, result)
+
+    def put(item):
+        """Wie q.put, gibt aber nach einem Abbruch der Rechen-Stufe auf (-> False)."""
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce(job):
+        if stop.is_set():
+            return
+        t0 = time.perf_counter()
+        try:
+            payload = fetch(job)
+            error = False
+        except Exception as e:
+            print(f"[PIPELINE] Laden fehlgeschlagen {job}: {e}")
+            payload, error = None, True
+        io_stats.record(time.perf_counter() - t0, empty=payload is None and not error, error=error)
+        if payload is None:
+            finished(job, None, error)
+            return
+        t1 = time.perf_counter()
+        if not put((job, payload)):  # blockiert, wenn die Rechen-Stufe nicht hinterherkommt
+            return
+        with lock:
+            waits["producer"] += time.perf_counter() - t1
+            waits["max_depth"] = max(waits["max_depth"], q.qsize())
+
+    def collect(job, future):
+        try:
+            result, seconds = future.result()
+            cpu_stats.record(seconds, empty=result is None)
+            error = False
+        except Exception as e:
+            print(f"[PIPELINE] Rechnen fehlgeschlagen {job}: {e}")
+            cpu_stats.record(0.0, error=True)
+            result, error = None, True
+        finally:
+            slots.release()
+        finished(job, result, error)
+        if result is not None:
+            with lock:
+                results.append(result)
+            if on_result is not None:
+                on_result(result)
+
+    slots = threading.Semaphore(cpu_workers * 2)
+    io_pool = concurrent.futures.ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="scan-io")
+    io_futures = [io_pool.submit(produce, job) for job in jobs]
+
+    def close_queue():
+        concurrent.futures.wait(io_futures)
+        put(_DONE)
+
+    threading.Thread(target=close_queue, name="scan-io-close", daemon=True).start()
+
+    ctx = multiprocessing.get_context("spawn")
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=cpu_workers, mp_context=ctx) as cpu_pool:
+            while True:
+                item = q.get()
+                if item is _DONE:
+                    break
+                slots.acquire()
+                job, payload = item
+                cpu_pool.submit(_timed, compute, job, payload).add_done_callback(
+                    lambda f, job=job: collect(job, f))
+    finally:
+        # Nach einem Abbruch: Lade-Threads freigeben, wartende Jobs verwerfen
+        stop.set()
+        _drain(q)
+        io_pool.shutdown(wait=False, cancel_futures=True)
+
+    wall = time.time() - start
+    stats = {
+        "seconds": round(wall, 2),
+        "io": io_stats.as_dict(wall, io_workers),
+        "cpu": cpu_stats.as_dict(wall, cpu_workers),
+        "queue": {
+            "size": queue_size,
+            "max_depth": waits["max_depth"],
+            "producer_wait": round(waits["producer"], 2),  # Sekunden, die I/O auf die Queue wartete
+        },
+        "workers": {"io": io_workers, "cpu": cpu_workers},
+    }
+    return results, stats
+
+
+def print_stats(stats):
+    io, cpu, q = stats["io"], stats["cpu"], stats["queue"]
+    print(f"\n[PIPELINE] {stats['seconds']}s | I/O: {io['items']} geladen ({io['per_sec']}/s, "
+          f"Auslastung {io['utilization']:.0%}, {io['empty']} leer, {io['errors']} Fehler) | "
+          f"Queue: max {q['max_depth']}/{q['size']}, I/O wartete {q['producer_wait']}s | "
+          f"CPU: {cpu['items']} gerechnet ({cpu['per_sec']}/s, Auslastung {cpu['utilization']:.0%}, "
+          f"{stats['workers']['cpu']} Prozesse)")
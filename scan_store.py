@@ -0,0 +1,148 @@
+import math
+import bisect
+import threading
+from collections import OrderedDict, defaultdict
+
+from caching import SingleFlight
+
+# ==============================================================================
+# INDIZIERTE SCAN-ERGEBNISSE FÜR /api/stocks
+# ==============================================================================
+# Unveränderlicher Schnappschuss einer Scan-CSV mit Indizes nach Symbol, Region
+# und Score. Nach jedem Scan wird ein neuer Store gebaut und als Ganzes
+# getauscht, daher braucht das Lesen keine Locks.
+#
+# Spaltennamen wie in den CSVs (Symbol, Region, Score, ...); Abfragen nutzen
+# Kleinschreibung (sort=-score) und finden beide Varianten. Sortieren und
+# min_score gehen nur über Spalten, die es gibt – die Value-Watchlist hat z.B.
+# keinen Score (nur der Breakout-Scan), dort ist das ein Fehler statt ein No-op.
+
+DEFAULT_REGION = "US"  # wie im Dashboard: Zeilen ohne Region zählen als US
+CACHE_ENTRIES = 256    # vorberechnete Antworten pro Schnappschuss (LRU)
+
+
+def _field(row, name):
+    value = row.get(name.capitalize())
+    if value is None:
+        value = row.get(name)
+    return value
+
+
+def _number(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+def _clean(row):
+    """NaN aus pandas -> None, damit die Antwort gültiges JSON ist."""
+    return {k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in row.items()}
+
+
+def _sort_key(value):
+    number = _number(value)
+    if number is not None:
+        return (0, number, "")
+    return (1, 0.0, str(value).lower())
+
+
+class ScanResultStore:
+    """Scan-Ergebnisse mit O(1)-Lookup pro Symbol und Indizes für Region/Score."""
+
+    def __init__(self, records=(), version=None):
+        self.rows = [_clean(r) for r in records]
+        self.version = version
+        self.columns = {str(k).lower() for row in self.rows for k in row}
+        self.by_symbol = {}
+        self.by_region = defaultdict(list)
+        scored = []
+        for i, row in enumerate(self.rows):
+            symbol = _field(row, "symbol")
+            if symbol:
+                self.by_symbol.setdefault(str(symbol).upper(), i)
+            region = _field(row, "region") or DEFAULT_REGION
+            self.by_region[str(region).upper()].append(i)
+            score = _number(_field(row, "score"))
+            if score is not None:
+                scored.append((-score, i))
+        scored.sort()
+        # Absteigend nach Score; _neg_scores ist aufsteigend -> bisect für min_score
+        self._neg_scores = [s for s, _ in scored]
+        self._by_score = [i for _, i in scored]
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._flight = SingleFlight()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get(self, symbol):
+        i = self.by_symbol.get(str(symbol).upper())
+        return None if i is None else self.rows[i]
+
+    def cached(self, key, factory):
+        """
+        Einmal pro Schnappschuss berechneter Wert (z.B. serialisierte Antwort).
+        Der Cache verschwindet mit dem Store, wenn nach einem Scan getauscht wird.
+        """
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        return self._flight.do(key, lambda: self._fill(key, factory))
+
+    def _fill(self, key, factory):
+        value = factory()
+        with self._cache_lock:
+            self._cache[key] = value
+            while len(self._cache) > CACHE_ENTRIES:
+                self._cache.popitem(last=False)
+        return value
+
+    def query(self, region=None, min_score=None, symbols=None, q=None,
+              sort=None, offset=0, limit=None):
+        """
+        Gefilterte, sortierte Seite: liefert (total, rows).
+        region/symbols: Listen, q: Teilstring in Symbol oder Name,
+        sort: Spaltenname, mit '-' davor absteigend (z.B. '-score').
+        ValueError, wenn sort oder min_score eine Spalte brauchen, die fehlt.
+        """
+        if self.rows:
+            if min_score is not None and "score" not in self.columns:
+                raise ValueError("min_score: diese Scan-Ergebnisse haben keine Score-Spalte")
+            if sort and sort.lstrip("+-").lower() not in self.columns:
+                raise ValueError(f"sort: unbekannte Spalte '{sort.lstrip('+-')}'")
+
+        ids = None  # None = alle Zeilen in CSV-Reihenfolge
+
+        def narrow(candidates):
+            return set(candidates) if ids is None else ids.intersection(candidates)
+
+        if region:
+            ids = narrow(i for r in region for i in self.by_region.get(r.upper(), ()))
+        if symbols:
+            ids = narrow(self.by_symbol[s.upper()] for s in symbols if s.upper() in self.by_symbol)
+        if min_score is not None:
+            count = bisect.bisect_right(self._neg_scores, -min_score)
+            ids = narrow(self._by_score[:count])
+
+        selected = range(len(self.rows)) if ids is None else sorted(ids)
+        if q:
+            q = q.lower()
+            selected = [i for i in selected
+                        if q in str(_field(self.rows[i], "symbol") or "").lower()
+                        or q in str(_field(self.rows[i], "name") or "").lower()]
+
+        if sort:
+            descending = sort.startswith("-")
+            name = sort.lstrip("+-")
+            present = [i for i in selected if _field(self.rows[i], name) is not None]
+            missing = [i for i in selected if _field(self.rows[i], name) is None]
+            present.sort(key=lambda i: _sort_key(_field(self.rows[i], name)), reverse=descending)
+            selected = present + missing  # fehlende Werte immer am Ende
+
+        total = len(selected)
+        end = None if limit is None else offset + limit
+        return total, [self.rows[i] for i in selected[offset:end]]
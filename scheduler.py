@@ -0,0 +1,131 @@
+import os
+import time
+import threading
+import importlib
+import multiprocessing
+import concurrent.futures
+
+# ==============================================================================
+# HINTERGRUND-SCHEDULER FÜR DIE SCANS
+# ==============================================================================
+# Führt die Scans (Value + GQBM, gemeinsam über scan_engine.py) in festen
+# Abständen in einem eigenen Prozess-Pool aus. Die Scanner schreiben ihre CSV
+# atomar (scan_output.write_csv_atomic); die App tauscht danach ihre Liste aus.
+#
+# Betrieb:
+#   - im Dev-Server:  VR_SCHEDULER=1 python app.py
+#   - mit gunicorn:   python scheduler.py als eigener Prozess neben den Workern,
+#                     die Worker erkennen neue CSVs am Änderungszeitpunkt.
+
+SCAN_INTERVAL_MINUTES = float(os.environ.get("VR_SCAN_INTERVAL", 360))
+
+# Name -> (Modul mit run_scan(), Argumente)
+SCAN_JOBS = {
+    # Ein Durchlauf für beide Strategien: jedes Symbol wird nur einmal abgefragt
+    "all": ("scan_engine", {"strategies": ("breakout", "value")}),
+}
+
+
+def _lower_priority():
+    """Scan-Prozesse laufen mit niedriger Priorität, die Web-Worker haben Vorrang."""
+    if hasattr(os, "nice"):
+        try:
+            os.nice(10)
+        except OSError:
+            pass
+
+
+def _run_job(module_name, kwargs):
+    module = importlib.import_module(module_name)
+    return module.run_scan(**kwargs)
+
+
+class ScanScheduler:
+    """Startet die Scans zyklisch im Prozess-Pool, ohne Request-Threads zu blockieren."""
+
+    def __init__(self, jobs=None, interval_minutes=SCAN_INTERVAL_MINUTES,
+                 on_complete=None, max_workers=1, run_on_start=True):
+        self.jobs = dict(jobs or SCAN_JOBS)
+        self.interval = interval_minutes * 60
+        self.on_complete = on_complete
+        self.max_workers = max_workers
+        self.run_on_start = run_on_start
+        self._pool = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.status = {
+            name: {"running": False, "last_start": None, "last_end": None,
+                   "last_result": None, "last_error": None, "next_run": None}
+            for name in self.jobs
+        }
+
+    def start(self):
+        # "spawn": kein fork() eines Prozesses mit laufenden Flask-/Pool-Threads
+        ctx = multiprocessing.get_context("spawn")
+        self._pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.max_workers, mp_context=ctx, initializer=_lower_priority)
+        now = time.time()
+        for name in self.jobs:
+            self.status[name]["next_run"] = now if self.run_on_start else now + self.interval
+        self._thread = threading.Thread(target=self._loop, name="scan-scheduler", daemon=True)
+        self._thread.start()
+        print(f"[SCHEDULER] gestartet: {', '.join(self.jobs)} alle {self.interval / 60:.0f} Min.")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            now = time.time()
+            for name in self.jobs:
+                if now >= self.status[name]["next_run"]:
+                    self.run_now(name)
+            upcoming = min(s["next_run"] for s in self.status.values())
+            self._stop.wait(timeout=max(1.0, min(30.0, upcoming - time.time())))
+
+    def run_now(self, name):
+        """Scan sofort einreihen (False, wenn er schon läuft)."""
+        with self._lock:
+            status = self.status[name]
+            if status["running"]:
+                return False
+            status["running"] = True
+            status["last_start"] = time.time()
+            status["next_run"] = status["last_start"] + self.interval
+        module_name, kwargs = self.jobs[name]
+        future = self._pool.submit(_run_job, module_name, kwargs)
+        future.add_done_callback(lambda f, name=name: self._done(name, f))
+        return True
+
+    def _done(self, name, future):
+        with self._lock:
+            status = self.status[name]
+            status["running"] = False
+            status["last_end"] = time.time()
+            try:
+                status["last_result"] = future.result()
+                status["last_error"] = None
+            except Exception as e:
+                status["last_error"] = str(e)
+                print(f"[SCHEDULER] Scan '{name}' fehlgeschlagen: {e}")
+                return
+        print(f"[SCHEDULER] Scan '{name}' fertig: {status['last_result']}")
+        if self.on_complete is not None:
+            try:
+                self.on_complete(name, status["last_result"])
+            except Exception as e:
+                print(f"[SCHEDULER] Callback für '{name}' fehlgeschlagen: {e}")
+
+
+if __name__ == "__main__":
+    # Companion-Prozess neben gunicorn: läuft, bis er beendet wird
+    scheduler = ScanScheduler().start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        scheduler.stop()
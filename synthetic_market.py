@@ -0,0 +1,181 @@
+import time
+import zlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+import bar_store
+import market_data
+
+# ==============================================================================
+# SYNTHETISCHER MARKT (OFFLINE, DETERMINISTISCH)
+# ==============================================================================
+# Datenquelle für Benchmarks (Schnittstelle wie market_data): Random-Walk-Kerzen,
+# info-dicts und News pro Symbol. Gleiches Symbol + gleicher Seed -> gleiche Daten
+# (Tageskerzen ab ANCHOR, ein Datum hat also an jedem Tag denselben Kurs).
+#
+#   with synthetic_market.installed(latency=0.02):
+#       webfinance.analyze_stock(("SYN0001", "US"))   # kein Netzwerk
+#
+# `latency` simuliert die Antwortzeit von Yahoo pro Abruf (Sekunden).
+
+ANCHOR = "2014-01-02"
+MARKET_TZ = "America/New_York"
+INTRADAY_DAYS = 22          # ~1 Monat 5-Minuten-Kerzen wie bei Yahoo
+BARS_PER_DAY = {"5m": 78, "15m": 26, "30m": 13, "1h": 7}
+NEWS_ITEMS = 8
+
+
+def symbols(n, prefix="SYN"):
+    """n synthetische Symbole, abwechselnd US/DE wie echte Universen."""
+    return [(f"{prefix}{i:04d}", "US" if i % 3 else "DE") for i in range(1, n + 1)]
+
+
+class SyntheticMarket:
+    """Erzeugt Kerzen, info und News pro Symbol aus einem festen Seed."""
+
+    def __init__(self, seed=42, latency=0.0):
+        self.seed = seed
+        self.latency = latency
+        self.calls = {"info": 0, "history": 0, "news": 0, "download": 0}
+        self._lock = threading.Lock()
+
+    def _rng(self, *parts):
+        return np.random.default_rng([self.seed] + [zlib.crc32(str(p).encode()) for p in parts])
+
+    def _wait(self, kind):
+        with self._lock:
+            self.calls[kind] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    # ------------------------------------------------------------------
+    # Kerzen
+    # ------------------------------------------------------------------
+
+    def _ohlcv(self, rng, index, start_price):
+        n = len(index)
+        drift = rng.normal(0.0003, 0.0004)
+        vol = rng.uniform(0.01, 0.03)
+        close = start_price * np.exp(np.cumsum(rng.normal(drift, vol, n)))
+        open_ = np.concatenate([[start_price], close[:-1]]) * (1 + rng.normal(0, vol / 4, n))
+        high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, vol / 2, n)))
+        low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, vol / 2, n)))
+        volume = np.round(rng.lognormal(rng.uniform(12, 15), 0.5, n))
+        return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close,
+                             "Volume": volume}, index=index)
+
+    def _daily(self, symbol):
+        today = pd.Timestamp.now(tz=MARKET_TZ).normalize().tz_localize(None)
+        index = pd.bdate_range(ANCHOR, today).tz_localize(MARKET_TZ)
+        index.name = "Date"
+        rng = self._rng(symbol, "1d")
+        return self._ohlcv(rng, index, rng.uniform(10, 500))
+
+    def _intraday(self, symbol, interval):
+        per_day = BARS_PER_DAY.get(interval, BARS_PER_DAY["5m"])
+        step = pd.Timedelta(minutes=390 // per_day)
+        days = pd.bdate_range(end=pd.Timestamp.now(tz=MARKET_TZ).normalize().tz_localize(None),
+                              periods=INTRADAY_DAYS)
+        index = pd.DatetimeIndex([day + pd.Timedelta(hours=9, minutes=30) + i * step
+                                  for day in days for i in range(per_day)]).tz_localize(MARKET_TZ)
+        index.name = "Datetime"
+        last_close = self._daily(symbol)["Close"].iloc[-1]
+        rng = self._rng(symbol, interval, days[0].date())
+        return self._ohlcv(rng, index, last_close)
+
+    def history(self, symbol, interval="1d", period=None, start=None, **_):
+        """Wie market_data.history(): period=... oder start=..."""
+        self._wait("history")
+        df = self._intraday(symbol, interval) if bar_store._is_intraday(interval) else self._daily(symbol)
+        if start is not None:
+            start = pd.Timestamp(start)
+            df = df[df.index >= (start.tz_localize(MARKET_TZ) if start.tz is None else start)]
+        if period is not None:
+            df = bar_store.slice_period(df, period)
+        return df
+
+    def timezone(self, symbol):
+        return MARKET_TZ
+
+    def download(self, tickers, period="1y", interval="1d", **_):
+        """
+        Wie market_data.download(..., group_by="ticker"): Spalten (Symbol, Feld).
+        Tageskerzen wie bei yf.download ohne Zeitzone (Börsendatum).
+        """
+        self._wait("download")
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        frames = {}
+        for symbol in tickers:
+            if bar_store._is_intraday(interval):
+                frames[symbol] = bar_store.slice_period(self._intraday(symbol, interval), period)
+            else:
+                df = bar_store.slice_period(self._daily(symbol), period)
+                frames[symbol] = df.tz_localize(None)
+        return pd.concat(frames, axis=1)
+
+    # ------------------------------------------------------------------
+    # info & News
+    # ------------------------------------------------------------------
+
+    def info(self, symbol):
+        """ticker.info mit allen Feldern, die Value-Screen und Details-Seite lesen."""
+        self._wait("info")
+        rng = self._rng(symbol, "info")
+        daily = self._daily(symbol)
+        price = float(daily["Close"].iloc[-1])
+        year = daily["Close"].iloc[-252:]
+        german = symbol.endswith(".DE") or rng.random() < 0.3
+        return {
+            "shortName": f"{symbol} Corp",
+            "longName": f"{symbol} Corporation",
+            "longBusinessSummary": f"{symbol} Corporation ist ein synthetisches Unternehmen. " * 6,
+            "country": "Germany" if german else "United States",
+            "currency": "EUR" if german else "USD",
+            "sector": ["Technology", "Industrials", "Healthcare", "Financial Services"][int(rng.integers(4))],
+            "industry": "Synthetic Industry",
+            "currentPrice": round(price, 2),
+            "regularMarketPrice": round(price, 2),
+            "twoHundredDayAverage": round(float(daily["Close"].iloc[-200:].mean()), 2),
+            "fiftyTwoWeekHigh": round(float(year.max()), 2),
+            "fiftyTwoWeekLow": round(float(year.min()), 2),
+            "marketCap": int(price * rng.uniform(5e7, 5e9)),
+            "trailingPE": round(float(rng.uniform(5, 60)), 2),
+            "forwardPE": round(float(rng.uniform(5, 50)), 2),
+            "pegRatio": round(float(rng.uniform(0.3, 4)), 2) if rng.random() < 0.7 else None,
+            "trailingEps": round(float(rng.normal(3, 3)), 2),
+            "revenueGrowth": round(float(rng.normal(0.06, 0.1)), 3),
+            "debtToEquity": round(float(rng.uniform(0, 300)), 1),
+            "freeCashflow": int(rng.normal(5e8, 1e9)),
+            "profitMargins": round(float(rng.normal(0.1, 0.1)), 3),
+            "returnOnEquity": round(float(rng.normal(0.12, 0.1)), 3),
+            "returnOnAssets": round(float(rng.normal(0.05, 0.05)), 3),
+            "currentRatio": round(float(rng.uniform(0.5, 3)), 2),
+            "quickRatio": round(float(rng.uniform(0.3, 2.5)), 2),
+            "priceToBook": round(float(rng.uniform(0.5, 15)), 2),
+            "priceToSalesTrailing12Months": round(float(rng.uniform(0.5, 20)), 2),
+            "enterpriseToEbitda": round(float(rng.uniform(3, 40)), 2),
+            "enterpriseToRevenue": round(float(rng.uniform(0.5, 15)), 2),
+            "dividendYield": round(float(rng.uniform(0, 0.05)), 4),
+            "payoutRatio": round(float(rng.uniform(0, 0.8)), 3),
+            "beta": round(float(rng.uniform(0.3, 2.0)), 2),
+        }
+
+    def news(self, symbol):
+        self._wait("news")
+        now = int(time.time())
+        return [{
+            "title": f"{symbol}: Meldung {i + 1}",
+            "publisher": "Synthetic Wire",
+            "link": f"https://example.com/{symbol.lower()}/{i + 1}",
+            "providerPublishTime": now - i * 3600,
+        } for i in range(NEWS_ITEMS)]
+
+
+def installed(seed=42, latency=0.0, store_root=None):
+    """
+    Den synthetischen Markt als Datenquelle (market_data) setzen und einen leeren
+    Bar-Store (temporärer Ordner) verwenden. Liefert den SyntheticMarket.
+    """
+    return market_data.isolated(SyntheticMarket(seed=seed, latency=latency), store_root)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Flaches Modul-Layout: Module liegen im Projektordner, nicht in einem Paket
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
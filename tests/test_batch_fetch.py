@@ -0,0 +1,63 @@
+import bar_store
+import batch_fetch
+import fetch_control
+import market_data
+import synthetic_market
+
+
+def test_batch_merge_then_delta_update_has_no_duplicate_days(tmp_path):
+    store = bar_store.BarStore(str(tmp_path))
+    # download() liefert Tageskerzen ohne Zeitzone, history() mit Börsen-Zeitzone
+    with market_data.using(synthetic_market.SyntheticMarket()):
+        for _ in batch_fetch.iter_batches(["SYN0001"], period="1y", store=store, prefetch=False):
+            pass
+        store.update("SYN0001", period="1y", max_age=0)   # Delta über history()
+
+    df = store.load("SYN0001", period="1y")
+    assert str(df.index.tz) == synthetic_market.MARKET_TZ
+    assert df.index.is_unique
+    assert not df.index.normalize().duplicated().any()
+    assert (df.index.hour == 0).all()
+
+
+class ThrottledMarket(synthetic_market.SyntheticMarket):
+    """yf.download lässt gedrosselte Ticker still weg; einzeln kommt nur `available` durch."""
+
+    def __init__(self, dropped, available):
+        super().__init__()
+        self.dropped = set(dropped)
+        self.available = set(available)
+
+    def download(self, tickers, period="1y", interval="1d", **kwargs):
+        kept = [t for t in tickers if t not in self.dropped]
+        return super().download(kept, period=period, interval=interval, **kwargs)
+
+    def history(self, symbol, interval="1d", period=None, start=None, **kwargs):
+        if symbol not in self.available:
+            raise ConnectionError("Verbindung abgebrochen")
+        return super().history(symbol, interval=interval, period=period, start=start, **kwargs)
+
+
+def test_symbols_missing_from_a_chunk_are_refetched_or_reported():
+    symbols = [s for s, _ in synthetic_market.symbols(6)]
+    fetcher = fetch_control.Fetcher(retries=1, base_delay=0)
+    market = ThrottledMarket(dropped=symbols[:2], available=symbols[1:])
+    with market_data.using(market):
+        frames = batch_fetch.fetch_chunk(fetcher, symbols)
+
+    assert sorted(frames) == symbols[1:]          # SYN0002 einzeln nachgeladen
+    assert [f["symbol"] for f in fetcher.report()] == [symbols[0]]
+    assert fetcher.has_failed(symbols[0])
+
+
+def test_recorded_batch_download_lands_on_history_days(tmp_path):
+    archive = market_data.Archive(str(tmp_path))
+    recorder = market_data.RecordingProvider(synthetic_market.SyntheticMarket(), archive)
+    recorder.download(["SYN0001", "SYN0002"], period="1y", interval="1d", group_by="ticker")
+    recorder.history("SYN0001", interval="1d", period="1y")
+
+    df = archive.get_history("SYN0001", "1d", period="1y")
+    assert str(df.index.tz) == synthetic_market.MARKET_TZ
+    assert not df.index.normalize().duplicated().any()
+    replayed = market_data.ReplayProvider(archive).download(["SYN0001"], period="1y")
+    assert replayed.index.tz is None
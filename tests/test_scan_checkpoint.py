@@ -0,0 +1,64 @@
+import threading
+import time
+
+import breakout_scan
+import scan_checkpoint
+
+
+def test_interrupted_scan_stops_promptly_and_resume_redoes_only_open_symbols(tmp_path):
+    jobs = [(f"SYN{i:04d}", "US") for i in range(400)]
+    calls = []
+    lock = threading.Lock()
+
+    def analyzer(job):
+        with lock:
+            calls.append(job[0])
+            n = len(calls)
+        if n == 30:
+            raise KeyboardInterrupt   # wie Strg+C im Hauptthread (future.result())
+        time.sleep(0.1)
+        return None
+
+    checkpoint = scan_checkpoint.ScanCheckpoint("test", root=str(tmp_path), jobs=jobs)
+    started = time.time()
+    try:
+        breakout_scan.run_thread_scan(jobs, analyzer=analyzer, checkpoint=checkpoint)
+    except KeyboardInterrupt:
+        pass
+    else:
+        raise AssertionError("KeyboardInterrupt verschluckt")
+    checkpoint.close()
+    # Ohne Abbruch der Warteschlange: 400 * 0.1s / 20 Threads = 2s
+    assert time.time() - started < 1.0
+    assert len(calls) < 100
+    marked = set(checkpoint.done)
+    assert marked and len(marked) < len(calls)
+
+    resumed = scan_checkpoint.ScanCheckpoint("test", resume=True, root=str(tmp_path), jobs=jobs)
+    assert set(resumed.done) == marked
+    calls.clear()
+    breakout_scan.run_thread_scan(resumed.pending(jobs), analyzer=lambda job: calls.append(job[0]),
+                                  checkpoint=resumed)
+    assert sorted(calls) == sorted(set(sym for sym, _ in jobs) - marked)
+    assert len(resumed) == len(jobs)
+
+
+def test_resume_starts_fresh_for_another_universe_or_an_old_checkpoint(tmp_path, monkeypatch):
+    jobs = [("AAA", "US"), ("BBB", "US"), ("CCC", "DE")]
+    checkpoint = scan_checkpoint.ScanCheckpoint("test", root=str(tmp_path), jobs=jobs)
+    checkpoint.mark("AAA", {"Symbol": "AAA"})
+    checkpoint.close()
+
+    same = scan_checkpoint.ScanCheckpoint("test", resume=True, root=str(tmp_path), jobs=list(reversed(jobs)))
+    assert same.hits() == [{"Symbol": "AAA"}]
+    same.close()
+
+    other = scan_checkpoint.ScanCheckpoint("test", resume=True, root=str(tmp_path), jobs=jobs[:2])
+    assert len(other) == 0 and other.pending(jobs[:2]) == jobs[:2]
+    other.mark("AAA")
+    other.close()
+
+    monkeypatch.setattr(scan_checkpoint, "MAX_AGE", -1)
+    stale = scan_checkpoint.ScanCheckpoint("test", resume=True, root=str(tmp_path), jobs=jobs[:2])
+    assert len(stale) == 0
+    stale.close()
@@ -0,0 +1,73 @@
+import bar_store
+
+# ==============================================================================
+# CHART-ZEITRÄUME AUS ZWEI BASIS-REIHEN ABLEITEN
+# ==============================================================================
+# Pro Symbol halten wir eine Intraday-Reihe (5-Minuten-Kerzen, 1 Monat) und
+# Tageskerzen im Bar-Store. Alle Zeiträume des Dashboards werden daraus lokal per
+# Resampling gebildet -> ein Tab-Wechsel braucht keinen Yahoo-Abruf mehr, wenn
+# das Symbol schon geladen ist.
+#
+# Die Tagesreihe gibt es in drei Längen: 2 Jahre reichen für die Details und
+# 6M/1Y (inkl. Vorlauf für MA200), erst 5Y bzw. MAX laden die längere Historie
+# nach. Sonst holte schon der erste Details-Aufruf die komplette Historie und
+# riss regelmäßig das Zeitbudget (DETAILS_DEADLINES in app.py).
+
+# Basis-Reihen: (Intervall, Periode) für den Bar-Store
+BASES = {
+    "intraday": ("5m", "1mo"),
+    "daily": ("1d", "2y"),
+    "daily_long": ("1d", "10y"),    # 5Y-Wochenkerzen + 200 Wochen Vorlauf
+    "daily_max": ("1d", "max"),
+}
+
+# Frontend-Zeitraum -> (Basis, Resample-Regel oder None, sichtbarer Zeitraum)
+TIMEFRAMES = {
+    "1D": ("intraday", None, "1d"),
+    "1W": ("intraday", "30min", "5d"),   # 5 Handelstage, 30-Minuten-Kerzen
+    "1M": ("intraday", "1h", "1mo"),
+    "6M": ("daily", None, "6mo"),
+    "1Y": ("daily", None, "1y"),
+    "5Y": ("daily_long", "W", "5y"),
+    "MAX": ("daily_max", "W", "max"),
+}
+DEFAULT_TIMEFRAME = "1Y"  # Fallback für unbekannte Werte
+
+OHLCV_AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+
+def resolve(timeframe):
+    return TIMEFRAMES.get(timeframe, TIMEFRAMES[DEFAULT_TIMEFRAME])
+
+
+def load_base(symbol, kind, strict=False):
+    """
+    Basis-Reihe aus dem Bar-Store (lädt bei Yahoo nur das Delta nach).
+    strict=True: Yahoo-Fehler werfen statt eine leere Reihe zu liefern.
+    """
+    interval, period = BASES[kind]
+    return bar_store.get_history(symbol, period=period, interval=interval, strict=strict)
+
+
+def resample_ohlc(df, rule):
+    """Kerzen zusammenfassen. 'W' = Wochenkerzen ab Montag (wie yfinance '1wk')."""
+    if rule == "W":
+        groups = df.resample("W-MON", label="left", closed="left")
+    else:
+        # Bins ab der ersten Kerze -> passen zur Handelszeit der jeweiligen Börse
+        groups = df.resample(rule, origin="start")
+    out = groups.agg({col: OHLCV_AGG[col] for col in df.columns if col in OHLCV_AGG})
+    out = out.dropna(subset=["Close"])
+    out.index.name = df.index.name
+    return out
+
+
+def derive(base, timeframe):
+    """
+    Liefert (frame, start): die ggf. resampelte Reihe über die GANZE Basis (für
+    Indikatoren mit Vorlauf) und die Position, ab der der sichtbare Zeitraum beginnt.
+    """
+    _, rule, period = resolve(timeframe)
+    frame = resample_ohlc(base, rule) if rule else base
+    window = bar_store.slice_period(frame, period)
+    return frame, len(frame) - len(window)
@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import argparse
+from io import StringIO
+
+import pandas as pd
+import requests
+
+# ==============================================================================
+# UNIVERSEN-REGISTER (WELCHE AKTIEN WERDEN GESCANNT?)
+# ==============================================================================
+# - Lokale Listen liegen als Textdateien in universes/ (ein oder mehrere Symbole
+#   pro Zeile, '#' leitet Kommentare ein, "# region: XX" legt die Region fest).
+#   Neue Datei anlegen = neues Universum, Name ist der Dateiname ohne Endung.
+#   CSV-Dateien mit Spalte Symbol (optional Region) gehen ebenfalls.
+# - Online-Listen (S&P 500 von Wikipedia) werden auf der Platte zwischengespeichert
+#   und erst nach REFRESH_AGE neu geholt, mit If-None-Match/If-Modified-Since:
+#   unveränderte Seiten kosten keinen HTML-Parse. Fällt die Quelle aus, gilt der Cache.
+# - load_jobs() führt mehrere Universen zusammen; ein Symbol, das in mehreren
+#   Indizes steckt (SAP in DAX und Euro Stoxx), bekommt die Region des ersten.
+
+UNIVERSE_DIR = os.environ.get(
+    "VR_UNIVERSE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "universes"))
+CACHE_DIR = os.environ.get("VR_UNIVERSE_CACHE", "universe_cache")
+REFRESH_AGE = 7 * 24 * 3600  # Sekunden; Indexänderungen sind selten
+DEFAULT_REGION = "US"
+
+# Browser-Header gegen Blockaden
+HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
+
+
+def _parse_sp500(html):
+    tables = pd.read_html(StringIO(html))
+    # Robuste Suche nach der richtigen Tabelle
+    for t in tables:
+        if 'Symbol' in t.columns and 'Security' in t.columns:
+            # Yahoo braucht Bindestriche statt Punkte (BRK-B statt BRK.B)
+            return t['Symbol'].astype(str).str.replace('.', '-', regex=False).tolist()
+    return []
+
+
+# Name -> (Region, URL, Parser(html) -> Symbole)
+REMOTE_UNIVERSES = {
+    "sp500": ("US", "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies", _parse_sp500),
+}
+
+
+# ==============================================================================
+# LOKALE DATEIEN
+# ==============================================================================
+
+def _read_text_universe(path):
+    region = None
+    symbols = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            text, _, comment = line.partition("#")
+            comment = comment.strip()
+            if comment.lower().startswith("region:"):
+                region = comment.split(":", 1)[1].strip().upper()
+            symbols.extend(text.replace(",", " ").split())
+    return region, symbols
+
+
+def _read_csv_universe(path):
+    df = pd.read_csv(path)
+    symbols = df['Symbol'].astype(str).str.strip().tolist()
+    if 'Region' in df.columns:
+        return [(s, str(r).upper()) for s, r in zip(symbols, df['Region'])]
+    return [(s, None) for s in symbols]
+
+
+def local_universes(root=UNIVERSE_DIR):
+    """{Name: Pfad} aller Dateien in universes/."""
+    found = {}
+    if os.path.isdir(root):
+        for filename in sorted(os.listdir(root)):
+            name, ext = os.path.splitext(filename)
+            if ext.lower() in (".txt", ".csv"):
+                found[name] = os.path.join(root, filename)
+    return found
+
+
+def _load_local(path):
+    if path.lower().endswith(".csv"):
+        return [(s, r or DEFAULT_REGION) for s, r in _read_csv_universe(path)]
+    region, symbols = _read_text_universe(path)
+    return [(s, region or DEFAULT_REGION) for s in symbols]
+
+
+# ==============================================================================
+# ONLINE-LISTEN MIT CACHE
+# ==============================================================================
+
+def _cache_path(name):
+    return os.path.join(CACHE_DIR, f"{name}.json")
+
+
+def _read_cache(name):
+    try:
+        with open(_cache_path(name), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(name, entry):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _cache_path(name)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+    os.replace(tmp, path)
+
+
+def refresh_remote(name, force=False):
+    """
+    Online-Liste bei Bedarf neu holen (bedingter Request). Liefert die Symbole;
+    bei Fehlern den letzten Cache-Stand.
+    """
+    _, url, parse = REMOTE_UNIVERSES[name]
+    cached = _read_cache(name)
+    if cached and not force and time.time() - cached.get("fetched_at", 0) < REFRESH_AGE:
+        return cached["symbols"]
+
+    headers = dict(HEADERS)
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    try:
+        r = requests.get(url, headers=headers, timeout=30)
+        if r.status_code == 304 and cached:
+            cached["fetched_at"] = time.time()
+            _write_cache(name, cached)
+            print(f"[UNIVERSE] {name}: unverändert ({len(cached['symbols'])} Symbole)")
+            return cached["symbols"]
+        r.raise_for_status()
+        symbols = parse(r.text)
+        if not symbols:
+            raise ValueError("keine Symbole gefunden")
+    except Exception as e:
+        if cached:
+            print(f"[UNIVERSE] {name}: Aktualisierung fehlgeschlagen ({e}), nutze Cache")
+            return cached["symbols"]
+        print(f"[UNIVERSE] Fehler {name}: {e}")
+        return []
+
+    _write_cache(name, {
+        "symbols": symbols,
+        "fetched_at": time.time(),
+        "etag": r.headers.get("ETag"),
+        "last_modified": r.headers.get("Last-Modified"),
+    })
+    print(f"[UNIVERSE] {name}: {len(symbols)} Symbole aktualisiert")
+    return symbols
+
+
+# ==============================================================================
+# REGISTER
+# ==============================================================================
+
+def available():
+    """Alle bekannten Universen (online + lokale Dateien)."""
+    return sorted(set(REMOTE_UNIVERSES) | set(local_universes()))
+
+
+def load(name, force=False):
+    """Ein Universum als Liste von (Symbol, Region)."""
+    if name in REMOTE_UNIVERSES:
+        region = REMOTE_UNIVERSES[name][0]
+        return [(s, region) for s in refresh_remote(name, force=force)]
+    path = local_universes().get(name)
+    if path is None:
+        raise KeyError(f"Unbekanntes Universum '{name}' (verfügbar: {', '.join(available())})")
+    return _load_local(path)
+
+
+def load_jobs(names, force=False):
+    """
+    Mehrere Universen zusammenführen, Duplikate entfernen (z.B. SAP ist in DAX
+    und Euro Stoxx). Liefert [(Symbol, Region)]; die Region kommt vom ersten
+    Universum, in dem das Symbol vorkommt.
+    """
+    seen = set()
+    all_jobs = []
+    counts = {}
+    for name in names:
+        jobs = load(name, force=force)
+        counts[name] = len(jobs)
+        for symbol, region in jobs:
+            if symbol not in seen:
+                all_jobs.append((symbol, region))
+                seen.add(symbol)
+    print(f"Universen: {', '.join(f'{n} ({c})' for n, c in counts.items())} -> {len(all_jobs)} Aktien")
+    return all_jobs
+
+
+def memberships(names):
+    """{Symbol: [Universen]} – in welchen Indizes steckt ein Symbol?"""
+    result = {}
+    for name in names:
+        for symbol, _ in load(name):
+            result.setdefault(symbol, []).append(name)
+    return result
+
+
+def refresh_all(force=False):
+    """Alle Online-Listen prüfen (z.B. per Cron/Scheduler)."""
+    return {name: len(refresh_remote(name, force=force)) for name in REMOTE_UNIVERSES}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Universen-Register")
+    parser.add_argument("--refresh", action="store_true", help="Online-Listen prüfen/aktualisieren")
+    parser.add_argument("--force", action="store_true", help="Mit --refresh: Cache-Alter ignorieren")
+    args = parser.parse_args()
+
+    if args.refresh:
+        print(refresh_all(force=args.force))
+    for name in available():
+        print(f"{name:<15} {len(load(name)):>4} Symbole")
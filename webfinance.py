@@ -1,8 +1,15 @@
-import yfinance as yf
 import pandas as pd
-import requests
-from io import StringIO
 import concurrent.futures
+import argparse
+import time
+
+import batch_fetch
+import fetch_control
+import market_data
+import scan_checkpoint
+import scan_feed
+import scan_output
+import universe
 
 # ==========================================
 # KONFIGURATION (DEINE STRATEGIE)
@@ -30,64 +37,16 @@ CHECK_FCF = True     # Muss Free Cash Flow haben
 CHECK_TREND = True
 
 # 5. Geschwindigkeit:
-MAX_WORKERS = 10 
+#    Obergrenze – wie viele Abrufe gleichzeitig laufen, regelt fetch_control je
+#    nach Latenz und Drosselung durch Yahoo.
+MAX_WORKERS = 20
+FETCHER = fetch_control.Fetcher(max_workers=MAX_WORKERS)
 
-# ==========================================
-# 1. DATENQUELLEN (REGIORNEN)
-# ==========================================
+# 6. Ausgabe (wird von app.py gelesen)
+OUTPUT_FILE = "global_watchlist.csv"
 
-def get_sp500_tickers():
-    print("Lade S&P 500 (USA)...")
-    url = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
-    
-    try:
-        response = requests.get(url, headers=headers)
-        tables = pd.read_html(StringIO(response.text))
-        
-        # Robuste Suche nach der richtigen Tabelle
-        df = None
-        for t in tables:
-            if 'Symbol' in t.columns and 'Security' in t.columns:
-                df = t
-                break
-        
-        if df is None: return []
-
-        # Yahoo braucht Bindestriche statt Punkte (BRK-B statt BRK.B)
-        tickers = df['Symbol'].str.replace('.', '-', regex=False).tolist()
-        print(f"-> {len(tickers)} US-Aktien bereit.")
-        return tickers
-    except Exception as e:
-        print(f"Fehler US-Liste: {e}")
-        return []
-
-def get_dax_tickers():
-    print("Lade DAX 40 (Deutschland)...")
-    # Hardcoded Liste ist sicherer wegen .DE Endungen
-    dax = [
-        "ADS.DE", "AIR.DE", "ALV.DE", "BAS.DE", "BAYN.DE", "BEI.DE", "BMW.DE", "BNR.DE",
-        "CBK.DE", "CON.DE", "1COV.DE", "DTG.DE", "DBK.DE", "DB1.DE", "DHL.DE", "DTE.DE",
-        "EOAN.DE", "FRE.DE", "HNR1.DE", "HEI.DE", "HEN3.DE", "IFX.DE", "MBG.DE", "MRK.DE",
-        "MTX.DE", "MUV2.DE", "PUM.DE", "QIA.DE", "RWE.DE", "SAP.DE", "SRT3.DE", "SIE.DE",
-        "ENR.DE", "SY1.DE", "VOW3.DE", "VNA.DE", "ZAL.DE", "SHL.DE", "HLAG.DE", "RHM.DE"
-    ]
-    print(f"-> {len(dax)} DE-Aktien bereit.")
-    return dax
-
-def get_euro_tickers():
-    print("Lade EURO STOXX 50 (Europa)...")
-    # Enthält ASML, LVMH, Ferrari etc. mit korrekten Länder-Endungen
-    euro_stoxx = [
-        "ASML.AS", "MC.PA", "SAP.DE", "PRX.AS", "SIE.DE", "TTE.PA", "SAN.MC", "OR.PA",
-        "ALV.DE", "AIR.PA", "IBE.MC", "RMS.PA", "SU.PA", "AI.PA", "DTE.DE", "BNP.PA",
-        "ABI.BR", "ITX.MC", "VOW3.DE", "BAYN.DE", "BMW.DE", "INGA.AS", "BAS.DE", "MBG.DE",
-        "KER.PA", "AD.AS", "CS.PA", "SAF.PA", "MUV2.DE", "ENEL.MI", "ISP.MI", "ENI.MI",
-        "STLAM.MI", "RACE.MI", "ORA.PA", "DG.PA", "BN.PA", "CAP.PA", "NOKIA.HE", "AH.AS",
-        "UNA.AS", "PHIA.AS", "HEIA.AS", "KNEBV.HE", "BBVA.MC", "CRH.L"
-    ]
-    print(f"-> {len(euro_stoxx)} EU-Aktien bereit.")
-    return euro_stoxx
+# 7. Märkte (universe.py / Ordner universes/), Reihenfolge = Region bei Dubletten
+UNIVERSES = ("sp500", "dax40", "eurostoxx")
 
 # ==========================================
 # 2. DER ANALYST (LOGIK)
@@ -97,14 +56,21 @@ def analyze_stock(data_packet):
     symbol, region = data_packet
     
     try:
-        stock = yf.Ticker(symbol)
-        
-        # Info abrufen (Netzwerk-Call)
+        # Info abrufen (Netzwerk-Call über market_data, mit Retries/Backoff)
         try:
-            info = stock.info
-        except:
-            return None # Überspringen bei Fehler
+            info = FETCHER.call("info", symbol, lambda: market_data.info(symbol))
+        except fetch_control.FetchFailed:
+            return None # Überspringen, steht im Fehlerbericht
+
+        return evaluate_info(symbol, region, info)
+
+    except Exception:
+        return None
 
+
+def evaluate_info(symbol, region, info):
+    """Value-Screen auf einem fertigen ticker.info-dict (ohne Netzwerk, auch für scan_engine.py)."""
+    try:
         # --- A. PREIS & TREND ---
         price = info.get('currentPrice')
         sma_200 = info.get('twoHundredDayAverage')
@@ -170,38 +136,32 @@ def analyze_stock(data_packet):
 # 3. HAUPTPROGRAMM (START)
 # ==========================================
 
-if __name__ == "__main__":
-    
-    # Listen zusammenführen
-    all_jobs = []
-    
-    # Dubletten vermeiden (z.B. SAP ist in DAX und EuroStoxx)
-    seen_symbols = set()
+def load_universe():
+    # Listen zusammenführen, Dubletten vermeiden (z.B. SAP ist in DAX und EuroStoxx)
+    return universe.load_jobs(UNIVERSES)
 
-    for t in get_sp500_tickers():
-        if t not in seen_symbols:
-            all_jobs.append((t, "US"))
-            seen_symbols.add(t)
-            
-    for t in get_dax_tickers():
-        if t not in seen_symbols:
-            all_jobs.append((t, "DE"))
-            seen_symbols.add(t)
-            
-    for t in get_euro_tickers():
-        if t not in seen_symbols:
-            all_jobs.append((t, "EU"))
-            seen_symbols.add(t)
 
-    print(f"\nStarte GLOBAL-SCAN von {len(all_jobs)} Aktien...")
-    print("="*60)
-    print(f"{'Region':<8} | {'Symbol':<10} | {'Name':<30} | Grund")
-    print("-" * 75)
+def print_hit(res):
+    # Ausgabe löscht den Fortschrittsbalken und schreibt den Treffer
+    print(f"✅ [{res['Region']}] | {res['Symbol']:<10} | {res['Name'][:30]:<30} | {res['Reason']}")
 
+
+def symbol_done(symbol, res, checkpoint=None, feed=None):
+    """
+    Symbol fertig: im Checkpoint festhalten (fehlgeschlagene Abrufe bleiben für
+    --resume offen) und Treffer/Fortschritt an den Live-Feed melden.
+    """
+    if checkpoint is not None and not FETCHER.has_failed(symbol):
+        checkpoint.mark(symbol, res)
+    if feed is not None:
+        feed.advance(res)
+
+
+def run_thread_scan(all_jobs, checkpoint=None, feed=None):
     results = []
     
-    # Multithreading starten
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+    # Multithreading starten (Strg+C verwirft die wartenden Aktien, siehe scan_checkpoint)
+    with scan_checkpoint.worker_pool(MAX_WORKERS) as executor:
         future_to_stock = {executor.submit(analyze_stock, job): job for job in all_jobs}
         
         counter = 0
@@ -213,11 +173,38 @@ if __name__ == "__main__":
             print(f"Fortschritt: {counter}/{total} checked...", end="\r")
             
             res = future.result()
+            symbol_done(future_to_stock[future][0], res, checkpoint, feed)
             if res:
                 results.append(res)
-                # Ausgabe löscht den Fortschrittsbalken und schreibt den Treffer
-                print(f"✅ [{res['Region']}] | {res['Symbol']:<10} | {res['Name'][:30]:<30} | {res['Reason']}")
+                print_hit(res)
+    return results
+
+
+def run_batch_scan(all_jobs, chunk_size=batch_fetch.BATCH_SIZE, checkpoint=None, feed=None):
+    """
+    Batch-Modus: ticker.info lässt sich bei Yahoo nicht bündeln, die Symbole laufen
+    blockweise durch (Zeit pro Block im Log). Bewusst ohne Trend-Vorfilter auf der
+    History: der weicht von der Regel auf ticker.info ab (currentPrice vs.
+    twoHundredDayAverage), das Ergebnis muss aber in jedem Modus gleich sein.
+    """
+    results = []
+    chunks = list(batch_fetch.chunked(list(all_jobs), chunk_size))
+    with scan_checkpoint.worker_pool(MAX_WORKERS) as executor:
+        for index, chunk in enumerate(chunks, 1):
+            t0 = time.time()
+            hits = [res for res in executor.map(analyze_stock, chunk) if res]
+            by_symbol = {res['Symbol']: res for res in hits}
+            for sym, _ in chunk:
+                symbol_done(sym, by_symbol.get(sym), checkpoint, feed)
+            print(f"[BATCH] Chunk {index}/{len(chunks)}: info {len(chunk)} Symbole "
+                  f"in {time.time() - t0:.2f}s | {len(hits)} Treffer")
+            for res in hits:
+                print_hit(res)
+            results.extend(hits)
+    return results
 
+
+def save_results(results, filename=OUTPUT_FILE):
     # --- ABSCHLUSS ---
     print("\n" + "="*60)
     print(f"SCAN BEENDET. {len(results)} Treffer gefunden.")
@@ -228,10 +215,69 @@ if __name__ == "__main__":
         # Sortieren: Erst nach Region, dann nach Bewertung
         df = df.sort_values(by=['Region', 'Symbol'])
         
-        # Speichern
-        filename = "global_watchlist.csv"
-        df.to_csv(filename, index=False)
+        # Speichern (atomar, die App liest die Datei evtl. gerade)
+        scan_output.write_csv_atomic(df, filename)
         print(f"Liste wurde gespeichert als '{filename}'")
         print("Viel Erfolg bei der Analyse!")
     else:
-        print("Keine Aktien gefunden. Der Markt ist aktuell teuer oder im Abwärtstrend.")
\ No newline at end of file
+        print("Keine Aktien gefunden. Der Markt ist aktuell teuer oder im Abwärtstrend.")
+
+
+def run_scan(output=OUTPUT_FILE, batch=False, chunk_size=batch_fetch.BATCH_SIZE, resume=False):
+    """
+    Kompletter Scan inkl. Speichern – wird auch vom Scheduler (scheduler.py) aufgerufen.
+    resume=True: abgebrochenen Lauf fortsetzen (scan_checkpoint.py).
+    """
+    start = time.time()
+    FETCHER.reset()
+    all_jobs = load_universe()
+    checkpoint = scan_checkpoint.ScanCheckpoint("value", resume=resume, jobs=all_jobs)
+    previous = checkpoint.hits()
+    todo = checkpoint.pending(all_jobs)
+    if resume:
+        print(f"Fortsetzen: {len(all_jobs) - len(todo)} Aktien schon erledigt, {len(previous)} Treffer übernommen.")
+
+    feed = scan_feed.ScanFeed("value", total=len(all_jobs), done=len(all_jobs) - len(todo))
+    for res in previous:
+        feed.hit(res)
+
+    print(f"\nStarte GLOBAL-SCAN von {len(all_jobs)} Aktien...")
+    print("="*60)
+    print(f"{'Region':<8} | {'Symbol':<10} | {'Name':<30} | Grund")
+    print("-" * 75)
+
+    try:
+        if batch:
+            results = previous + run_batch_scan(todo, chunk_size=chunk_size, checkpoint=checkpoint, feed=feed)
+        else:
+            results = previous + run_thread_scan(todo, checkpoint=checkpoint, feed=feed)
+    except BaseException:
+        checkpoint.close()
+        feed.close()
+        print(f"\nAbgebrochen – {len(checkpoint)} Aktien gesichert, weiter mit --resume.")
+        raise
+
+    FETCHER.print_report()
+    FETCHER.write_report()
+    save_results(results, output)
+    scan_output.record_history("value", results, started_at=start, symbols=len(all_jobs))
+    feed.finish()
+    if FETCHER.summary()["failed"]:
+        checkpoint.close()  # fehlgeschlagene Symbole kann --resume nachholen
+    else:
+        checkpoint.finish()
+    return {"symbols": len(all_jobs), "hits": len(results), "fetch": FETCHER.summary(),
+            "seconds": round(time.time() - start, 1)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Value-Scan (global_watchlist.csv)")
+    parser.add_argument("--batch", action="store_true",
+                        help="Symbole blockweise abarbeiten (Laufzeit pro Block)")
+    parser.add_argument("--chunk-size", type=int, default=batch_fetch.BATCH_SIZE,
+                        help=f"Symbole pro Batch-Request (Standard: {batch_fetch.BATCH_SIZE})")
+    parser.add_argument("--resume", action="store_true",
+                        help="Abgebrochenen Scan fortsetzen (erledigte Aktien überspringen)")
+    args = parser.parse_args()
+
+    run_scan(batch=args.batch, chunk_size=args.chunk_size, resume=args.resume)